@@ -45,6 +45,15 @@ def on_enable() -> None:
             return
         State.Editor.start_loading(args.MovieName.lower())
 
+    def level_streaming(
+        _obj: unreal.UObject,
+        args: unreal.WrappedStruct,
+        _ret: Any,
+        _func: unreal.BoundFunction,
+    ) -> None:
+        b_visible = args.bNewShouldBeLoaded and args.bNewShouldBeVisible
+        State.Editor.on_level_streaming(str(args.PackageName).lower(), b_visible)
+
     hooks.add_hook(
         "WillowGame.WillowPlayerController:WillowClientDisableLoadingMovie",
         hooks.Type.PRE,
@@ -57,6 +66,12 @@ def on_enable() -> None:
         __file__,
         start_load,
     )
+    hooks.add_hook(
+        "Engine.PlayerController:ClientUpdateLevelStreamingStatus",
+        hooks.Type.PRE,
+        __file__,
+        level_streaming,
+    )
 
 
 def on_disable() -> None:
@@ -64,6 +79,7 @@ def on_disable() -> None:
 
     hooks.remove_hook("WillowGame.WillowPlayerController:WillowClientDisableLoadingMovie", hooks.Type.PRE, __file__)
     hooks.remove_hook("WillowGame.WillowPlayerController:WillowClientShowLoadingMovie", hooks.Type.PRE, __file__)
+    hooks.remove_hook("Engine.PlayerController:ClientUpdateLevelStreamingStatus", hooks.Type.PRE, __file__)
 
 
 
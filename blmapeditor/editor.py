@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import json
 import os
 from enum import Flag, IntEnum, auto
@@ -12,7 +13,22 @@ from mods_base import ENGINE, get_pc
 from uemath.constants import URU_1
 from unrealsdk import logging
 
-from . import gui, inputmanager, packagemanager, placeablehelpers, settings
+from . import (
+    gui,
+    handles,
+    inputmanager,
+    layers,
+    mapfile,
+    materialcatalog,
+    packagemanager,
+    pathnames,
+    placeablehelpers,
+    scatter,
+    scene,
+    settings,
+    streaming,
+    tagquery,
+)
 from . import selectedobject as sobj
 
 __all__: list[str] = ["instance"]
@@ -20,6 +36,8 @@ __all__: list[str] = ["instance"]
 if TYPE_CHECKING:
     from common import WillowGameEngine, WillowPlayerController, WillowPlayerPawn
 
+    from . import placeables
+
 ENGINE = cast("WillowGameEngine", ENGINE)
 
 
@@ -44,12 +62,21 @@ PLACEABLE_OBJECT_ATTRIBUTES: dict[str, list[ModuleType]] = {
     "Prefab": [gui.placeables.metadata, gui.placeables.transform, gui.placeables.prefab_parts],
 }
 
-PLACEABLE_TO_HELPER: dict[str, placeablehelpers.PlaceableHelper] = {
-    "AIPawnBalanceDefinition": placeablehelpers.PawnHelper,
-    "InteractiveObjectDefinition": placeablehelpers.InteractiveHelper,
-    "Prefab": placeablehelpers.PrefabHelper,
-    "StaticMeshComponent": placeablehelpers.SMCHelper,
-}
+
+def _filter_map_by_tags(map_data: dict, tag_expression: tagquery.Expression) -> dict:
+    """Only keep the Create and Edit entries whose tags match the expression, Destroy entries are always kept."""
+    created = {
+        uclass: [kept for entry in entries if (kept := _filter_entries_by_tags(entry, tag_expression))]
+        for uclass, entries in map_data.get("Create", {}).items()
+    }
+    edited = {
+        uclass: _filter_entries_by_tags(entries, tag_expression) for uclass, entries in map_data.get("Edit", {}).items()
+    }
+    return {**map_data, "Create": created, "Edit": edited}
+
+
+def _filter_entries_by_tags(entries: dict[str, dict], tag_expression: tagquery.Expression) -> dict[str, dict]:
+    return {name: attrs for name, attrs in entries.items() if tag_expression.matches(attrs.get("Tags", []))}
 
 
 class Editor:
@@ -79,58 +106,218 @@ class Editor:
             placeablehelpers.InteractiveHelper,
             placeablehelpers.PrefabHelper,
         ]
+        # The objects placed by the last scatter, there is no undo history so only this one can be removed again
+        self.last_scatter: tuple[placeablehelpers.PlaceableHelper, list[placeables.AbstractPlaceable]] | None = None
 
-    def load_map(self, abs_path: str) -> None:
+    def load_map(self, abs_path: str, tag_expression: tagquery.Expression | None = None) -> None:
         """
-        Load a custom map from a given .json file.
+        Load a custom map from a given map file of any format, the map becomes a layer that can be unloaded again.
+        If a tag expression is given only the created and edited objects with matching tags are loaded.
+        Loading the same map with the same tag expression again replaces its layer.
+        The packages of the map are loaded over the next ticks, its objects are placed once all of them are resolved.
         """
         for helper in self.placeable_helpers:
             helper.on_enable()  # make sure they are all enabled
 
         curr_map = ENGINE.GetCurrentWorldInfo().GetStreamingPersistentMapName().lower()
-        if os.path.isfile(abs_path):
-            with open(abs_path) as fp:
-                map_dict = json.load(fp)
-        else:
+        if not os.path.isfile(abs_path):
             logging.dev_warning(f"Map '{abs_path}' does not exist!")
             return
+        try:
+            # only the current level is read, outdated map files get migrated once
+            map_dict = mapfile.migrations.load(abs_path, (curr_map, "LoadedObjects", mapfile.dependencies.MANIFEST_KEY))
+        except ValueError as e:
+            logging.error(f"Map '{abs_path}' could not be loaded: {e}")
+            return
 
-        packagemanager.load_from_json(map_dict)
-
+        # the objects the map keeps alive are shared with other layers and only released once no layer needs them
+        layer_name = layers.get_layer_name(abs_path, tag_expression)
         load_this = map_dict.get(curr_map, None)
+        dependencies: list[str] = []
         if not load_this:
+            # still becomes an empty layer, unloading it releases the objects the map keeps alive
             logging.info("No Map data for currently loaded map found!")
-            return
+            load_this = {}
+        else:
+            dependencies = self._get_dependencies(abs_path, map_dict, curr_map)
+            if tag_expression is not None:
+                load_this = _filter_map_by_tags(load_this, tag_expression)
+        # the placeables may use objects of the maps packages, so they are only applied once those got loaded
+        packagemanager.load_from_json(
+            map_dict,
+            layer_name,
+            functools.partial(self._load_layer, abs_path, tag_expression, load_this),
+            dependencies,
+        )
+
+    def _get_dependencies(self, abs_path: str, map_dict: dict, level_name: str) -> list[str]:
+        """
+        Get the packages a level of the map references from the maps manifest. Without a manifest entry the level is
+        scanned once and the result gets cached in the map file, so later loads skip the scan.
+        """
+        packages = mapfile.dependencies.get_dependencies(map_dict, level_name)
+        if packages is not None:
+            return packages
+        manifest = mapfile.dependencies.with_level(
+            map_dict.get(mapfile.dependencies.MANIFEST_KEY, {}),
+            level_name,
+            map_dict[level_name],
+        )
+        try:
+            mapfile.formats.update_items(abs_path, {mapfile.dependencies.MANIFEST_KEY: manifest})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not cache the dependencies of '{abs_path}', they get scanned again: {e}")
+        return manifest[level_name]
+
+    def _load_layer(self, abs_path: str, tag_expression: tagquery.Expression | None, load_this: dict) -> None:
+        """Apply the current levels section of a map file as a layer, replacing the layer it was loaded as before."""
+        previous = layers.loaded.get(layers.get_layer_name(abs_path, tag_expression))
+        if previous is not None and previous.b_loaded:
+            layers.unload(previous)
+        snapshot = layers.take_snapshot(self.placeable_helpers)
         for helper in self.placeable_helpers:
             helper.load_map(load_this)  # start loading map using all available placeable helpers
+        layers.add_layer(abs_path, tag_expression, snapshot, layers.get_edited_paths(load_this))
 
-    def save_map(self, abs_path: str) -> None:
+    def toggle_layer(self, name: str) -> None:
+        """Unload a loaded layer, or load an unloaded one again from its map file."""
+        layer = layers.loaded.get(name)
+        if layer is None:
+            return
+        if layer.b_loaded:
+            layers.unload(layer)
+            packagemanager.release_owner(layer.name)
+        else:
+            self.load_map(layer.path, layer.tag_expression)
+
+    def on_level_streaming(self, level_name: str, b_visible: bool) -> None:
         """
-        Save the current map changes to a .json map file.
+        Keep the helpers in sync with a sub-level of the current level that gets streamed in or out.
+        The changes of a streamed out sub-level are stashed, so they are saved and applied again on stream in.
         """
-        curr_map = ENGINE.GetCurrentWorldInfo().GetStreamingPersistentMapName().lower()
-        save_this = {}
+        if b_visible:
+            streaming.request_stream_in(level_name, self._on_level_streamed_in)
+            return
+        self._forget_objects(streaming.stream_out(self.placeable_helpers, level_name), level_name)
+
+    def _forget_objects(self, removed: list[placeables.AbstractPlaceable], level_name: str | None = None) -> None:
+        """Drop every reference to objects the helpers forgot, e.g. because their in-game objects are gone."""
+        if not removed:
+            return
+        layers.forget_objects(set(removed), level_name)
+        if sobj.SELECTED_OBJECT in removed:
+            sobj.SELECTED_OBJECT = None
 
+    def _on_level_streamed_in(self, level_name: str) -> None:
+        """Index the objects of a sub-level that just became visible and apply the map changes that belong to it."""
+        for helper in self.placeable_helpers:
+            helper.on_level_streamed_in(level_name)
+        stash = streaming.stashed.pop(level_name, None)
+        if stash is not None:
+            snapshot = layers.take_snapshot(self.placeable_helpers)
+            for helper in self.placeable_helpers:
+                helper.load_map(stash)
+            for layer in layers.loaded.values():  # the layers claim the originals they edited before stream out
+                paths = layer.streamed_out.pop(level_name, None)
+                if paths and layer.b_loaded:
+                    layers.extend_layer(layer, snapshot, paths)
+            return
+        # first stream in since the layers were loaded, their entries of this sub-level had nothing to apply to
+        curr_map = ENGINE.GetCurrentWorldInfo().GetStreamingPersistentMapName().lower()
+        for layer in layers.loaded.values():
+            layer.streamed_out.pop(level_name, None)
+            if not layer.b_loaded:
+                continue
+            try:
+                level = mapfile.migrations.load(layer.path, (curr_map,)).get(curr_map)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not apply '{layer.path}' to the sub-level '{level_name}': {e}")
+                continue
+            if not level:
+                continue
+            if layer.tag_expression is not None:
+                level = _filter_map_by_tags(level, layer.tag_expression)
+            level = streaming.filter_level(level, level_name)
+            snapshot = layers.take_snapshot(self.placeable_helpers)
+            for helper in self.placeable_helpers:
+                helper.load_map(level)
+            layers.extend_layer(layer, snapshot, layers.get_edited_paths(level))
+
+    def _read_map_for_saving(self, abs_path: str, keys: tuple[str, ...] | None = None) -> dict | None:
+        """
+        Read the map file that is about to be saved to, None if it exists but is not a valid map file.
+        Outdated map files get migrated first, even if no keys are read.
+        """
         try:
-            with open(abs_path) as fp:
-                save_this = json.load(fp)
-        except json.JSONDecodeError:
+            return mapfile.migrations.load(abs_path, keys)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
             logging.error(
-                f"[ERROR] '{abs_path}' seems to not be valid .json! The map could not be loaded, the files content remains unchanged.",
+                f"[ERROR] '{abs_path}' seems to not be a valid map file ({e})! The files content remains unchanged.",
             )
-        except FileNotFoundError:
-            pass
+        return None
 
+    def _get_changed_items(self, map_data: dict) -> dict:
+        """
+        Get the top-level map entries the live scene replaces, the current levels section, the packages and the
+        dependency manifest of the given map data.
+        """
+        curr_map = ENGINE.GetCurrentWorldInfo().GetStreamingPersistentMapName().lower()
         # let's overwrite the previous data for this map, as it will get added back anyway
-        save_this[curr_map] = {}
+        save_this: dict = {"Version": mapfile.migrations.CURRENT_VERSION, curr_map: {}}
         for mode in self.placeable_helpers:
             mode.save_map(save_this[curr_map])
+        streaming.merge_stashed(save_this[curr_map])  # streamed out sub-levels are no longer in the live scene
+        save_this[mapfile.dependencies.MANIFEST_KEY] = mapfile.dependencies.with_level(
+            map_data.get(mapfile.dependencies.MANIFEST_KEY, {}),
+            curr_map,
+            save_this[curr_map],
+        )
         # Packages are loaded only for kept alive objects
         # Thus they are map independent as they stay alive
         packagemanager.save_to_json(save_this)
+        return save_this
+
+    def _with_current_level(self, map_data: dict) -> dict:
+        """Get a copy of the map data with the current levels section replaced by the live scene."""
+        return {**map_data, **self._get_changed_items(map_data)}
+
+    def save_map(self, abs_path: str) -> None:
+        """
+        Save the current map changes to a map file, the format is picked by the file extension.
+        Only the current level and the packages are replaced, the other levels are never decoded.
+        """
+        map_data = self._read_map_for_saving(abs_path, (mapfile.dependencies.MANIFEST_KEY,))
+        if map_data is None:
+            return
+        mapfile.formats.update_items(abs_path, self._get_changed_items(map_data))
+
+    def save_patch(self, abs_path: str) -> None:
+        """
+        Save only the differences between a map file and the live scene, next to the map as a .patch file.
+        The map file itself stays unchanged, the patch can be reviewed and applied to it offline.
+        """
+        map_data = self._read_map_for_saving(abs_path)
+        if map_data is None:
+            return
+        patch = mapfile.diff.diff_maps(map_data, self._with_current_level(map_data))
+        with open(os.path.splitext(abs_path)[0] + ".patch", "w") as fp:
+            json.dump(patch, fp, default=mapfile.lazy.json_default)
+        logging.info(f"Saved {mapfile.diff.count_changes(patch)} changed objects to the patch of '{abs_path}'")
+
+    def scatter_selected_object(self, placements: list[scatter.Placement]) -> None:
+        """Place copies of the selected object, only the last scatter is remembered to be removed again."""
+        if not self.is_in_editor or not sobj.SELECTED_OBJECT or not placements:
+            return
+        helper = scene.get_helper(sobj.SELECTED_OBJECT)
+        self.last_scatter = (helper, helper.place_copies(sobj.SELECTED_OBJECT, placements))
 
-        with open(abs_path, "w") as fp:
-            json.dump(save_this, fp)
+    def remove_last_scatter(self) -> None:
+        if self.last_scatter:
+            helper, copies = self.last_scatter
+            helper.remove_copies(copies)
+            self.last_scatter = None
 
     def toggle_enable(self) -> None:
         if self.is_in_editor:
@@ -143,7 +330,7 @@ class Editor:
 
     def delete_selected_object(self) -> None:
         if self.is_in_editor and sobj.SELECTED_OBJECT:
-            PLACEABLE_TO_HELPER[sobj.SELECTED_OBJECT.uclass].delete_object()
+            scene.get_helper(sobj.SELECTED_OBJECT).delete_object()
             sobj.SELECTED_OBJECT = None
 
     def toggle_preview(self) -> None:
@@ -201,20 +388,20 @@ class Editor:
         If we are in "Create" or in "Prefabs" filter, don't do anything and tell the user.
         """
         if sobj.SELECTED_OBJECT and self.is_in_editor:
-            PLACEABLE_TO_HELPER[sobj.SELECTED_OBJECT.uclass].tp_to_selected_object(
+            scene.get_helper(sobj.SELECTED_OBJECT).tp_to_selected_object(
                 self.pc or cast("WillowPlayerController", get_pc()),
             )
 
     def restore_objects_default(self) -> None:
         if self.is_in_editor and sobj.SELECTED_OBJECT:
-            PLACEABLE_TO_HELPER[sobj.SELECTED_OBJECT.uclass].restore_objects_defaults()
+            scene.get_helper(sobj.SELECTED_OBJECT).restore_objects_defaults()
 
     def _copy(self) -> None:
         """This function gets called for the "Copy" keybind."""
         if not self.is_in_editor:
             return
         if sobj.SELECTED_OBJECT:
-            PLACEABLE_TO_HELPER[sobj.SELECTED_OBJECT.uclass].copy()
+            scene.get_helper(sobj.SELECTED_OBJECT).copy()
         elif sobj.HELPER_INSTANCE:
             sobj.HELPER_INSTANCE.copy()
 
@@ -241,7 +428,7 @@ class Editor:
             return
         if self.editor_mode == EEditingMode.Place:
             if sobj.SELECTED_OBJECT:  # If we have an object selected
-                PLACEABLE_TO_HELPER[sobj.SELECTED_OBJECT.uclass].cancel_editing()  # toggle it off
+                scene.get_helper(sobj.SELECTED_OBJECT).cancel_editing()  # toggle it off
                 gui.placeables.materials.SHOW_MATERIAL_MODAL = False
         else:
             self.update_edit_axis("Axis None", check_exclude_modifier=False)
@@ -282,6 +469,7 @@ class Editor:
                     direction * URU_1 if self.edit_axis & EAxis.Z else 0,
                 ),
             )
+        sobj.mark_dirty()
 
     def render(self) -> None:
         gui.menubar.draw_menu_bar()
@@ -290,6 +478,8 @@ class Editor:
         gui.docking_area.draw_docking_area()
         gui.quicksettings.draw_settings_menu()
         gui.packages.draw_packages_window()
+        gui.scatter.draw_scatter_window()
+        gui.layers.draw_layers_window()
         gui.placeablelist.draw_placeables_window(self.pc or get_pc(), self.placeable_helpers)
 
         imgui.begin("Object Attributes")
@@ -316,13 +506,19 @@ class Editor:
         # Set up the editing mode
         ENGINE.GetCurrentWorldInfo().bPlayersOnly = True
         self.pawn = self.pc.GetWillowPlayerPawn()
+        # objects may have been destroyed while playing, e.g. killed pawns
+        self._forget_objects([x for helper in self.placeable_helpers for x in helper.drop_stale_objects()])
         self.pc.HideHUD()
         self.pc.ServerSpectate()
         self.pc.bCollideWorld = False
         # Attach Callbacks
         gui.quicksettings.callback_checkbox_show_preview = lambda _: sobj.calculate_preview()
         gui.menubar.callback_save_map = self.save_map
+        gui.menubar.callback_save_patch = self.save_patch
         gui.menubar.callback_load_map = self.load_map
+        gui.scatter.callback_scatter = self.scatter_selected_object
+        gui.scatter.callback_remove_last_scatter = self.remove_last_scatter
+        gui.layers.callback_toggle_layer = self.toggle_layer
 
         self.register_input_callbacks()
         start_coroutine_post_render(self.on_post_render())
@@ -356,8 +552,17 @@ class Editor:
 
     def start_loading(self, map_name: str) -> None:
         # when we start to travel it would be good to remove any reference to possibly GC objects
+        handles.invalidate_all()
         for helper in self.placeable_helpers:
             helper.cleanup(map_name)
+        self.last_scatter = None
+        pathnames.clear()
+        materialcatalog.clear()
+        scene.clear()
+        layers.clear()
+        packagemanager.clear()
+        streaming.clear()
+        sobj.forget_previews()
 
     def end_loading(self, _map_name: str) -> None:
         self.pc = cast("WillowPlayerController", get_pc())
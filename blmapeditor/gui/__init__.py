@@ -1,12 +1,25 @@
-from . import docking_area, menubar, packages, placeablelist, placeables, quicksettings, statusbar, toolbar
+from . import (
+    docking_area,
+    layers,
+    menubar,
+    packages,
+    placeablelist,
+    placeables,
+    quicksettings,
+    scatter,
+    statusbar,
+    toolbar,
+)
 
 __all__ = [
     "docking_area",
+    "layers",
     "menubar",
     "packages",
     "placeablelist",
     "placeables",
     "quicksettings",
+    "scatter",
     "statusbar",
     "toolbar",
 ]
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from imgui_bundle import imgui
+
+from .. import layers, settings
+
+
+def callback_toggle_layer(x: str) -> None:
+    return print(f"Missing Callback: TOGGLE_LAYER({x})")
+
+
+def draw_layers_window() -> None:
+    """Draw the Layers window, every loaded map can be unloaded and loaded again without a level reload."""
+    if not settings.show_layers_window.value:
+        return
+    _, settings.show_layers_window.value = imgui.begin("Layers", p_open=True)
+    if not layers.loaded:
+        imgui.text_wrapped("Every loaded map becomes a layer that can be toggled here.")
+    for name, layer in list(layers.loaded.items()):
+        if imgui.checkbox(f"{name}##Layer", layer.b_loaded)[0]:
+            callback_toggle_layer(name)
+        if imgui.is_item_hovered():
+            imgui.set_tooltip(
+                f"{layer.count()} placed or edited objects"
+                if layer.b_loaded
+                else "Unloaded, objects the map destroyed stay destroyed.",
+            )
+    imgui.end()
@@ -5,18 +5,23 @@ import webbrowser
 
 from imgui_bundle import imgui
 
-from .. import settings
+from .. import mapfile, settings, tagquery
 
 
 def callback_save_map(x: str) -> None:
     return print(f"Missing Callback: SAVE_MAP({x})")
 
 
-def callback_load_map(x: str) -> None:
-    return print(f"Missing Callback: LOAD_MAP({x})")
+def callback_save_patch(x: str) -> None:
+    return print(f"Missing Callback: SAVE_PATCH({x})")
+
+
+def callback_load_map(x: str, tag_expression: tagquery.Expression | None) -> None:
+    return print(f"Missing Callback: LOAD_MAP({x}, {tag_expression})")
 
 
 _INPUT_TEXT_SAVE_MODAL: str = "Map Name"
+_B_COMPRESS_SAVE_MODAL: bool = False
 _MAPS_PATH: pathlib.Path = pathlib.Path(__file__).parent.parent / "Maps"
 _MAPS_PATH.mkdir(exist_ok=True)
 
@@ -78,6 +83,8 @@ def _draw_window_menu_items() -> None:
         ("Pawns", settings.show_pawns_window),
         ("Prefabs", settings.show_prefabs_window),
         ("Packages", settings.show_packages_window),
+        ("Scatter", settings.show_scatter_window),
+        ("Layers", settings.show_layers_window),
     ]:
         if imgui.menu_item(
             f"{'Hide' if option.value else 'Show'} {name}",
@@ -89,17 +96,28 @@ def _draw_window_menu_items() -> None:
 
 
 def _save_modal() -> None:
-    global _INPUT_TEXT_SAVE_MODAL  # noqa: PLW0603
+    global _INPUT_TEXT_SAVE_MODAL, _B_COMPRESS_SAVE_MODAL  # noqa: PLW0603
     imgui.text("Save Current Map to file:")
     _, _INPUT_TEXT_SAVE_MODAL = imgui.input_text("File Name", _INPUT_TEXT_SAVE_MODAL, 32)
-    imgui.text(f"Will be saved as '{(_MAPS_PATH / _INPUT_TEXT_SAVE_MODAL).resolve()}.json'")
+    _, _B_COMPRESS_SAVE_MODAL = imgui.checkbox("Compressed", _B_COMPRESS_SAVE_MODAL)
+    if imgui.is_item_hovered():
+        imgui.set_tooltip("Save as a much smaller .blmapz file, for sharing big maps. Loading detects it on its own.")
+    suffix = ".blmapz" if _B_COMPRESS_SAVE_MODAL else ".json"
+    imgui.text(f"Will be saved as '{(_MAPS_PATH / _INPUT_TEXT_SAVE_MODAL).resolve()}{suffix}'")
     imgui.text("Saving this file will overwrite map changes for this streamed level!")
 
     if imgui.button("Save"):
-        callback_save_map(str((_MAPS_PATH / f"{_INPUT_TEXT_SAVE_MODAL}.json").absolute()))
+        callback_save_map(str((_MAPS_PATH / f"{_INPUT_TEXT_SAVE_MODAL}{suffix}").absolute()))
         _INPUT_TEXT_SAVE_MODAL = "Map Name"
         imgui.close_current_popup()
     imgui.same_line()
+    if imgui.button("Save Patch"):
+        callback_save_patch(str((_MAPS_PATH / f"{_INPUT_TEXT_SAVE_MODAL}{suffix}").absolute()))
+        _INPUT_TEXT_SAVE_MODAL = "Map Name"
+        imgui.close_current_popup()
+    if imgui.is_item_hovered():
+        imgui.set_tooltip("Only save the changes to this map file as a .patch file, the map file stays unchanged.")
+    imgui.same_line()
     if imgui.button("Cancel"):
         _INPUT_TEXT_SAVE_MODAL = "Map Name"
         imgui.close_current_popup()
@@ -107,18 +125,31 @@ def _save_modal() -> None:
 
 
 _LOAD_MAP_INDEX: int = -1
+_LOAD_TAG_QUERY: str = ""
+_LOAD_TAG_QUERY_ERROR: str = ""
 
 
 def _load_modal() -> None:
-    global _LOAD_MAP_INDEX  # noqa: PLW0603
+    global _LOAD_MAP_INDEX, _LOAD_TAG_QUERY, _LOAD_TAG_QUERY_ERROR  # noqa: PLW0603
     # List all possible maps from the Maps folder
 
-    maps: list[str] = [_map.name for _map in _MAPS_PATH.glob("*.json")]
+    maps: list[str] = [_map.name for _map in sorted(_MAPS_PATH.iterdir()) if _map.suffix in mapfile.formats.FORMATS]
     _, _LOAD_MAP_INDEX = imgui.list_box("Maps", _LOAD_MAP_INDEX, maps)
+    _, _LOAD_TAG_QUERY = imgui.input_text("Only Tags", _LOAD_TAG_QUERY, 64)
+    if imgui.is_item_hovered():
+        imgui.set_tooltip("Only load objects whose tags match this expression, e.g. base or (event and not hard).")
+    if _LOAD_TAG_QUERY_ERROR:
+        imgui.text_colored((1, 0.3, 0.3, 1), _LOAD_TAG_QUERY_ERROR)
     if imgui.button("Load") and _LOAD_MAP_INDEX != -1:
-        callback_load_map(str((_MAPS_PATH / maps[_LOAD_MAP_INDEX]).absolute()))
-        _LOAD_MAP_INDEX = -1
-        imgui.close_current_popup()
+        try:
+            tag_expression = tagquery.parse(_LOAD_TAG_QUERY)
+        except ValueError as e:
+            _LOAD_TAG_QUERY_ERROR = str(e)
+        else:
+            callback_load_map(str((_MAPS_PATH / maps[_LOAD_MAP_INDEX]).absolute()), tag_expression)
+            _LOAD_MAP_INDEX = -1
+            _LOAD_TAG_QUERY_ERROR = ""
+            imgui.close_current_popup()
 
     if imgui.button("Cancel"):
         _LOAD_MAP_INDEX = -1
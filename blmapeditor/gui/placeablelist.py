@@ -12,6 +12,7 @@ NAME_TO_OPTION: dict[str, options.HiddenOption] = {o.identifier: o for o in sett
 del NAME_TO_OPTION[settings.show_quicksettings_window.identifier]
 
 LAST_SELECTED_INDEX: int = -1
+TAG_QUERY_ERRORS: dict[str, str] = {}  # helper name -> why its tag query is invalid
 
 def draw_placeables_window(pc: unreal.UObject, placeable_helpers: list[PlaceableHelper]) -> None:
     for ph in placeable_helpers:
@@ -48,11 +49,25 @@ def _navigate_with_keyboard() -> None:
         ph.update_preview()
 
 
+def _draw_tag_query(ph: PlaceableHelper) -> None:
+    in_tags = imgui.input_text("Tags", ph.tag_query, 64)
+    if in_tags[0]:
+        try:
+            ph.set_tag_query(in_tags[1])
+            TAG_QUERY_ERRORS.pop(ph.name, None)
+        except ValueError as e:
+            TAG_QUERY_ERRORS[ph.name] = str(e)
+    if imgui.is_item_hovered():
+        imgui.set_tooltip('Only list objects with matching tags, e.g. cover and not (red or "dark blue")')
+    if ph.name in TAG_QUERY_ERRORS:
+        imgui.text_colored((1, 0.3, 0.3, 1), TAG_QUERY_ERRORS[ph.name])
+
+
 def _populate_window(_pc: unreal.UObject, ph: PlaceableHelper) -> None:
     if imgui.button("Refresh"):
         ph.is_cache_dirty = True
     if imgui.is_item_hovered():
-        imgui.set_tooltip("Refresh the list of objects. Useful if you renamed an object.")
+        imgui.set_tooltip("Rebuild the list of objects from scratch.")
     imgui.same_line()
     if imgui.button("Rebuild Cache"):
         ph.cleanup("")
@@ -71,6 +86,7 @@ def _populate_window(_pc: unreal.UObject, ph: PlaceableHelper) -> None:
     if in_text[0]:
         ph.search_string = in_text[1]
         ph.is_cache_dirty = True
+    _draw_tag_query(ph)
 
     if sobj.SELECTED_OBJECT is None:
         if imgui.button("Edit/Create Selected Object"):
@@ -1,22 +1,12 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, cast
-
 from imgui_bundle import imgui
-from mods_base import ENGINE
-from unrealsdk import find_all
 
-from ... import placeables
+from ... import materialcatalog, placeables
 from ... import selectedobject as sobj
 
-if TYPE_CHECKING:
-    from common import MaterialInterface
-
-_material_instances: list[MaterialInterface] = []
-_material_instances_filtered: list[MaterialInterface] = []
-_material_instances_filtered_names: list[str] = []
 _selected_material_index: int = -1
-_selected_material_index_modal: int = -1
+_selected_material_index_modal: int = -1  # index into the material catalog, stays valid while filtering
 
 material_filter: str = ""
 SHOW_MATERIAL_MODAL: bool = False
@@ -27,10 +17,12 @@ def draw() -> None:
 
     assert sobj.SELECTED_OBJECT is not None
     game_obj: placeables.AbstractPlaceable = sobj.SELECTED_OBJECT
+    snapshot = sobj.get_snapshot()
+    assert snapshot is not None
     imgui.push_item_width(-1)
     if imgui.button("Add Material"):
         SHOW_MATERIAL_MODAL = True
-        _material_instances.extend(cast(list["MaterialInterface"], list(find_all("MaterialInstanceConstant"))[1:]))
+        materialcatalog.build()
 
     if SHOW_MATERIAL_MODAL:
         imgui.open_popup("Add Material")
@@ -40,11 +32,12 @@ def draw() -> None:
     imgui.same_line()
     if imgui.button("Remove Material"):
         game_obj.remove_material(index=_selected_material_index)
+        sobj.mark_dirty()
     imgui.text("Materials")
     _selected_material_index = imgui.list_box(
         "##Materials",
         _selected_material_index,
-        [ENGINE.PathName(x) for x in game_obj.get_materials()],
+        snapshot.material_names,
     )[1]
     imgui.spacing()
     imgui.separator()
@@ -54,36 +47,37 @@ def draw() -> None:
 
 
 def _material_modal() -> None:
-    global SHOW_MATERIAL_MODAL, material_filter  # noqa: PLW0603
-    global _material_instances_filtered, _material_instances_filtered_names, _selected_material_index_modal  # noqa: PLW0603
+    global SHOW_MATERIAL_MODAL, material_filter, _selected_material_index_modal  # noqa: PLW0603
     imgui.push_item_width(500)
 
     assert sobj.SELECTED_OBJECT is not None
     game_obj: placeables.AbstractPlaceable = sobj.SELECTED_OBJECT
     imgui.text("Filter Materials")
-    b_filtered, material_filter = imgui.input_text("##Filter Materials", material_filter, 24)
-    if b_filtered:
-        _material_instances_filtered = [
-            x for x in _material_instances if material_filter.lower() in ENGINE.PathName(x).lower()
-        ]
-        _material_instances_filtered_names = [ENGINE.PathName(x) for x in _material_instances_filtered]
-
-    _selected_material_index_modal = imgui.list_box(
-        "##Materials",
-        _selected_material_index_modal,
-        _material_instances_filtered_names,
-        24,
-    )[1]
-
-    if imgui.button("Add Material"):
-        game_obj.add_material(_material_instances_filtered[_selected_material_index_modal])
-    if imgui.button("Remove Material"):
-        game_obj.remove_material(material=_material_instances_filtered[_selected_material_index_modal])
+    _, material_filter = imgui.input_text("##Filter Materials", material_filter, 24)
+    filtered = materialcatalog.search(material_filter)
+
+    # Only the visible rows get submitted, the catalog may hold tens of thousands of materials
+    if imgui.begin_list_box("##Materials", (500, 24 * imgui.get_text_line_height_with_spacing())):
+        clipper = imgui.ListClipper()
+        clipper.begin(len(filtered))
+        while clipper.step():
+            for catalog_index in filtered[clipper.display_start : clipper.display_end]:
+                if imgui.selectable(
+                    f"{materialcatalog.get_name(catalog_index)}##{catalog_index}",
+                    catalog_index == _selected_material_index_modal,
+                )[0]:
+                    _selected_material_index_modal = catalog_index
+        clipper.end()
+        imgui.end_list_box()
+
+    if imgui.button("Add Material") and _selected_material_index_modal != -1:
+        game_obj.add_material(materialcatalog.get_material(_selected_material_index_modal))
+        sobj.mark_dirty()
+    if imgui.button("Remove Material") and _selected_material_index_modal != -1:
+        game_obj.remove_material(material=materialcatalog.get_material(_selected_material_index_modal))
+        sobj.mark_dirty()
     if imgui.button("Close"):
         SHOW_MATERIAL_MODAL = False
-        _material_instances.clear()
-        _material_instances_filtered.clear()
-        _material_instances_filtered_names.clear()
         material_filter = ""
         _selected_material_index_modal = -1
         imgui.close_current_popup()
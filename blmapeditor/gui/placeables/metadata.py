@@ -32,19 +32,21 @@ def _draw_metadata() -> None:
     imgui.text("Tags:")
     for i, tag in enumerate(game_obj.tags):
         if imgui.button(f"x##{i}"):
-            game_obj.tags.remove(tag)
+            game_obj.remove_tag(tag)
         imgui.same_line()
         imgui.bullet_text(tag)
 
     if imgui.button("Add##Tag"):
         val_stripped: str = TAG_BUFFER.strip()
-        if val_stripped and val_stripped not in game_obj.tags:
-            game_obj.tags.append(val_stripped)
+        if val_stripped:
+            game_obj.add_tag(val_stripped)
         TAG_BUFFER = ""
     imgui.same_line()
     _, TAG_BUFFER = imgui.input_text("##NewTag", TAG_BUFFER, 32)
     if imgui.is_item_hovered():
-        imgui.set_tooltip("Tags are used for filtering objects in map loader. Separate tags with a newline.")
+        imgui.set_tooltip(
+            'Tags are used for filtering objects in the object lists and when loading a map, e.g. "cover and not red".',
+        )
 
     imgui.spacing()
 
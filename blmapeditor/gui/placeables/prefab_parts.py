@@ -19,6 +19,18 @@ def draw() -> None:
 def _draw_children() -> None:
     game_obj: Prefab = cast(Prefab, sobj.SELECTED_OBJECT)
     imgui.begin_child("Prefab Parts", size=(0, 0), child_flags=imgui.ChildFlags_.borders.value)
+    depths: list[int] = []  # parents always come before their parts, so their depth is known already
     for part in game_obj.component_data:
-        imgui.bullet_text(f"{part.data.name} ({part.data.rename})")
+        depth = depths[part.parent] + 1 if part.parent >= 0 else 0
+        depths.append(depth)
+        if depth:
+            imgui.indent(depth * imgui.get_style().indent_spacing)
+        if part.b_group:
+            imgui.text(f"{part.name} (Prefab)")
+        elif part.data is None:
+            imgui.text_disabled(f"{part.name} (missing)")
+        else:
+            imgui.bullet_text(f"{part.data.name} ({part.data.rename})")
+        if depth:
+            imgui.unindent(depth * imgui.get_style().indent_spacing)
     imgui.end_child()
@@ -21,28 +21,34 @@ def draw() -> None:
 def _draw_transform() -> None:
     assert sobj.SELECTED_OBJECT is not None
     game_obj: placeables.AbstractPlaceable = sobj.SELECTED_OBJECT
+    snapshot = sobj.get_snapshot()
+    assert snapshot is not None
 
     imgui.text("Location (X, Y, Z)")
-    changed, new_val = imgui.drag_float3("##Location", game_obj.get_location(), max(1, settings.editor_grid_size))
+    changed, new_val = imgui.drag_float3("##Location", snapshot.location, max(1, settings.editor_grid_size))
     if changed:
         game_obj.set_location(new_val)
+        sobj.mark_dirty()
         pc = get_pc()
         look_at(pc, new_val)
 
     imgui.spacing()
 
     imgui.text("Scale")
-    changed, new_val = imgui.drag_float("##Scale", game_obj.get_scale(), 0.01)
+    changed, new_val = imgui.drag_float("##Scale", snapshot.scale, 0.01)
     if changed:
         game_obj.set_scale(new_val)
+        sobj.mark_dirty()
     imgui.text("Scale3D")
-    changed, new_val = imgui.drag_float3("##Scale3D", game_obj.get_scale3d(), 0.01)
+    changed, new_val = imgui.drag_float3("##Scale3D", snapshot.scale3d, 0.01)
     if changed:
         game_obj.set_scale3d(new_val)
+        sobj.mark_dirty()
 
     imgui.spacing()
 
     imgui.text("Rotation (Pitch, Yaw, Roll)")
-    changed, new_val = imgui.drag_int3("##Rotation (Pitch, Yaw, Roll)", game_obj.get_rotation(), 128)
+    changed, new_val = imgui.drag_int3("##Rotation (Pitch, Yaw, Roll)", snapshot.rotation, 128)
     if changed:
         game_obj.set_rotation(new_val)
+        sobj.mark_dirty()
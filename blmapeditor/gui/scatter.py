@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from imgui_bundle import imgui
+
+from .. import scatter, settings
+from .. import selectedobject as sobj
+
+
+def callback_scatter(x: list[scatter.Placement]) -> None:
+    return print(f"Missing Callback: SCATTER({len(x)})")
+
+
+def callback_remove_last_scatter() -> None:
+    return print("Missing Callback: REMOVE_LAST_SCATTER()")
+
+
+_PATTERNS: list[str] = ["Linear", "Grid", "Radial", "Random (Poisson Disk)"]
+_pattern_index: int = 0
+
+_count: int = 5
+_linear_step: list[float] = [200.0, 0.0, 0.0]
+_grid_size: list[int] = [3, 3]
+_grid_spacing: list[float] = [200.0, 200.0]
+_radius: float = 500.0
+_b_face_center: bool = True
+_min_distance: float = 150.0
+_b_random_yaw: bool = True
+_seed: int = 0
+
+
+def draw_scatter_window() -> None:
+    """Draw the Scatter window, places multiple copies of the selected object in a pattern."""
+    if not settings.show_scatter_window.value:
+        return
+    _, settings.show_scatter_window.value = imgui.begin("Scatter", p_open=True)
+    if sobj.SELECTED_OBJECT is None:
+        imgui.text_wrapped("Select an object to place copies of it.")
+    else:
+        _draw_pattern_settings()
+        imgui.spacing()
+        if imgui.button("Place Copies"):
+            callback_scatter(_generate_placements())
+        if imgui.is_item_hovered():
+            imgui.set_tooltip("Place the copies relative to the selected object, the pattern turns with its yaw.")
+    imgui.same_line()
+    if imgui.button("Remove Last Scatter"):
+        callback_remove_last_scatter()
+    imgui.end()
+
+
+def _draw_pattern_settings() -> None:
+    global _pattern_index, _count, _radius, _b_face_center, _min_distance, _b_random_yaw, _seed
+    _, _pattern_index = imgui.combo("Pattern", _pattern_index, _PATTERNS)
+    pattern = _PATTERNS[_pattern_index]
+
+    if pattern != "Grid":
+        _, _count = imgui.slider_int("Copies", _count, 1, 500)
+    if pattern == "Linear":
+        _, _linear_step[:] = imgui.input_float3("Step", _linear_step)
+    elif pattern == "Grid":
+        _, _grid_size[:] = imgui.slider_int2("Rows/Columns", _grid_size, 1, 50)
+        _, _grid_spacing[:] = imgui.input_float2("Spacing", _grid_spacing)
+    elif pattern == "Radial":
+        _, _radius = imgui.slider_float("Radius", _radius, 0, 5000)
+        _, _b_face_center = imgui.checkbox("Face Center", _b_face_center)
+    else:
+        _, _radius = imgui.slider_float("Radius", _radius, 0, 10000)
+        # ctrl+click input ignores the bounds without always_clamp, poisson_disk needs a distance above 0
+        _, _min_distance = imgui.slider_float(
+            "Min Distance",
+            _min_distance,
+            1,
+            2000,
+            flags=imgui.SliderFlags_.always_clamp,
+        )
+        _, _b_random_yaw = imgui.checkbox("Random Yaw", _b_random_yaw)
+        _, _seed = imgui.input_int("Seed", _seed)
+
+
+def _generate_placements() -> list[scatter.Placement]:
+    pattern = _PATTERNS[_pattern_index]
+    if pattern == "Linear":
+        return scatter.linear(_count, (_linear_step[0], _linear_step[1], _linear_step[2]))
+    if pattern == "Grid":
+        return scatter.grid(_grid_size[0], _grid_size[1], (_grid_spacing[0], _grid_spacing[1]))
+    if pattern == "Radial":
+        return scatter.radial(_count, _radius, _b_face_center)
+    return scatter.poisson_disk(_count, _radius, _min_distance, _b_random_yaw, _seed)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import itertools
+
+from unrealsdk import unreal
+
+from . import pathnames
+
+# Handles are stamped with the generation they were created or last checked in. Every invalidation starts a new
+# generation, so a handle only has to look at the level of its object if something got invalidated since.
+_STALE: int = -1
+_counter: itertools.count[int] = itertools.count(1)
+_generation: int = 0  # the current generation
+_invalidated_all: int = 0  # generation of the last travel, objects of every level are gone since
+_invalidated: dict[str, int] = {}  # lowercase level package -> generation it got streamed out in
+
+
+class Handle:
+    """
+    Weak reference to an in-game object, e.g. the component a Placeable edits.
+    Unlike a plain reference it never hands out an object that got garbage collected, or that belongs to a level which
+    got streamed out or travelled away from, even if the engine did not free it yet.
+    """
+
+    __slots__ = ("_generation", "_pointer")
+
+    def __init__(self, uobject: unreal.UObject | None = None) -> None:
+        self._pointer: unreal.WeakPointer | None = None if uobject is None else unreal.WeakPointer(uobject)
+        self._generation: int = _generation
+
+    def _forget(self) -> None:
+        self._pointer = None
+        self._generation = _STALE
+
+    def _revalidate(self) -> unreal.UObject | None:
+        if self._pointer is None or self._generation < _invalidated_all:
+            return None
+        uobject = self._pointer()
+        if uobject is None:
+            return None
+        level = pathnames.path_name(uobject).split(".", 1)[0].lower()
+        if _invalidated.get(level, 0) > self._generation:
+            return None
+        self._generation = _generation
+        return uobject
+
+    def get(self) -> unreal.UObject | None:
+        """Get the object, None if this handle is empty or its object is gone."""
+        if self._pointer is None:
+            return None
+        uobject = self._pointer() if self._generation == _generation else self._revalidate()
+        if uobject is None:
+            self._forget()
+        return uobject
+
+    def is_stale(self) -> bool:
+        """If this handle held an object that is gone by now."""
+        if self._pointer is None:
+            return self._generation == _STALE
+        return self.get() is None
+
+
+def _next_generation() -> int:
+    global _generation  # noqa: PLW0603
+    _generation = next(_counter)
+    return _generation
+
+
+def invalidate_level(level_name: str) -> None:
+    """Mark every object of a sub-level as gone, e.g. because it is about to be streamed out."""
+    _invalidated[level_name] = _next_generation()
+
+
+def invalidate_all() -> None:
+    """Mark every object of every level as gone, called on every Map Load start."""
+    global _invalidated_all  # noqa: PLW0603
+    _invalidated_all = _next_generation()
+    _invalidated.clear()
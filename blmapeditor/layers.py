@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import pathlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Collection
+
+    from . import tagquery
+    from .placeablehelpers import PlaceableHelper
+    from .placeables import AbstractPlaceable
+
+    # The instances of every helper, before a map got loaded
+    Snapshot = dict[PlaceableHelper, set[AbstractPlaceable]]
+
+
+@dataclass()
+class Layer:
+    """The objects a single map file, or the objects of a tag group of it, placed and edited."""
+
+    name: str
+    path: str
+    tag_expression: tagquery.Expression | None
+    created: dict[PlaceableHelper, list[AbstractPlaceable]] = field(default_factory=dict)
+    edited: dict[PlaceableHelper, list[AbstractPlaceable]] = field(default_factory=dict)  # originals of the level
+    # sub-level -> lowercase path names of the edited originals that left with it, claimed again on stream in
+    streamed_out: dict[str, set[str]] = field(default_factory=dict)
+    b_loaded: bool = True
+
+    def count(self) -> int:
+        return sum(map(len, self.created.values())) + sum(map(len, self.edited.values()))
+
+
+loaded: dict[str, Layer] = {}  # in load order, unloaded layers are kept so they can be loaded again
+
+
+def get_layer_name(path: str, tag_expression: tagquery.Expression | None) -> str:
+    name = pathlib.Path(path).stem
+    return f"{name} [{tag_expression}]" if tag_expression is not None else name
+
+
+def take_snapshot(helpers: list[PlaceableHelper]) -> Snapshot:
+    """Remember which objects exist before a map gets loaded."""
+    return {helper: set(helper.objects_by_filter[helper.instances_filter]) for helper in helpers}
+
+
+def get_edited_paths(level: dict) -> set[str]:
+    """The lowercase path names of every object the Edit entries of a level apply to."""
+    return {path.lower() for entries in level.get("Edit", {}).values() for path in entries}
+
+
+def add_layer(
+    path: str,
+    tag_expression: tagquery.Expression | None,
+    snapshot: Snapshot,
+    edited_paths: Collection[str],
+) -> Layer:
+    """
+    Create the layer of a map that was loaded since the snapshot was taken, replaces a layer of the same name.
+
+    :param path:
+    :param tag_expression: The expression the map was filtered by.
+    :param snapshot: As taken right before the map got loaded.
+    :param edited_paths: The lowercase path names of the objects the map edited, see get_edited_paths.
+    :return:
+    """
+    layer = Layer(get_layer_name(path, tag_expression), path, tag_expression)
+    extend_layer(layer, snapshot, edited_paths)
+    loaded.pop(layer.name, None)
+    loaded[layer.name] = layer
+    return layer
+
+
+def extend_layer(layer: Layer, snapshot: Snapshot, edited_paths: Collection[str]) -> None:
+    """
+    Add the objects that got placed since the snapshot was taken to a layer, e.g. on sub-level stream in.
+    Edited objects are attributed by the entries the layer applied, an object edited by several layers belongs to all.
+    """
+    for helper, instances_before in snapshot.items():
+        # Parts of a prefab are destroyed together with their prefab instance
+        created = [
+            x
+            for x in helper.objects_by_filter[helper.instances_filter]
+            if x not in instances_before and x.prefab_owner is None
+        ]
+        if created:
+            layer.created.setdefault(helper, []).extend(created)
+        edited_filter = helper.objects_by_filter.get("Edited")
+        if edited_filter is None or not edited_paths:
+            continue
+        known = set(layer.edited.get(helper, ()))
+        edited = [
+            x
+            for x in edited_filter
+            if not x.b_dynamically_created and x not in known and x.get_path_name().lower() in edited_paths
+        ]
+        if edited:
+            layer.edited.setdefault(helper, []).extend(edited)
+
+
+def forget_objects(removed: Collection[AbstractPlaceable], level_name: str | None = None) -> None:
+    """
+    Remove objects from every layer.
+
+    :param removed:
+    :param level_name: The sub-level the objects got streamed out with, the layers remember which originals they
+        edited so they can claim them again once the sub-level streams back in.
+    :return:
+    """
+    for layer in loaded.values():
+        if level_name is not None:
+            paths = {x.get_path_name().lower() for objects in layer.edited.values() for x in objects if x in removed}
+            if paths:
+                layer.streamed_out.setdefault(level_name, set()).update(paths)
+        for by_helper in (layer.created, layer.edited):
+            for helper, objects in by_helper.items():
+                by_helper[helper] = [x for x in objects if x not in removed]
+
+
+def unload(layer: Layer) -> None:
+    """
+    Destroy every object the layer placed and restore the originals it edited, in one pass per helper.
+    Originals another loaded layer edited as well keep their values, they are restored once their last layer unloads.
+    """
+    for helper, created in layer.created.items():
+        helper.remove_copies(created)
+    still_edited = {
+        x
+        for other in loaded.values()
+        if other is not layer and other.b_loaded
+        for objects in other.edited.values()
+        for x in objects
+    }
+    for helper, edited in layer.edited.items():
+        helper.restore_defaults([x for x in edited if x not in still_edited])
+    layer.created.clear()
+    layer.edited.clear()
+    layer.streamed_out.clear()
+    layer.b_loaded = False
+
+
+def clear() -> None:
+    """Forget all layers, called on every Map Load start."""
+    loaded.clear()
@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from . import archive, compact, dependencies, diff, formats, lazy, migrations, schema
+
+__all__: list[str] = ["archive", "compact", "dependencies", "diff", "formats", "lazy", "migrations", "schema"]
@@ -0,0 +1,158 @@
+"""
+Inspect and maintain map files without starting the game.
+Run from the blmapeditor directory, e.g. `python -m mapfile stats Maps/parkour.json`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+
+from . import dependencies, diff, formats, lazy, migrations, schema
+from .compact import CompactStats, compact_level
+
+
+def _validate(args: argparse.Namespace) -> int:
+    error_count = 0
+    for key, value in formats.iter_items(args.path):
+        for error in schema.validate_item(key, value):
+            print(error)
+            error_count += 1
+    print(f"{args.path}: {error_count} problems found" if error_count else f"{args.path}: valid")
+    return 1 if error_count else 0
+
+
+def _compact(args: argparse.Namespace) -> int:
+    stats = CompactStats()
+
+    def compacted() -> Iterator[formats.Item]:
+        for key, value in formats.iter_items(args.path):
+            yield key, compact_level(value, stats) if diff.is_level(value) else value
+
+    formats.write_items(args.output or args.path, compacted())
+    print(stats)
+    return 0
+
+
+def _convert(args: argparse.Namespace) -> int:
+    formats.write_items(args.output, formats.iter_items(args.path))
+    return 0
+
+
+def _stats(args: argparse.Namespace) -> int:
+    for key, value in formats.iter_items(args.path):
+        if not diff.is_level(value):
+            print(f"{key}: {len(value)} entries" if isinstance(value, dict) else f"{key}: {value}")
+            continue
+        print(f"{key}:")
+        for section in diff.SECTIONS:
+            for uclass, entries in value.get(section, {}).items():
+                print(f"  {section:<8} {uclass:<30} {len(entries):>8}")
+    return 0
+
+
+def _migrate(args: argparse.Namespace) -> int:
+    map_data = formats.read_map(args.path)
+    version = migrations.get_version(map_data)
+    formats.write_map(args.output or args.path, migrations.migrate(map_data))
+    print(f"Migrated from version {version} to {migrations.CURRENT_VERSION}")
+    return 0
+
+
+def _diff(args: argparse.Namespace) -> int:
+    # both maps are compared in the current version, so only real changes end up in the patch
+    old = migrations.migrate(formats.read_map(args.old))
+    patch = diff.diff_maps(old, migrations.migrate(formats.read_map(args.new)))
+    with open(args.output, "w") as fp:
+        json.dump(patch, fp, default=lazy.json_default)
+    print(f"{diff.count_changes(patch)} changed objects")
+    return 0
+
+
+def _apply(args: argparse.Namespace) -> int:
+    with open(args.patch) as fp:
+        patch = json.load(fp)
+    map_data = diff.apply_patch(migrations.migrate(formats.read_map(args.path)), patch)
+    if dependencies.MANIFEST_KEY in map_data:  # the patch may place objects of other packages
+        map_data[dependencies.MANIFEST_KEY] = dependencies.build_manifest(map_data)
+    formats.write_map(args.output or args.path, map_data)
+    return 0
+
+
+def _measure(args: argparse.Namespace) -> int:
+    map_data = formats.read_map(args.path)
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in formats.FORMATS:
+            path = pathlib.Path(directory) / f"map{suffix}"
+            formats.write_map(path, map_data)
+            start = time.perf_counter()
+            loaded = formats.read_map(path)
+            read_time = time.perf_counter() - start
+            json.dumps(loaded, default=lazy.json_default)  # decodes every lazily decoded attribute
+            decode_time = time.perf_counter() - start
+            del loaded  # archives stay memory-mapped while their levels are referenced
+            print(
+                f"{suffix:<8} {path.stat().st_size:>12} bytes"
+                f"  read {read_time * 1000:>8.1f} ms  fully decoded {decode_time * 1000:>8.1f} ms",
+            )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="mapfile", description=__doc__)
+    commands = parser.add_subparsers(required=True)
+
+    command = commands.add_parser("validate", help="Check a map file against the format the editor saves.")
+    command.add_argument("path")
+    command.set_defaults(func=_validate)
+
+    command = commands.add_parser("compact", help="Remove default values, no-op edits and duplicates.")
+    command.add_argument("path")
+    command.add_argument("-o", "--output", help="Defaults to overwriting the map file.")
+    command.set_defaults(func=_compact)
+
+    command = commands.add_parser("convert", help=f"Convert between {', '.join(formats.FORMATS)} map files.")
+    command.add_argument("path")
+    command.add_argument("output")
+    command.set_defaults(func=_convert)
+
+    command = commands.add_parser("stats", help="Count the entries of every level.")
+    command.add_argument("path")
+    command.set_defaults(func=_stats)
+
+    command = commands.add_parser("migrate", help="Bring a map file up to the current version.")
+    command.add_argument("path")
+    command.add_argument("-o", "--output", help="Defaults to overwriting the map file.")
+    command.set_defaults(func=_migrate)
+
+    command = commands.add_parser("diff", help="Save the changes between two map files as a patch.")
+    command.add_argument("old")
+    command.add_argument("new")
+    command.add_argument("-o", "--output", required=True)
+    command.set_defaults(func=_diff)
+
+    command = commands.add_parser("apply", help="Apply a patch to a map file.")
+    command.add_argument("path")
+    command.add_argument("patch")
+    command.add_argument("-o", "--output", help="Defaults to overwriting the map file.")
+    command.set_defaults(func=_apply)
+
+    command = commands.add_parser("measure", help="Compare the size and read time of the map in every format.")
+    command.add_argument("path")
+    command.set_defaults(func=_measure)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
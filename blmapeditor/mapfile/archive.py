@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import collections
+import json
+import mmap
+import pathlib
+import re
+import struct
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from .diff import is_level
+from .lazy import json_default, pack_level, unpack_level
+
+# The layout of a .blmap archive:
+# A fixed size header of magic, index offset and index length, followed by one region per top-level entry of the map.
+# The JSON index {key: [kind, start, length, capacity]} comes last, kind is "level" for levels packed by pack_level
+# and "value" for plain JSON, e.g. "LoadedObjects". Regions may be larger than their content so they can grow in place.
+# Compressed archives deflate every region with the kind suffix ":zlib", using a shared string table of the path names
+# repeated most across the map as preset dictionary. The table is stored as region of kind "strings" under the key "".
+MAGIC: bytes = b"BLMAPIDX"
+_HEADER: struct.Struct = struct.Struct("<8sQQ")
+_GROWTH: int = 4  # moved regions get a quarter of their size as extra capacity
+_COMPRESSED: str = ":zlib"
+_TABLE_KEY: str = ""
+_TABLE_SIZE: int = 32 * 1024  # zlib only uses the last 32 KiB of a preset dictionary
+_STRING: re.Pattern[bytes] = re.compile(rb'"([^"\\]{12,})"')
+
+Item = tuple[str, Any]
+
+
+def _encode(value: Any) -> tuple[str, bytes]:
+    if is_level(value):
+        return "level", pack_level(value)
+    return "value", json.dumps(value, default=json_default).encode()
+
+
+def _compress(kind: str, payload: bytes, table: bytes | None) -> tuple[str, bytes]:
+    if table is None:
+        return kind, payload
+    compressor = zlib.compressobj(zlib.Z_BEST_COMPRESSION, zdict=table)
+    return kind + _COMPRESSED, compressor.compress(payload) + compressor.flush()
+
+
+def _decode(buffer: bytes | mmap.mmap, kind: str, start: int, length: int, table: bytes) -> Any:
+    if kind.endswith(_COMPRESSED):
+        buffer = zlib.decompressobj(zdict=table).decompress(buffer[start : start + length])
+        kind, start, length = kind.removesuffix(_COMPRESSED), 0, len(buffer)
+    if kind == "level":
+        return unpack_level(buffer, start, start + length)
+    return json.loads(buffer[start : start + length])
+
+
+def build_string_table(payloads: Iterable[bytes]) -> bytes:
+    """
+    Collect the strings repeated most across the encoded entries of a map, mostly UE path names, as preset dictionary
+    for zlib. Every compressed region can refer to them, even if it only contains a single occurrence.
+
+    :param payloads:
+    :return: The most valuable strings come last, zlib reaches those with the shortest distances.
+    """
+    counts = collections.Counter(string for payload in payloads for string in _STRING.findall(payload))
+    table: list[bytes] = []
+    size = 0
+    for string, count in sorted(counts.items(), key=lambda x: x[1] * len(x[0]), reverse=True):
+        if count < 2 or size + len(string) > _TABLE_SIZE:
+            continue
+        table.append(string)
+        size += len(string)
+    return b"".join(reversed(table))
+
+
+def _unpack_header(path: pathlib.Path, header: bytes) -> tuple[int, int]:
+    if len(header) < _HEADER.size:
+        raise ValueError(f"'{path}' is no map archive")
+    magic, index_offset, index_length = _HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError(f"'{path}' is no map archive")
+    return index_offset, index_length
+
+
+def _open(path: pathlib.Path) -> tuple[mmap.mmap, dict[str, list], bytes]:
+    """
+    Memory-map the archive and read its index and string table. The map is closed once nothing references it anymore,
+    levels of uncompressed archives keep referencing it until all their attributes are decoded.
+    """
+    with path.open("rb") as fp:
+        if fp.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{path}' is no map archive")
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    index_offset, index_length = _unpack_header(path, buffer[: _HEADER.size])
+    index = json.loads(buffer[index_offset : index_offset + index_length])
+    _, start, length, _ = index.pop(_TABLE_KEY, ("strings", 0, 0, 0))
+    return buffer, index, buffer[start : start + length]
+
+
+def is_archive(path: str | pathlib.Path) -> bool:
+    with pathlib.Path(path).open("rb") as fp:
+        return fp.read(len(MAGIC)) == MAGIC
+
+
+def iter_items(path: pathlib.Path) -> Iterator[Item]:
+    buffer, index, table = _open(path)
+    for key, (kind, start, length, _) in index.items():
+        yield key, _decode(buffer, kind, start, length, table)
+
+
+def read_items(path: pathlib.Path, keys: Iterable[str]) -> dict[str, Any]:
+    """
+    Read only the given top-level entries, e.g. the current level. No other region of the archive gets touched.
+    The regions are copied out of the map, so the returned levels do not keep the archive mapped and it can be updated
+    while they are in use. Windows refuses to truncate a file that is still mapped.
+
+    :param path:
+    :param keys: Keys the archive does not contain are skipped.
+    :return:
+    """
+    buffer, index, table = _open(path)
+    items: dict[str, Any] = {}
+    for key in keys:
+        if key not in index:
+            continue
+        kind, start, length = index[key][:3]
+        items[key] = _decode(buffer[start : start + length], kind, 0, length, table)
+    return items
+
+
+def _write(path: pathlib.Path, encoded: Iterable[tuple[str, str, bytes]], table: bytes | None) -> None:
+    index: dict[str, list] = {}
+    with path.open("wb") as fp:
+        fp.write(_HEADER.pack(MAGIC, 0, 0))
+        position = _HEADER.size
+        if table is not None:
+            fp.write(table)
+            index[_TABLE_KEY] = ["strings", position, len(table), len(table)]
+            position += len(table)
+        for key, raw_kind, raw_payload in encoded:
+            kind, payload = _compress(raw_kind, raw_payload, table)
+            fp.write(payload)
+            index[key] = [kind, position, len(payload), len(payload)]
+            position += len(payload)
+        encoded_index = json.dumps(index).encode()
+        fp.write(encoded_index)
+        fp.seek(0)
+        fp.write(_HEADER.pack(MAGIC, position, len(encoded_index)))
+
+
+def write_items(path: pathlib.Path, items: Iterable[Item]) -> None:
+    """Write a new archive, regions are written one at a time."""
+    _write(path, ((key, *_encode(value)) for key, value in items), None)
+
+
+def write_compressed_items(path: pathlib.Path, items: Iterable[Item]) -> None:
+    """Write a new compressed archive, all entries are encoded up front to build the string table."""
+    encoded = [(key, *_encode(value)) for key, value in items]
+    _write(path, encoded, build_string_table(payload for _, _, payload in encoded))
+
+
+def update_items(path: pathlib.Path, items: dict[str, Any]) -> None:
+    """
+    Replace or add top-level entries of an existing archive, e.g. the level that just got saved.
+    Entries are rewritten in place if they still fit into their region, else they are appended. The space of moved
+    regions stays unused until the archive gets written anew, e.g. by the compact command.
+    Compressed archives stay compressed, new entries reuse their string table.
+
+    :param path:
+    :param items:
+    :return:
+    """
+    with path.open("r+b") as fp:
+        index_offset, index_length = _unpack_header(path, fp.read(_HEADER.size))
+        fp.seek(index_offset)
+        index: dict[str, list] = json.loads(fp.read(index_length))
+        file_end = fp.seek(0, 2)
+        table = None
+        if _TABLE_KEY in index:
+            fp.seek(index[_TABLE_KEY][1])
+            table = fp.read(index[_TABLE_KEY][2])
+        # moved regions are appended after the old index, so it stays valid until the header points to the new one
+        end = index_offset + index_length
+        for key, value in items.items():
+            kind, payload = _compress(*_encode(value), table)
+            entry = index.get(key)
+            if entry is not None and len(payload) <= entry[3]:
+                start, capacity = entry[1], entry[3]
+            else:
+                start, capacity = end, len(payload) + len(payload) // _GROWTH
+                end += capacity
+            fp.seek(start)
+            fp.write(payload)
+            index[key] = [kind, start, len(payload), capacity]
+        if end == index_offset + index_length:  # nothing moved, the new index replaces the old one
+            end = index_offset
+        encoded_index = json.dumps(index).encode()
+        fp.seek(end)
+        fp.write(encoded_index)
+        if end + len(encoded_index) < file_end:  # only a shorter index leaves stale bytes behind
+            fp.truncate()
+        fp.seek(0)
+        fp.write(_HEADER.pack(MAGIC, end, len(encoded_index)))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .diff import fingerprint
+from .schema import ATTRIBUTE_DEFAULTS
+
+
+@dataclass()
+class CompactStats:
+    """What compacting removed, summed over every compacted level."""
+
+    attributes: int = 0  # attribute values equal to the load_map fallback
+    edits: int = 0  # edits of objects that get destroyed anyway
+    creates: int = 0  # created objects that exactly duplicate another one
+    destroys: int = 0  # repeated destroys of the same object
+
+    def __str__(self) -> str:
+        return (
+            f"Removed {self.attributes} default attribute values, {self.edits} no-op edits, "
+            f"{self.creates} duplicated creates and {self.destroys} duplicated destroys"
+        )
+
+
+def _strip_defaults(attrs: dict[str, Any], stats: CompactStats) -> dict[str, Any]:
+    ret = {
+        name: value
+        for name, value in attrs.items()
+        if name not in ATTRIBUTE_DEFAULTS or value != ATTRIBUTE_DEFAULTS[name]
+    }
+    stats.attributes += len(attrs) - len(ret)
+    return ret
+
+
+def compact_level(level: dict[str, dict], stats: CompactStats) -> dict[str, dict]:
+    """
+    Get a copy of the level without anything that does not change how it loads.
+    The original values of edited objects are only known in-game, so an edit is a no-op only if its object gets
+    destroyed by the same level.
+
+    :param level:
+    :param stats: Gets increased by what was removed.
+    :return:
+    """
+    ret: dict[str, dict] = {}
+    destroyed: dict[str, list[str]] = {}
+    for uclass, paths in level.get("Destroy", {}).items():
+        destroyed[uclass] = list(dict.fromkeys(paths))
+        stats.destroys += len(paths) - len(destroyed[uclass])
+
+    for uclass, entries in level.get("Create", {}).items():
+        seen: set[str] = set()
+        kept: list[dict] = []
+        for entry in entries:
+            entry = {blueprint: _strip_defaults(attrs, stats) for blueprint, attrs in entry.items()}  # noqa: PLW2901
+            fp = fingerprint(entry)
+            if fp in seen:
+                stats.creates += 1
+                continue
+            seen.add(fp)
+            kept.append(entry)
+        if kept:
+            ret.setdefault("Create", {})[uclass] = kept
+
+    for uclass, entries in level.get("Edit", {}).items():
+        gone = set(destroyed.get(uclass, ()))
+        kept_edits = {path: _strip_defaults(attrs, stats) for path, attrs in entries.items() if path not in gone}
+        stats.edits += len(entries) - len(kept_edits)
+        if kept_edits:
+            ret.setdefault("Edit", {})[uclass] = kept_edits
+
+    destroyed = {uclass: paths for uclass, paths in destroyed.items() if paths}
+    if destroyed:
+        ret["Destroy"] = destroyed
+    return ret
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from .diff import is_level
+
+# Top-level entry caching the packages every level of the map references, {level: [package names]}
+MANIFEST_KEY: str = "Dependencies"
+# Create sections whose blueprints are path names of objects, prefabs are placed by name
+_PATH_BLUEPRINTS: tuple[str, ...] = ("StaticMesh", "InteractiveObjectDefinition", "AIPawnBalanceDefinition")
+
+
+def get_package(path_name: str) -> str:
+    """The outermost package of an object, e.g. GD_Foo of GD_Foo.Group.Object."""
+    return path_name.split(".", 1)[0]
+
+
+def _iter_materials(attrs: Mapping[str, Any]) -> Iterator[str]:
+    yield from attrs.get("Materials", ())
+    for part in attrs.get("Overrides", {}).values():
+        yield from part.get("Materials", ())
+
+
+def scan_level(level: dict[str, Any]) -> list[str]:
+    """
+    Find the packages of every object a level places or assigns as material. Edited and destroyed objects are not
+    included, they belong to the level itself. Decodes the attributes of every entry, which the manifest avoids.
+
+    :param level:
+    :return: The sorted package names.
+    """
+    packages: set[str] = set()
+    for uclass, entries in level.get("Create", {}).items():
+        for entry in entries:
+            for blueprint, attrs in entry.items():
+                if uclass in _PATH_BLUEPRINTS:
+                    packages.add(get_package(blueprint))
+                packages.update(map(get_package, _iter_materials(attrs)))
+    for edited in level.get("Edit", {}).values():
+        for attrs in edited.values():
+            packages.update(map(get_package, _iter_materials(attrs)))
+    return sorted(packages)
+
+
+def get_dependencies(map_data: dict[str, Any], level_name: str) -> list[str] | None:
+    """The cached packages of a level, None if the map has no manifest entry for it yet."""
+    return map_data.get(MANIFEST_KEY, {}).get(level_name)
+
+
+def with_level(manifest: dict[str, list[str]], level_name: str, level: dict[str, Any]) -> dict[str, list[str]]:
+    """Get a copy of the manifest with the entry of the given level scanned anew."""
+    return {**manifest, level_name: scan_level(level)}
+
+
+def build_manifest(map_data: dict[str, Any]) -> dict[str, list[str]]:
+    """Scan every level of a map."""
+    return {key: scan_level(value) for key, value in map_data.items() if key != MANIFEST_KEY and is_level(value)}
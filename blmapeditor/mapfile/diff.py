@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import deque
+from typing import Any
+
+from .lazy import json_default
+
+# A map file is {level name: {section: {uclass: entries}}, "LoadedObjects": {package: [objects]}}
+# "Edit" entries are keyed by the path name of the edited object, "Destroy" entries are path names.
+# "Create" entries are {blueprint: attrs} without any identity, the same blueprint may be placed any number of times.
+SECTIONS: tuple[str, ...] = ("Create", "Edit", "Destroy")
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=json_default)
+
+
+def fingerprint(entry: Any) -> str:
+    """Identify a "Create" entry by its content, equal entries share a fingerprint."""
+    return hashlib.blake2b(_canonical(entry).encode(), digest_size=8).hexdigest()
+
+
+def is_level(value: Any) -> bool:
+    return isinstance(value, dict) and all(key in SECTIONS for key in value)
+
+
+def merge_levels(into: dict[str, dict], level: dict[str, dict]) -> None:
+    """Add the entries of a level to another one, Edit entries of the same path name are replaced."""
+    for section, by_uclass in level.items():
+        for uclass, entries in by_uclass.items():
+            existing = into.setdefault(section, {}).setdefault(uclass, {} if section == "Edit" else [])
+            if section == "Edit":
+                existing.update(entries)
+            else:
+                existing.extend(entries)
+
+
+def diff_dicts(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """
+    Get the changes between two attribute dicts.
+
+    :param old:
+    :param new:
+    :return: {"set": {key: new value}, "del": [removed keys]}, empty parts are left out.
+    """
+    delta: dict[str, Any] = {}
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    if changed:
+        delta["set"] = changed
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta["del"] = removed
+    return delta
+
+
+def apply_dict(data: dict[str, Any], delta: dict[str, Any]) -> dict[str, Any]:
+    ret = {**data, **delta.get("set", {})}
+    for key in delta.get("del", ()):
+        ret.pop(key, None)
+    return ret
+
+
+def _blueprint(entry: dict[str, Any]) -> str:
+    return next(iter(entry), "")
+
+
+def _diff_created(old: list[dict], new: list[dict]) -> dict[str, Any]:
+    """
+    Match the "Create" entries of both lists, unchanged entries are matched by content.
+    The remaining entries with the same blueprint are paired in order, e.g. a moved object becomes an attribute change.
+    """
+    unmatched: dict[str, list[dict]] = {}  # fingerprint -> old entries that are not matched yet
+    for entry in old:
+        unmatched.setdefault(fingerprint(entry), []).append(entry)
+    added: list[dict] = []
+    for entry in new:
+        same = unmatched.get(fingerprint(entry))
+        if same:
+            same.pop()
+        else:
+            added.append(entry)
+
+    removed_by_blueprint: dict[str, deque[tuple[str, dict]]] = {}
+    for fp, entries in unmatched.items():
+        for entry in entries:
+            removed_by_blueprint.setdefault(_blueprint(entry), deque()).append((fp, entry))
+
+    patch: dict[str, Any] = {}
+    for entry in added:
+        blueprint = _blueprint(entry)
+        candidates = removed_by_blueprint.get(blueprint)
+        if candidates:
+            fp, old_entry = candidates.popleft()
+            patch.setdefault("change", []).append([fp, diff_dicts(old_entry[blueprint], entry[blueprint])])
+        else:
+            patch.setdefault("add", []).append(entry)
+    removed = [fp for candidates in removed_by_blueprint.values() for fp, _ in candidates]
+    if removed:
+        patch["remove"] = removed
+    return patch
+
+
+def _apply_created(entries: list[dict], patch: dict[str, Any]) -> list[dict]:
+    by_fingerprint: dict[str, list[int]] = {}
+    for i, entry in enumerate(entries):
+        by_fingerprint.setdefault(fingerprint(entry), []).append(i)
+
+    def take(fp: str) -> int:
+        indices = by_fingerprint.get(fp)
+        if not indices:
+            raise ValueError(f"The patch does not fit, no created object with fingerprint {fp}")
+        return indices.pop()
+
+    ret: list[dict | None] = list(entries)
+    for fp, delta in patch.get("change", ()):
+        i = take(fp)
+        blueprint = _blueprint(entries[i])
+        ret[i] = {blueprint: apply_dict(entries[i][blueprint], delta)}
+    for fp in patch.get("remove", ()):
+        ret[take(fp)] = None
+    return [entry for entry in ret if entry is not None] + list(patch.get("add", ()))
+
+
+def _diff_edited(old: dict[str, dict], new: dict[str, dict]) -> dict[str, Any]:
+    patch: dict[str, Any] = {}
+    for path, attrs in new.items():
+        old_attrs = old.get(path)
+        if old_attrs is None:
+            patch.setdefault("add", {})[path] = attrs
+        elif old_attrs != attrs:
+            patch.setdefault("change", {})[path] = diff_dicts(old_attrs, attrs)
+    removed = [path for path in old if path not in new]
+    if removed:
+        patch["remove"] = removed
+    return patch
+
+
+def _apply_edited(entries: dict[str, dict], patch: dict[str, Any]) -> dict[str, dict]:
+    ret = {**entries, **patch.get("add", {})}
+    for path, delta in patch.get("change", {}).items():
+        ret[path] = apply_dict(ret.get(path, {}), delta)
+    for path in patch.get("remove", ()):
+        ret.pop(path, None)
+    return ret
+
+
+def _diff_destroyed(old: list[str], new: list[str]) -> dict[str, Any]:
+    old_set, new_set = set(old), set(new)
+    patch: dict[str, Any] = {}
+    added = [path for path in dict.fromkeys(new) if path not in old_set]
+    if added:
+        patch["add"] = added
+    removed = [path for path in dict.fromkeys(old) if path not in new_set]
+    if removed:
+        patch["remove"] = removed
+    return patch
+
+
+def _apply_destroyed(entries: list[str], patch: dict[str, Any]) -> list[str]:
+    removed = set(patch.get("remove", ()))
+    ret = [path for path in entries if path not in removed]
+    existing = set(ret)
+    return ret + [path for path in patch.get("add", ()) if path not in existing]
+
+
+_DIFF_SECTION = {"Create": _diff_created, "Edit": _diff_edited, "Destroy": _diff_destroyed}
+_APPLY_SECTION = {"Create": _apply_created, "Edit": _apply_edited, "Destroy": _apply_destroyed}
+
+
+def diff_levels(old: dict[str, dict], new: dict[str, dict]) -> dict[str, Any]:
+    """
+    Get the changes between two level sections of a map file, per object and attribute.
+
+    :param old:
+    :param new:
+    :return: {section: {uclass: changes}}, an empty dict if both levels are equal.
+    """
+    patch: dict[str, Any] = {}
+    for section in SECTIONS:
+        old_section, new_section = old.get(section, {}), new.get(section, {})
+        empty = [] if section != "Edit" else {}
+        for uclass in dict.fromkeys([*old_section, *new_section]):
+            changes = _DIFF_SECTION[section](old_section.get(uclass, empty), new_section.get(uclass, empty))
+            if changes:
+                patch.setdefault(section, {})[uclass] = changes
+    return patch
+
+
+def apply_level(level: dict[str, dict], patch: dict[str, Any]) -> dict[str, dict]:
+    """
+    Apply the changes of diff_levels to a level section, the given level is not modified.
+
+    :param level:
+    :param patch:
+    :return: The patched level, uclasses without entries are left out.
+    :raises ValueError: If the patch changes or removes created objects the level does not contain.
+    """
+    ret = {section: dict(entries) for section, entries in level.items()}
+    for section, changes in patch.items():
+        empty = [] if section != "Edit" else {}
+        for uclass, uclass_changes in changes.items():
+            entries = _APPLY_SECTION[section](ret.get(section, {}).get(uclass, empty), uclass_changes)
+            if entries:
+                ret.setdefault(section, {})[uclass] = entries
+            elif section in ret:
+                ret[section].pop(uclass, None)
+    return {section: entries for section, entries in ret.items() if entries}
+
+
+def diff_maps(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """
+    Get the changes between two map files, e.g. to review or merge the edits of someone else.
+    Runs in linear time, "Edit" and "Destroy" entries are compared by path name, "Create" entries by content.
+
+    :param old:
+    :param new:
+    :return: {"levels": {level: diff_levels}, "set": {key: value}, "del": [keys]}, empty parts are left out.
+        Everything that is not a level, e.g. "LoadedObjects", is set as a whole.
+    """
+    patch: dict[str, Any] = {}
+    for key, value in new.items():
+        old_value = old.get(key)
+        if is_level(value) and (old_value is None or is_level(old_value)):
+            changes = diff_levels(old_value or {}, value)
+            if changes or old_value is None:
+                patch.setdefault("levels", {})[key] = changes
+        elif old_value != value:
+            patch.setdefault("set", {})[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        patch["del"] = removed
+    return patch
+
+
+def apply_patch(map_data: dict[str, Any], patch: dict[str, Any]) -> dict[str, Any]:
+    """
+    Apply the changes of diff_maps to a map file, the given map is not modified.
+
+    :param map_data:
+    :param patch:
+    :return:
+    :raises ValueError: If the patch was not made for this map.
+    """
+    ret = apply_dict(map_data, patch)
+    for level, changes in patch.get("levels", {}).items():
+        ret[level] = apply_level(ret.get(level, {}), changes)
+    return ret
+
+
+def count_changes(patch: dict[str, Any]) -> int:
+    """Get the number of added, changed and removed objects of a diff_maps patch."""
+    return sum(
+        len(changes)
+        for level in patch.get("levels", {}).values()
+        for section in level.values()
+        for uclass_changes in section.values()
+        for changes in uclass_changes.values()
+    )
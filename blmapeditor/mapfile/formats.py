@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from . import archive
+from .diff import SECTIONS, is_level
+from .lazy import json_default
+
+# A top-level entry of a map file, a level name and its sections, or e.g. "LoadedObjects" and its packages
+Item = tuple[str, Any]
+
+
+def _read_json(path: pathlib.Path) -> Iterator[Item]:
+    """Plain .json map files, as saved by the editor. They have to be decoded as a whole."""
+    with path.open() as fp:
+        map_data = json.load(fp)
+    if not isinstance(map_data, dict):
+        raise ValueError(f"'{path}' does not contain a map, got {type(map_data).__name__}")
+    yield from map_data.items()
+
+
+def _write_json(path: pathlib.Path, items: Iterable[Item]) -> None:
+    with path.open("w") as fp:
+        fp.write("{")
+        for i, (key, value) in enumerate(items):
+            fp.write(f"{', ' if i else ''}{json.dumps(key)}: {json.dumps(value, default=json_default)}")
+        fp.write("}")
+
+
+def _iter_records(key: str, value: Any) -> Iterator[list]:
+    if not is_level(value):
+        yield [key, value]
+        return
+    yield [key]  # levels without any entry are kept too
+    for section in SECTIONS:
+        for uclass, entries in value.get(section, {}).items():
+            if section == "Create":
+                for entry in entries:
+                    for blueprint, attrs in entry.items():
+                        yield [key, section, uclass, blueprint, attrs]
+            elif section == "Edit":
+                for path, attrs in entries.items():
+                    yield [key, section, uclass, path, attrs]
+            else:
+                for path in entries:
+                    yield [key, section, uclass, path, None]
+
+
+def _add_record(level: dict[str, dict], record: list) -> None:
+    _, section, uclass, name, attrs = record
+    if section == "Create":
+        level.setdefault(section, {}).setdefault(uclass, []).append({name: attrs})
+    elif section == "Edit":
+        level.setdefault(section, {}).setdefault(uclass, {})[name] = attrs
+    elif section == "Destroy":
+        level.setdefault(section, {}).setdefault(uclass, []).append(name)
+    else:
+        raise ValueError(f"Unknown section {section!r}")
+
+
+def _read_jsonl(path: pathlib.Path) -> Iterator[Item]:
+    """
+    JSON Lines map files, one object per line. Read one level at a time, so huge maps never have to fit into memory.
+    All records of a level have to follow each other.
+    """
+    seen: set[str] = set()
+    current: tuple[str, dict] | None = None
+    with path.open() as fp:
+        for line_number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key = record[0]
+            if current is not None and current[0] == key and len(record) == 5:
+                _add_record(current[1], record)
+                continue
+            if current is not None:
+                yield current
+                current = None
+            if key in seen:
+                raise ValueError(f"{path}:{line_number}: the records of {key!r} do not follow each other")
+            seen.add(key)
+            if len(record) == 2:
+                yield record[0], record[1]
+                continue
+            current = (key, {})
+            if len(record) > 1:
+                _add_record(current[1], record)
+    if current is not None:
+        yield current
+
+
+def _write_jsonl(path: pathlib.Path, items: Iterable[Item]) -> None:
+    with path.open("w") as fp:
+        for key, value in items:
+            for record in _iter_records(key, value):
+                fp.write(json.dumps(record, default=json_default))
+                fp.write("\n")
+
+
+FORMATS: dict[str, tuple[Callable[[pathlib.Path], Iterator[Item]], Callable[[pathlib.Path, Iterable[Item]], None]]] = {
+    ".json": (_read_json, _write_json),
+    ".jsonl": (_read_jsonl, _write_jsonl),
+    ".blmap": (archive.iter_items, archive.write_items),
+    ".blmapz": (archive.iter_items, archive.write_compressed_items),
+}
+# Formats that can read and replace single entries without touching the rest of the file
+_ARCHIVES: tuple[str, ...] = (".blmap", ".blmapz")
+
+
+def _get_format(path: str | pathlib.Path) -> tuple[pathlib.Path, str]:
+    path = pathlib.Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unknown map file format {suffix!r}, supported are {', '.join(FORMATS)}")
+    return path, suffix
+
+
+def iter_items(path: str | pathlib.Path) -> Iterator[Item]:
+    """
+    Read a map file one level at a time, the format is picked by the file extension.
+
+    :param path:
+    :return:
+    :raises ValueError: If the format is unknown or the file is no valid map file.
+    """
+    path, suffix = _get_format(path)
+    return FORMATS[suffix][0](path)
+
+
+def write_items(path: str | pathlib.Path, items: Iterable[Item]) -> None:
+    """
+    Write a map file one level at a time, the format is picked by the file extension.
+    The file is only replaced once everything got written, so items may be read from the same file.
+    """
+    path, suffix = _get_format(path)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        FORMATS[suffix][1](temp_path, items)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def read_map(path: str | pathlib.Path) -> dict[str, Any]:
+    return dict(iter_items(path))
+
+
+def write_map(path: str | pathlib.Path, map_data: dict[str, Any]) -> None:
+    write_items(path, map_data.items())
+
+
+def read_items(path: str | pathlib.Path, keys: Iterable[str]) -> dict[str, Any]:
+    """
+    Read only some top-level entries of a map file. Archives only touch the regions of these entries, every other
+    format is still read completely, but only one level at a time is kept.
+
+    :param path:
+    :param keys: Keys the file does not contain are skipped.
+    :return:
+    :raises ValueError: If the format is unknown or the file is no valid map file.
+    """
+    path, suffix = _get_format(path)
+    if suffix in _ARCHIVES:
+        return archive.read_items(path, keys)
+    keys = set(keys)
+    return {key: value for key, value in FORMATS[suffix][0](path) if key in keys}
+
+
+def _replace_items(items: Iterable[Item], replacements: dict[str, Any]) -> Iterator[Item]:
+    remaining = dict(replacements)
+    for key, value in items:
+        yield key, remaining.pop(key, value)
+    yield from remaining.items()
+
+
+def update_items(path: str | pathlib.Path, items: dict[str, Any]) -> None:
+    """
+    Replace or add some top-level entries of a map file, e.g. the level that just got saved.
+    Archives are updated in place, every other format is rewritten one level at a time.
+
+    :param path: Created if it does not exist yet.
+    :param items:
+    :return:
+    :raises ValueError: If the format is unknown or the file is no valid map file.
+    """
+    path, suffix = _get_format(path)
+    if not path.exists():
+        write_items(path, items.items())
+    elif suffix in _ARCHIVES:
+        archive.update_items(path, items)
+    else:
+        write_items(path, _replace_items(FORMATS[suffix][0](path), items))
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, overload
+
+if TYPE_CHECKING:
+    import mmap
+
+# The layout of a packed level:
+# One line with the JSON index {"Create"|"Edit": {uclass: [names]}, "Destroy": {uclass: [paths]}, "Ends": [offsets]},
+# followed by the JSON encoded attributes of every Create and then every Edit entry, in index order.
+# "Ends" holds where the attributes of each of these entries end, relative to the end of the index line.
+# Only the index is decoded on load, attributes are decoded when they are accessed the first time.
+
+
+class LazyAttributes(Mapping[str, Any]):
+    """The attributes of a single map entry, decoded from their JSON encoding on first access."""
+
+    __slots__ = ("_attrs", "_buffer", "_end", "_start")
+
+    def __init__(self, buffer: bytes | memoryview, start: int = 0, end: int | None = None) -> None:
+        """
+        :param buffer: Holds the JSON encoding, usually together with the attributes of every other entry of a level.
+        :param start: Where the encoding starts in the buffer.
+        :param end: Where the encoding ends in the buffer, defaults to the end of the buffer.
+        """
+        self._buffer: bytes | memoryview | None = buffer
+        self._start: int = start
+        self._end: int = len(buffer) if end is None else end
+        self._attrs: dict[str, Any] | None = None
+
+    @property
+    def b_decoded(self) -> bool:
+        return self._attrs is not None
+
+    def encode(self) -> bytes:
+        """Get the JSON encoding, without decoding the attributes if they were not accessed yet."""
+        if self._buffer is not None:
+            return bytes(self._buffer[self._start : self._end])
+        return json.dumps(self._attrs).encode()
+
+    def decode(self) -> dict[str, Any]:
+        """Get the decoded attributes, shared by every call, do not modify them."""
+        if self._attrs is None:
+            self._attrs = json.loads(self.encode().decode())
+            self._buffer = None  # do not keep the buffer of the whole level alive
+        return self._attrs
+
+    def __getitem__(self, key: str) -> Any:
+        return self.decode()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.decode())
+
+    def __len__(self) -> int:
+        return len(self.decode())
+
+    def __repr__(self) -> str:
+        return f"LazyAttributes({self._attrs!r})" if self._attrs is not None else "LazyAttributes(<encoded>)"
+
+
+class _PackedEntries:
+    """The names of the entries of one section and uclass, attributes are only looked up by position."""
+
+    __slots__ = ("_blobs", "_ends", "_first", "_names")
+
+    def __init__(self, blobs: memoryview, names: list[str], ends: list[int], first: int) -> None:
+        self._blobs: memoryview = blobs
+        self._names: list[str] = names
+        self._ends: list[int] = ends  # shared by all sections of the level
+        self._first: int = first  # position of our first entry in ends
+
+    def _attributes(self, i: int) -> LazyAttributes:
+        k = self._first + i
+        return LazyAttributes(self._blobs, self._ends[k - 1] if k else 0, self._ends[k])
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class LazyCreated(_PackedEntries, Sequence[dict[str, Any]]):
+    """The "Create" entries of one uclass, every access returns a new {blueprint: LazyAttributes} dict."""
+
+    __slots__ = ()
+
+    @overload
+    def __getitem__(self, i: int) -> dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[dict[str, Any]]: ...
+
+    def __getitem__(self, i: int | slice) -> dict[str, Any] | list[dict[str, Any]]:
+        if isinstance(i, slice):
+            return [self[x] for x in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {self._names[i]: self._attributes(i)}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other, strict=True))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class LazyEdited(_PackedEntries, Mapping[str, Any]):
+    """The "Edit" entries of one uclass, by path name. Every access returns new LazyAttributes."""
+
+    __slots__ = ("_positions",)
+
+    def __init__(self, blobs: memoryview, names: list[str], ends: list[int], first: int) -> None:
+        super().__init__(blobs, names, ends, first)
+        self._positions: dict[str, int] | None = None  # built on the first lookup by path name
+
+    def __getitem__(self, path: str) -> LazyAttributes:
+        if self._positions is None:
+            self._positions = {name: i for i, name in enumerate(self._names)}
+        return self._attributes(self._positions[path])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+
+def json_default(value: Any) -> Any:
+    """For json.dump(s), so maps with lazily decoded entries can be encoded."""
+    if isinstance(value, LazyAttributes):
+        return value.decode()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, LazyCreated):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_attributes(attrs: Mapping[str, Any]) -> bytes:
+    if isinstance(attrs, LazyAttributes):
+        return attrs.encode()
+    return json.dumps(attrs, separators=(",", ":")).encode()
+
+
+def pack_level(level: dict[str, Any]) -> bytes:
+    """Encode a level so that loading it only has to decode the names of its entries."""
+    index: dict[str, Any] = {}
+    blobs: list[bytes] = []
+    ends: list[int] = []
+    offset = 0
+
+    def add(section: str, uclass: str, name: str, attrs: Mapping[str, Any]) -> None:
+        nonlocal offset
+        blob = _encode_attributes(attrs)
+        index.setdefault(section, {}).setdefault(uclass, []).append(name)
+        blobs.append(blob)
+        offset += len(blob)
+        ends.append(offset)
+
+    for uclass, entries in level.get("Create", {}).items():
+        for entry in entries:
+            for blueprint, attrs in entry.items():
+                add("Create", uclass, blueprint, attrs)
+    for uclass, edited in level.get("Edit", {}).items():
+        for path, attrs in edited.items():
+            add("Edit", uclass, path, attrs)
+    if level.get("Destroy"):
+        index["Destroy"] = level["Destroy"]
+    index["Ends"] = ends
+    return b"".join([json.dumps(index).encode(), b"\n", *blobs])
+
+
+def unpack_level(buffer: bytes | mmap.mmap, start: int = 0, end: int | None = None) -> dict[str, Any]:
+    """
+    Decode a level encoded by pack_level. Only the names of its entries get decoded, attributes once they are accessed.
+
+    :param buffer: Is referenced by the level until all its attributes are decoded.
+    :param start: Where the packed level starts in the buffer.
+    :param end: Where the packed level ends in the buffer, defaults to the end of the buffer.
+    :return:
+    :raises ValueError: If the buffer does not contain a packed level.
+    """
+    end = len(buffer) if end is None else end
+    index_end = buffer.find(b"\n", start, end)
+    if index_end == -1:
+        raise ValueError("The packed level has no index")
+    index = json.loads(buffer[start:index_end])
+    blobs = memoryview(buffer)[index_end + 1 : end]
+    ends: list[int] = index.pop("Ends", [])
+
+    level: dict[str, Any] = {}
+    first = 0
+    for section, lazy_type in (("Create", LazyCreated), ("Edit", LazyEdited)):
+        for uclass, names in index.get(section, {}).items():
+            level.setdefault(section, {})[uclass] = lazy_type(blobs, names, ends, first)
+            first += len(names)
+    if "Destroy" in index:
+        level["Destroy"] = index["Destroy"]
+    return level
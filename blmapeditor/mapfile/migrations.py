@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import contextlib
+import pathlib
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+from . import formats
+from .diff import is_level, merge_levels
+
+# Version 1 are all files saved before the "Version" field existed
+CURRENT_VERSION: int = 2
+
+
+def _clean_tags(attrs: Mapping[str, Any]) -> dict[str, Any]:
+    ret = dict(attrs)
+    if "Tags" in ret:
+        ret["Tags"] = [x.strip() for x in ret["Tags"] if x.strip()]
+    return ret
+
+
+def _to_version_2(map_data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Level names are lowercase, the editor only ever looks up the lowercase streaming persistent map name.
+    Tags are stripped and empty tags dropped, as save_to_json does.
+    """
+    ret: dict[str, Any] = {}
+    for key, value in map_data.items():
+        if not is_level(value):
+            ret[key] = value
+            continue
+        created = {
+            uclass: [{blueprint: _clean_tags(attrs) for blueprint, attrs in entry.items()} for entry in entries]
+            for uclass, entries in value.get("Create", {}).items()
+        }
+        edited = {
+            uclass: {path: _clean_tags(attrs) for path, attrs in entries.items()}
+            for uclass, entries in value.get("Edit", {}).items()
+        }
+        merge_levels(ret.setdefault(key.lower(), {}), {**value, "Create": created, "Edit": edited})
+    return ret
+
+
+# version -> the step that migrates a map of this version to the next one, steps may modify the given map
+MIGRATIONS: dict[int, Callable[[dict[str, Any]], dict[str, Any]]] = {
+    1: _to_version_2,
+}
+
+
+def get_version(map_data: dict[str, Any]) -> int:
+    return map_data.get("Version", 1)
+
+
+def migrate(map_data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Bring a map up to the current version by applying every migration step after its version in order.
+
+    :param map_data: May be modified.
+    :return: The migrated map, the given map itself if it already is up-to-date.
+    :raises ValueError: If the map was saved by a newer version of the editor.
+    """
+    version = get_version(map_data)
+    if version > CURRENT_VERSION:
+        raise ValueError(f"The map has version {version}, this editor only knows up to version {CURRENT_VERSION}")
+    while version < CURRENT_VERSION:
+        map_data = MIGRATIONS[version](map_data)
+        version += 1
+        map_data["Version"] = version
+    return map_data
+
+
+def load(path: str | pathlib.Path, keys: Iterable[str] | None = None) -> dict[str, Any]:
+    """
+    Read a map file and migrate it. Outdated files get overwritten with the migrated map, so the migration only has to
+    run once per file.
+
+    :param path:
+    :param keys: Only read these top-level entries and "Version", e.g. the current level. Outdated files are still
+                 read completely, as migrating may change their keys.
+    :return:
+    :raises ValueError: If the file is no valid map file or was saved by a newer version of the editor.
+    """
+    if keys is not None:
+        keys = (*keys, "Version")
+        map_data = formats.read_items(path, keys)
+        if get_version(map_data) == CURRENT_VERSION:
+            return map_data
+    map_data = formats.read_map(path)
+    if get_version(map_data) != CURRENT_VERSION:
+        map_data = migrate(map_data)
+        with contextlib.suppress(OSError):  # the migrated map still loads, it is just migrated again next time
+            formats.write_map(path, map_data)
+    return map_data if keys is None else {key: map_data[key] for key in keys if key in map_data}
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any
+
+from .dependencies import MANIFEST_KEY
+from .diff import SECTIONS, is_level
+
+# The values the helpers fall back to in load_map when an attribute is missing, storing them changes nothing.
+# "Materials" has no fallback, a missing list keeps the current materials while an empty list removes them.
+ATTRIBUTE_DEFAULTS: dict[str, Any] = {
+    "Rename": "",
+    "Tags": [],
+    "Metadata": "",
+    "Location": [0, 0, 0],
+    "Rotation": [0, 0, 0],
+    "Scale": 1,
+    "Scale3D": [1, 1, 1],
+}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _is_vector(value: Any) -> bool:
+    return isinstance(value, list) and len(value) == 3 and all(map(_is_number, value))
+
+
+def _is_string_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(x, str) for x in value)
+
+
+_ATTRIBUTE_CHECKS: dict[str, tuple[Callable[[Any], bool], str]] = {
+    "Rename": (lambda x: isinstance(x, str), "a string"),
+    "Tags": (_is_string_list, "a list of strings"),
+    "Metadata": (lambda x: isinstance(x, str), "a string"),
+    "Location": (_is_vector, "a list of 3 numbers"),
+    "Rotation": (_is_vector, "a list of 3 numbers"),
+    "Scale": (_is_number, "a number"),
+    "Scale3D": (_is_vector, "a list of 3 numbers"),
+    "Materials": (_is_string_list, "a list of path names"),
+    "Overrides": (lambda x: isinstance(x, dict), "a dict of prefab part overrides"),
+}
+
+
+def _validate_attributes(where: str, attrs: Any, errors: list[str]) -> None:
+    if not isinstance(attrs, Mapping):
+        errors.append(f"{where}: attributes must be a dict, got {type(attrs).__name__}")
+        return
+    for name, value in attrs.items():
+        check = _ATTRIBUTE_CHECKS.get(name)
+        if check is None:
+            errors.append(f"{where}: unknown attribute {name!r}")
+        elif not check[0](value):
+            errors.append(f"{where}: {name} must be {check[1]}")
+
+
+def _validate_created(where: str, entries: Any, errors: list[str]) -> None:
+    if not isinstance(entries, Sequence) or isinstance(entries, str):
+        errors.append(f"{where}: must be a list of {{blueprint: attributes}}")
+        return
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, Mapping) or len(entry) != 1:
+            errors.append(f"{where}[{i}]: must be a single {{blueprint: attributes}} pair")
+            continue
+        blueprint, attrs = next(iter(entry.items()))
+        _validate_attributes(f"{where}[{i}] {blueprint}", attrs, errors)
+
+
+def _validate_edited(where: str, entries: Any, errors: list[str]) -> None:
+    if not isinstance(entries, Mapping):
+        errors.append(f"{where}: must be a dict of {{path name: attributes}}")
+        return
+    for path, attrs in entries.items():
+        _validate_attributes(f"{where} {path}", attrs, errors)
+
+
+def _validate_destroyed(where: str, entries: Any, errors: list[str]) -> None:
+    if not _is_string_list(entries):
+        errors.append(f"{where}: must be a list of path names")
+
+
+_SECTION_CHECKS: dict[str, Callable[[str, Any, list[str]], None]] = {
+    "Create": _validate_created,
+    "Edit": _validate_edited,
+    "Destroy": _validate_destroyed,
+}
+
+
+def validate_item(key: str, value: Any) -> list[str]:
+    """
+    Check a single top-level entry of a map file, a level, "LoadedObjects" or the dependency manifest.
+
+    :param key:
+    :param value:
+    :return: A description of every problem, empty if the entry is valid.
+    """
+    errors: list[str] = []
+    if key == "Version":
+        return [] if isinstance(value, int) and not isinstance(value, bool) else ["Version: must be an integer"]
+    if key == MANIFEST_KEY:
+        if not isinstance(value, dict) or not all(map(_is_string_list, value.values())):
+            errors.append(f"{MANIFEST_KEY}: must be a dict of {{level: [package names]}}")
+        return errors
+    if key == "LoadedObjects":
+        if not isinstance(value, dict) or not all(map(_is_string_list, value.values())):
+            errors.append("LoadedObjects: must be a dict of {package: [path names]}")
+        return errors
+    if not isinstance(value, dict):
+        return [f"{key}: a level must be a dict, got {type(value).__name__}"]
+    if not is_level(value):
+        errors.append(f"{key}: unknown sections {[x for x in value if x not in SECTIONS]}")
+    for section, check in _SECTION_CHECKS.items():
+        by_uclass = value.get(section, {})
+        if not isinstance(by_uclass, dict):
+            errors.append(f"{key}/{section}: must be a dict of {{uclass: entries}}")
+            continue
+        for uclass, entries in by_uclass.items():
+            check(f"{key}/{section}/{uclass}", entries, errors)
+    return errors
+
+
+def validate(map_data: Any) -> list[str]:
+    """Check a whole map file against the format the placeables save_to_json produce."""
+    if not isinstance(map_data, dict):
+        return [f"A map file must contain a dict, got {type(map_data).__name__}"]
+    return [error for key, value in map_data.items() for error in validate_item(key, value)]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, cast
+
+from unrealsdk import find_all
+
+from . import pathnames
+
+if TYPE_CHECKING:
+    from common import MaterialInterface
+
+_MAX_CACHED_QUERIES: int = 32
+
+_materials: list[MaterialInterface] = []
+_names: list[str] = []
+_lowered_names: list[str] = []
+_is_built: bool = False
+# lowered query -> indices of all matching materials, used to narrow down the next query
+_query_results: dict[str, list[int]] = {}
+
+
+def build() -> None:
+    """Collect all MaterialInstanceConstants of the current level, only does any work once per level."""
+    global _is_built  # noqa: PLW0603
+    if _is_built:
+        return
+    seen: set[str] = set()
+    for material in cast(list["MaterialInterface"], list(find_all("MaterialInstanceConstant"))[1:]):
+        name = pathnames.path_name(material)
+        if name in seen:
+            continue
+        seen.add(name)
+        _materials.append(material)
+        _names.append(name)
+    order = sorted(range(len(_names)), key=_names.__getitem__)
+    _materials[:] = [_materials[i] for i in order]
+    _names[:] = [_names[i] for i in order]
+    _lowered_names.extend(x.lower() for x in _names)
+    _is_built = True
+
+
+def search(query: str) -> list[int]:
+    """
+    Get the indices of all materials whose path name contains the query, case-insensitive.
+    A query that extends a previous one only searches the results of that previous query.
+
+    :param query:
+    :return: Sorted list of indices into the catalog.
+    """
+    query = query.lower()
+    if query in _query_results:
+        return _query_results[query]
+    if not query:
+        result = list(range(len(_lowered_names)))
+    else:
+        # Every material matching the new query also matched any query that is a substring of it
+        narrowest = min(
+            (r for q, r in _query_results.items() if q in query),
+            key=len,
+            default=range(len(_lowered_names)),
+        )
+        result = [i for i in narrowest if query in _lowered_names[i]]
+    if len(_query_results) >= _MAX_CACHED_QUERIES:
+        del _query_results[next(iter(_query_results))]
+    _query_results[query] = result
+    return result
+
+
+def get_material(index: int) -> MaterialInterface:
+    return _materials[index]
+
+
+def get_name(index: int) -> str:
+    return _names[index]
+
+
+def clear() -> None:
+    """Forget all materials, called on every Map Load start."""
+    global _is_built  # noqa: PLW0603
+    _materials.clear()
+    _names.clear()
+    _lowered_names.clear()
+    _query_results.clear()
+    _is_built = False
@@ -1,22 +1,111 @@
 from __future__ import annotations
 
+import functools
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
 import unrealsdk
+from coroutines import TickCoroutine, start_coroutine_tick
 from unrealsdk import find_object, logging
 
+if TYPE_CHECKING:
+    from unrealsdk import unreal
+
+_KEEP_ALIVE_FLAG: int = 0x4000
+USER_OWNER: str = ""  # owns the objects kept alive by hand in the Packages window
+
 loaded_objects: dict[str, list[str]] = {}  # package name -> list of kept alive objects
+loaded_packages: set[str] = set()  # packages loaded since the last level change
+# package name -> callbacks waiting for it, a package is requested only once no matter how many wait for it
+_requested: dict[str, list[Callable[[bool], None]]] = {}
+_b_loading: bool = False  # if the coroutine working through the requests is running
 
 
-def _keep_alive(path_name: str, undo: bool = False) -> bool:
-    try:
-        obj = find_object("Object", path_name)
-    except ValueError as e: 
-        logging.error(f"Error finding object '{path_name}': {e}")
-        return False
-    if undo:
-        obj.ObjectFlags &= ~0x4000
-    else:
-        obj.ObjectFlags |= 0x4000
-    return True
+@dataclass()
+class _KeptAlive:
+    """An object the editor keeps alive, until every owner, e.g. a map layer, released it."""
+
+    obj: unreal.UObject
+    package: str
+    b_flagged: bool  # objects that were already kept alive by the game are never released
+    owners: set[str] = field(default_factory=set)
+
+
+_kept_alive: dict[str, _KeptAlive] = {}  # path name -> registry entry, holds the resolved object
+
+
+def retain(package: str, path_names: Iterable[str], owner: str) -> list[str]:
+    """
+    Keep objects alive for an owner. Every object is only looked up the first time any owner retains it, the flags
+    of all newly kept alive objects are set together.
+
+    :param package: The package the objects are tracked under.
+    :param path_names:
+    :param owner: E.g. the name of the layer that needs the objects, or USER_OWNER.
+    :return: The path names that could not be found.
+    """
+    not_found: list[str] = []
+    added: list[_KeptAlive] = []
+    for path_name in path_names:
+        entry = _kept_alive.get(path_name)
+        if entry is None:
+            try:
+                obj = find_object("Object", path_name)
+            except ValueError as e:
+                logging.error(f"Error finding object '{path_name}': {e}")
+                not_found.append(path_name)
+                continue
+            entry = _KeptAlive(obj, package, not obj.ObjectFlags & _KEEP_ALIVE_FLAG)
+            _kept_alive[path_name] = entry
+            added.append(entry)
+            loaded_objects.setdefault(package, []).append(path_name)
+        entry.owners.add(owner)
+    for entry in added:
+        if entry.b_flagged:
+            entry.obj.ObjectFlags |= _KEEP_ALIVE_FLAG
+    if added:
+        logging.info(f"Kept {len(added)} objects of '{package}' alive")
+    return not_found
+
+
+def _release_entries(path_names: list[str]) -> None:
+    for path_name in path_names:
+        entry = _kept_alive.pop(path_name)
+        if entry.b_flagged:
+            entry.obj.ObjectFlags &= ~_KEEP_ALIVE_FLAG
+        objs = loaded_objects.get(entry.package)
+        if objs is not None and path_name in objs:
+            objs.remove(path_name)
+    if path_names:
+        logging.info(f"Released {len(path_names)} objects")
+
+
+def release(path_names: Iterable[str], owner: str | None = None) -> None:
+    """
+    Release objects for an owner, an object is only released once its last owner released it.
+
+    :param path_names:
+    :param owner: None releases the objects for every owner.
+    :return:
+    """
+    to_release: list[str] = []
+    for path_name in path_names:
+        entry = _kept_alive.get(path_name)
+        if entry is None:
+            continue
+        if owner is None:
+            entry.owners.clear()
+        else:
+            entry.owners.discard(owner)
+        if not entry.owners:
+            to_release.append(path_name)
+    _release_entries(to_release)
+
+
+def release_owner(owner: str) -> None:
+    """Release every object an owner retained, e.g. when its layer got unloaded."""
+    release([path_name for path_name, entry in _kept_alive.items() if owner in entry.owners], owner)
 
 
 def add_package(name: str) -> None:
@@ -29,11 +118,9 @@ def add_package(name: str) -> None:
 
 
 def remove_package(name: str) -> None:
-    """Remove a package and release all its kept-alive objects."""
+    """Remove a package and release all its kept-alive objects, no matter which map or layer needs them."""
     if name in loaded_objects:
-        for obj_path in loaded_objects[name]:
-            _keep_alive(obj_path, undo=True)
-            logging.info(f"Released object: {obj_path}")
+        release(list(loaded_objects[name]))
         del loaded_objects[name]
         logging.info(f"Removed package: {name}")
     else:
@@ -41,9 +128,12 @@ def remove_package(name: str) -> None:
 
 
 def load_package(name: str) -> bool:
-    """Load an Unreal package by name and track it."""
+    """Load an Unreal package by name and track it, packages that are already loaded are not loaded again."""
+    if name in loaded_packages:
+        return True
     try:
         unrealsdk.load_package(name)
+        loaded_packages.add(name)
         logging.info(f"Loaded package: {name}")
         return True
     except Exception as e:  # noqa: BLE001
@@ -51,26 +141,55 @@ def load_package(name: str) -> bool:
         return False
 
 
+def _load_requested() -> TickCoroutine:
+    global _b_loading  # noqa: PLW0603
+    try:
+        while _requested:
+            name = next(iter(_requested))
+            b_loaded = load_package(name)
+            for callback in _requested.pop(name, []):
+                try:
+                    callback(b_loaded)
+                except Exception as e:  # noqa: BLE001
+                    logging.error(f"Failed to apply what waited for package '{name}': {e}")
+            yield None  # only one package per tick, so loading a big map does not freeze the game
+    finally:
+        _b_loading = False  # a later request starts a new coroutine, even if this one got stopped
+    return None
+
+
+def request_package(name: str, callback: Callable[[bool], None]) -> None:
+    """
+    Load a package in one of the next ticks, one package is loaded per tick. Requests for a package that is already
+    requested are merged into one load.
+
+    :param name:
+    :param callback: Gets if the package could be loaded, called right away if it already is loaded.
+    :return:
+    """
+    global _b_loading  # noqa: PLW0603
+    if name in loaded_packages:
+        callback(True)
+        return
+    _requested.setdefault(name, []).append(callback)
+    if not _b_loading:
+        _b_loading = True
+        start_coroutine_tick(_load_requested())
+
+
 def keep_alive(path_name: str, package: str) -> bool:
-    """Keep a UObject alive by holding a persistent Python reference."""
-    if (objs := loaded_objects.get(package)) and path_name in objs:
-        logging.info(f"Object '{path_name}' is already kept alive.")
-        return True
-    load_package(package)  # Ensure the package is loaded before keeping the object alive
-    if not _keep_alive(path_name):
+    """Keep a UObject alive by hand, until it gets released by hand again."""
+    load_package(package)  # Ensure the package is loaded before keeping the object alive, no-op if it already is
+    if retain(package, (path_name,), USER_OWNER):
         logging.error(f"Failed to keep object alive: {path_name}")
         return False
-    loaded_objects[package].append(path_name)  # Add to the specified package
-    logging.info(f"Kept object alive: {path_name}")
     return True
 
 
 def release_object(path_name: str, package: str) -> None:
-    """Release a single kept-alive object, allowing it to be GC'd."""
+    """Release a single kept-alive object, allowing it to be GC'd, no matter which map or layer needs it."""
     if (objs := loaded_objects.get(package)) and path_name in objs:
-        _keep_alive(path_name, undo=True)
-        objs.remove(path_name)
-        logging.info(f"Released object: {path_name}")
+        release((path_name,))
     else:
         logging.warning(f"Object '{path_name}' not found in package '{package}'.")
 
@@ -82,10 +201,58 @@ def save_to_json(map_data: dict) -> None:
     map_data["LoadedObjects"] = loaded_objects
 
 
-def load_from_json(map_data: dict) -> None:
-    """Restore package loads and kept-alive objects from the map JSON dict."""
+def is_in_memory(name: str) -> bool:
+    """If a package is loaded, by the editor or by the game, e.g. because the current level uses it."""
+    if name in loaded_packages:
+        return True
+    try:
+        find_object("Package", name)
+    except ValueError:
+        return False
+    return True
+
+
+def load_from_json(
+    map_data: dict,
+    owner: str,
+    callback: Callable[[], None] | None = None,
+    dependencies: Iterable[str] = (),
+) -> None:
+    """
+    Restore package loads and kept-alive objects from the map JSON dict, the packages are loaded over the next ticks.
+
+    :param map_data:
+    :param owner: Keeps the objects alive, objects shared with other owners stay alive until all of them released it.
+    :param callback: Called once every package is resolved and its objects are kept alive, e.g. to apply the
+                     placeables of the map that use these objects.
+    :param dependencies: Packages the placeables of the map reference, only loaded if they are not in memory yet.
+    :return:
+    """
     engine_data = map_data.get("LoadedObjects", {})
-    for package, objects in engine_data.items():
-        if load_package(package):
-            for obj_path in objects:
-                keep_alive(obj_path, package)
+    packages = [
+        *engine_data,
+        *(x for x in dict.fromkeys(dependencies) if x not in engine_data and not is_in_memory(x)),
+    ]
+    pending = set(packages)
+
+    def on_resolved(package: str, b_loaded: bool) -> None:
+        if b_loaded and package in engine_data:
+            retain(package, engine_data[package], owner)
+        pending.discard(package)
+        if not pending and callback is not None:
+            callback()
+
+    if not pending and callback is not None:
+        callback()
+    for package in packages:
+        request_package(package, functools.partial(on_resolved, package))
+
+
+def clear() -> None:
+    """
+    Forget the loaded packages and drop the pending requests, the level they were meant for is gone.
+    The coroutine working through the requests stops on its next tick.
+    Kept-alive objects survive the level change, so they stay tracked.
+    """
+    loaded_packages.clear()
+    _requested.clear()
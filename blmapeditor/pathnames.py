@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, cast
+
+from mods_base import ENGINE
+
+if TYPE_CHECKING:
+    from common import WillowGameEngine
+    from unrealsdk import unreal
+
+    ENGINE = cast(WillowGameEngine, ENGINE)
+
+# UObject -> interned path name, only valid for the currently loaded level
+_PATH_NAMES: dict[unreal.UObject, str] = {}
+
+
+def path_name(uobject: unreal.UObject | None) -> str:
+    """
+    Get the path name of the given UObject, resolving it through the engine only once per level.
+
+    :param uobject:
+    :return: The interned path name, "None" if no object was given.
+    """
+    if uobject is None:
+        return "None"
+    try:
+        return _PATH_NAMES[uobject]
+    except KeyError:
+        name = _PATH_NAMES[uobject] = sys.intern(ENGINE.PathName(uobject))
+        return name
+
+
+def forget_level(level_name: str) -> None:
+    """
+    Drop the cached path names of all objects of a sub-level that gets streamed out.
+    Objects created later may reuse the memory of its objects, they must not get the old path names.
+
+    :param level_name: The lowercase package name of the sub-level.
+    :return:
+    """
+    prefix = f"{level_name}."
+    for uobject in [x for x, name in _PATH_NAMES.items() if name.lower().startswith(prefix)]:
+        del _PATH_NAMES[uobject]
+
+
+def clear() -> None:
+    """Drop all cached path names, called on every Map Load start."""
+    _PATH_NAMES.clear()
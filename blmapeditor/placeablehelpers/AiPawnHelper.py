@@ -2,19 +2,31 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, cast
 
-from mods_base import ENGINE
-from unrealsdk import find_all, find_object
+from unrealsdk import find_all, find_object, logging
 
-from .. import placeables
+from .. import pathnames, placeables
 from .placeablehelper import PlaceableHelper
 
 if TYPE_CHECKING:
     from common import AIPawnBalanceDefinition, MaterialInterface
 
 
+def _make_blueprint(balance: AIPawnBalanceDefinition) -> placeables.AIPawnPlaceable:
+    return placeables.AIPawnPlaceable(
+        balance.PlayThroughs[0].DisplayName
+        if (balance.PlayThroughs and balance.PlayThroughs[0].DisplayName)
+        else pathnames.path_name(balance).split(".")[-1],
+        balance,
+    )
+
+
 class AiPawnHelper(PlaceableHelper):
     def __init__(self) -> None:
-        super().__init__(name="Pawns", supported_filters=["All Instances", "Create", "Edited"])
+        super().__init__(
+            name="Pawns",
+            supported_filters=["All Instances", "Create", "Edited"],
+            uclass="AIPawnBalanceDefinition",
+        )
 
     def on_enable(self) -> None:
         super().on_enable()
@@ -41,14 +53,9 @@ class AiPawnHelper(PlaceableHelper):
         if mapname in ("menumap", "none", ""):
             return
 
-        self.objects_by_filter["Create"].extend(
+        self.objects_by_filter["Create"].update(
             [
-                placeables.AIPawnPlaceable(
-                    x.PlayThroughs[0].DisplayName
-                    if (x.PlayThroughs and x.PlayThroughs[0].DisplayName)
-                    else ENGINE.PathName(x).split(".")[-1],
-                    x,
-                )
+                _make_blueprint(x)
                 for x in cast(list["AIPawnBalanceDefinition"], list(find_all("AIPawnBalanceDefinition"))[1:])
             ],
         )
@@ -56,29 +63,55 @@ class AiPawnHelper(PlaceableHelper):
         self.objects_by_filter["Create"].sort(key=lambda obj: obj.name)
 
     def load_map(self, map_data: dict) -> None:
+        blueprints = cast(dict[str, placeables.AIPawnPlaceable], self._get_blueprints_by_path_name())
+        missing: set[str] = set()
+        b_added = False
         for bp in map_data.get("Create", {}).get("AIPawnBalanceDefinition", []):
             for obj, attrs in bp.items():
-                for pawn_bp in cast(list[placeables.AIPawnPlaceable], self.objects_by_filter["Create"]):
-                    if pawn_bp.holds_object(find_object("AIPawnBalanceDefinition", obj)):
-                        new_instance, _ = pawn_bp.instantiate()
-                        new_instance: placeables.AIPawnPlaceable
-
-                        new_instance.rename = attrs.get("Rename", "")
-                        new_instance.tags = attrs.get("Tags", [])
-                        new_instance.metadata = attrs.get("Metadata", "")
-                        new_instance.set_location(attrs.get("Location", (0, 0, 0)))
-                        new_instance.set_rotation(attrs.get("Rotation", (0, 0, 0)))
-                        new_instance.set_scale(attrs.get("Scale", 1))
-                        new_instance.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
-
-                        mats = attrs.get("Materials", None)
-                        if mats is not None:
-                            mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
-                        new_instance.set_materials(mats)
-
-                        self.objects_by_filter["Edited"].append(new_instance)
-                        break
+                pawn_bp = blueprints.get(obj.lower())
+                if pawn_bp is None and obj not in missing:
+                    # e.g. from a package the map depends on, loaded after our setup
+                    pawn_bp = self._add_blueprint(obj)
+                    if pawn_bp is not None:
+                        blueprints[obj.lower()] = pawn_bp
+                        b_added = True
+                if pawn_bp is None:
+                    missing.add(obj)
+                    continue
+                new_instance, _ = pawn_bp.instantiate()
+                new_instance: placeables.AIPawnPlaceable
+
+                new_instance.rename = attrs.get("Rename", "")
+                new_instance.tags = attrs.get("Tags", [])
+                new_instance.metadata = attrs.get("Metadata", "")
+                new_instance.set_location(attrs.get("Location", (0, 0, 0)))
+                new_instance.set_rotation(attrs.get("Rotation", (0, 0, 0)))
+                new_instance.set_scale(attrs.get("Scale", 1))
+                new_instance.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
+
+                mats = attrs.get("Materials", None)
+                if mats is not None:
+                    mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
+                new_instance.set_materials(mats)
+
+                self.add_instances((new_instance,))
+        if b_added:
+            self.objects_by_filter["Create"].sort(key=lambda obj: obj.name)
+            self.is_cache_dirty = True
+        if missing:
+            logging.warning(f"{len(missing)} Pawns do not exist, they will not be placed: {sorted(missing)}")
+
+    def _add_blueprint(self, path_name: str) -> placeables.AIPawnPlaceable | None:
+        """Add a pawn balance that got loaded after our setup to the Create filter, None if it does not exist."""
+        try:
+            balance = cast("AIPawnBalanceDefinition", find_object("AIPawnBalanceDefinition", path_name))
+        except ValueError:
+            return None
+        blueprint = _make_blueprint(balance)
+        self.objects_by_filter["Create"].add(blueprint)
+        return blueprint
 
     def save_map(self, map_data: dict) -> None:
         for placeable in self.objects_by_filter["Edited"]:
-            placeable.save_to_json(map_data)
+            if placeable.prefab_owner is None:  # parts of a prefab instance are saved by the PrefabHelper
+                placeable.save_to_json(map_data)
@@ -1,29 +1,33 @@
 from __future__ import annotations
 
 import contextlib
+from collections.abc import Iterable, Mapping, Sequence
 from typing import TYPE_CHECKING, cast
 
-from mods_base import ENGINE
-from unrealsdk import find_all, find_object, unreal
+from unrealsdk import find_all, find_object, logging, unreal
 
-from .. import placeables
+from .. import pathnames, placeables, streaming
 from .placeablehelper import PlaceableHelper
 
 if TYPE_CHECKING:
-    from common import (
-        MaterialInterface,
-        WillowGameEngine,
-        WillowInteractiveObject,
-        WillowVendingMachine,
-        WillowVendingMachineBlackMarket,
-    )
+    from common import InteractiveObjectDefinition, MaterialInterface, WillowInteractiveObject
 
-    ENGINE = cast(WillowGameEngine, ENGINE)
+
+# The actor classes whose instances are placed in the levels themselves
+_INSTANCE_CLASSES: tuple[str, ...] = (
+    "WillowInteractiveObject",
+    "WillowVendingMachine",
+    "WillowVendingMachineBlackMarket",
+)
 
 
 class InterctiveObjectHelper(PlaceableHelper):
     def __init__(self) -> None:
-        super().__init__(name="Interactive Objects", supported_filters=["All Instances", "Create", "Edited"])
+        super().__init__(
+            name="Interactive Objects",
+            supported_filters=["All Instances", "Create", "Edited"],
+            uclass="InteractiveObjectDefinition",
+        )
 
     def on_enable(self) -> None:
         super().on_enable()
@@ -55,57 +59,8 @@ class InterctiveObjectHelper(PlaceableHelper):
         if mapname in ("menumap", "none", ""):
             return
 
-        self.objects_by_filter["All Instances"].extend(
-            [
-                placeables.InteractiveObjectPlaceable(
-                    ENGINE.PathName(x.BalanceDefinitionState.BalanceDefinition).split(".")[-1]
-                    if x.BalanceDefinitionState.BalanceDefinition
-                    else ENGINE.PathName(x.InteractiveObjectDefinition).split(".")[-1],
-                    x.BalanceDefinitionState.BalanceDefinition
-                    if x.BalanceDefinitionState.BalanceDefinition
-                    else x.InteractiveObjectDefinition,
-                    x,
-                )
-                for x in cast(
-                    list["WillowInteractiveObject"],
-                    list(find_all("WillowInteractiveObject"))[1:],
-                )
-            ],
-        )
-        self.objects_by_filter["All Instances"].extend(
-            [
-                placeables.InteractiveObjectPlaceable(
-                    ENGINE.PathName(x.BalanceDefinitionState.BalanceDefinition).split(".")[-1]
-                    if x.BalanceDefinitionState.BalanceDefinition
-                    else ENGINE.PathName(x.InteractiveObjectDefinition).split(".")[-1],
-                    x.BalanceDefinitionState.BalanceDefinition
-                    if x.BalanceDefinitionState.BalanceDefinition
-                    else x.InteractiveObjectDefinition,
-                    x,
-                )
-                for x in cast(
-                    list["WillowVendingMachine"],
-                    list(find_all("WillowVendingMachine"))[1:],
-                )
-            ],
-        )
-        self.objects_by_filter["All Instances"].extend(
-            [
-                placeables.InteractiveObjectPlaceable(
-                    ENGINE.PathName(x.BalanceDefinitionState.BalanceDefinition).split(".")[-1]
-                    if x.BalanceDefinitionState.BalanceDefinition
-                    else ENGINE.PathName(x.InteractiveObjectDefinition).split(".")[-1],
-                    x.BalanceDefinitionState.BalanceDefinition
-                    if x.BalanceDefinitionState.BalanceDefinition
-                    else x.InteractiveObjectDefinition,
-                    x,
-                )
-                for x in cast(
-                    list["WillowVendingMachineBlackMarket"],
-                    list(find_all("WillowVendingMachineBlackMarket"))[1:],
-                )
-            ],
-        )
+        for uclass in _INSTANCE_CLASSES:
+            self._add_instances_of(cast("list[WillowInteractiveObject]", list(find_all(uclass))[1:]))
         self.objects_by_filter["All Instances"].sort(key=lambda obj: obj.name)
         #############################################################################
 
@@ -122,79 +77,140 @@ class InterctiveObjectHelper(PlaceableHelper):
             with contextlib.suppress(ValueError):
                 interactives.pop(interactives.index(find_object(_class, _object)))
 
-        self.objects_by_filter["Create"].extend(
-            [placeables.InteractiveObjectPlaceable(ENGINE.PathName(x).split(".")[-1], x) for x in interactives],
+        self.objects_by_filter["Create"].update(
+            placeables.InteractiveObjectPlaceable(pathnames.path_name(x).split(".")[-1], x) for x in interactives
         )
         self.objects_by_filter["Create"].sort(key=lambda obj: obj.name)
 
+    def _add_instances_of(self, actors: Iterable[WillowInteractiveObject]) -> None:
+        self.objects_by_filter["All Instances"].update(
+            [
+                placeables.InteractiveObjectPlaceable(
+                    pathnames.path_name(x.BalanceDefinitionState.BalanceDefinition).split(".")[-1]
+                    if x.BalanceDefinitionState.BalanceDefinition
+                    else pathnames.path_name(x.InteractiveObjectDefinition).split(".")[-1],
+                    x.BalanceDefinitionState.BalanceDefinition
+                    if x.BalanceDefinitionState.BalanceDefinition
+                    else x.InteractiveObjectDefinition,
+                    x,
+                )
+                for x in actors
+            ],
+        )
+
+    def on_level_streamed_in(self, level_name: str) -> None:
+        if not self._is_indexed() or self._holds_level_objects(level_name):
+            return
+        for uclass in _INSTANCE_CLASSES:
+            self._add_instances_of(
+                x
+                for x in cast("list[WillowInteractiveObject]", find_all(uclass))
+                if streaming.is_in_level(pathnames.path_name(x), level_name)
+            )
+        self.objects_by_filter["All Instances"].sort(key=lambda obj: obj.name)
+        super().on_level_streamed_in(level_name)
+
     def load_map(self, map_data: dict) -> None:
+        instances = cast(
+            dict[str, placeables.InteractiveObjectPlaceable],
+            self._get_instances_by_path_name(),
+        )
         for to_destroy in map_data.get("Destroy", {}).get("InteractiveObjectDefinition", []):
-            for placeable in cast(
-                list[placeables.InteractiveObjectPlaceable],
-                self.objects_by_filter["All Instances"],
-            ):
-                if placeable.holds_object(find_object("Object", to_destroy)):
-                    self.deleted.append(placeable)
-                    to_remove: list[placeables.InteractiveObjectPlaceable] = placeable.destroy()
-                    for remove_me in to_remove:
-                        for _list in self.objects_by_filter.values():
-                            with contextlib.suppress(ValueError):
-                                _list.pop(_list.index(remove_me))
-                    break
-
-        for bp in map_data.get("Create", {}).get("InteractiveObjectDefinition", []):
+            placeable = instances.get(to_destroy.lower())
+            if placeable is not None and not placeable.is_destroyed:
+                self.deleted.append(placeable)
+                to_remove: list[placeables.InteractiveObjectPlaceable] = placeable.destroy()
+                for _filter in self.objects_by_filter.values():
+                    _filter.difference_update(to_remove)
+
+        self._load_created(map_data.get("Create", {}).get("InteractiveObjectDefinition", []))
+
+        edits = map_data.get("Edit", {}).get("InteractiveObjectDefinition", {})
+        for obj in edits:
+            placeable = instances.get(obj.lower())
+            if placeable is None or placeable.is_destroyed:
+                continue  # e.g. an object of another level, its attributes never get decoded
+            attrs = edits[obj]
+            placeable.store_default_values(self.edited_default)  # lets unloading the maps layer restore it
+            placeable.rename = attrs.get("Rename", "")
+            placeable.tags = attrs.get("Tags", [])
+            placeable.metadata = attrs.get("Metadata", "")
+            placeable.set_location(attrs.get("Location", (0, 0, 0)))
+            placeable.set_rotation(attrs.get("Rotation", (0, 0, 0)))
+            placeable.set_scale(attrs.get("Scale", 1))
+            placeable.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
+
+            mats = attrs.get("Materials", None)
+            if mats is not None:
+                mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
+            placeable.set_materials(mats)
+
+            self.objects_by_filter["Edited"].add(placeable)
+
+    def _load_created(self, to_create: Sequence[Mapping[str, Mapping]]) -> None:
+        """Place the InteractiveObjects of the maps 'Create' entries."""
+        blueprints = cast(
+            dict[str, placeables.InteractiveObjectPlaceable],
+            self._get_blueprints_by_path_name(),
+        )
+        missing: set[str] = set()
+        b_added = False
+        for bp in to_create:
             for obj, attrs in bp.items():
-                for iodef in cast(
-                    list[placeables.InteractiveObjectPlaceable],
-                    self.objects_by_filter["Create"],
-                ):
-                    if iodef.holds_object(find_object("Object", obj)):
-                        new_instance, _ = iodef.instantiate()
-                        new_instance: placeables.InteractiveObjectPlaceable
-
-                        new_instance.rename = attrs.get("Rename", "")
-                        new_instance.tags = attrs.get("Tags", [])
-                        new_instance.metadata = attrs.get("Metadata", "")
-                        new_instance.set_location(attrs.get("Location", (0, 0, 0)))
-                        new_instance.set_rotation(attrs.get("Rotation", (0, 0, 0)))
-                        new_instance.set_scale(attrs.get("Scale", 1))
-                        new_instance.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
-
-                        mats = attrs.get("Materials", None)
-                        if mats is not None:
-                            mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
-                        new_instance.set_materials(mats)
-
-                        self.objects_by_filter["Edited"].append(new_instance)
-                        self.objects_by_filter["All Instances"].append(new_instance)
-                        break
-
-        for obj, attrs in map_data.get("Edit", {}).get("InteractiveObjectDefinition", {}).items():
-            for placeable in cast(
-                list[placeables.InteractiveObjectPlaceable],
-                self.objects_by_filter["All Instances"],
-            ):
-                if placeable.holds_object(find_object("Object", obj)):
-                    placeable: placeables.InteractiveObjectPlaceable
-                    placeable.rename = attrs.get("Rename", "")
-                    placeable.tags = attrs.get("Tags", [])
-                    placeable.metadata = attrs.get("Metadata", "")
-                    placeable.set_location(attrs.get("Location", (0, 0, 0)))
-                    placeable.set_rotation(attrs.get("Rotation", (0, 0, 0)))
-                    placeable.set_scale(attrs.get("Scale", 1))
-                    placeable.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
-
-                    mats = attrs.get("Materials", None)
-                    if mats is not None:
-                        mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
-                    placeable.set_materials(mats)
-
-                    self.objects_by_filter["Edited"].append(placeable)
-                    break
+                iodef = blueprints.get(obj.lower())
+                if iodef is None and obj not in missing:
+                    # e.g. from a package the map depends on, loaded after our setup
+                    iodef = self._add_blueprint(obj)
+                    if iodef is not None:
+                        blueprints[obj.lower()] = iodef
+                        b_added = True
+                if iodef is None:
+                    missing.add(obj)
+                    continue
+                new_instance, _ = iodef.instantiate()
+                new_instance: placeables.InteractiveObjectPlaceable
+
+                new_instance.rename = attrs.get("Rename", "")
+                new_instance.tags = attrs.get("Tags", [])
+                new_instance.metadata = attrs.get("Metadata", "")
+                new_instance.set_location(attrs.get("Location", (0, 0, 0)))
+                new_instance.set_rotation(attrs.get("Rotation", (0, 0, 0)))
+                new_instance.set_scale(attrs.get("Scale", 1))
+                new_instance.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
+
+                mats = attrs.get("Materials", None)
+                if mats is not None:
+                    mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
+                new_instance.set_materials(mats)
+
+                self.add_instances((new_instance,))
+        if b_added:
+            self.objects_by_filter["Create"].sort(key=lambda obj: obj.name)
+            self.is_cache_dirty = True
+        if missing:
+            logging.warning(
+                f"{len(missing)} InteractiveObjects do not exist, they will not be placed: {sorted(missing)}",
+            )
+
+    def _add_blueprint(self, path_name: str) -> placeables.InteractiveObjectPlaceable | None:
+        """Add a definition that got loaded after our setup to the Create filter, None if it does not exist."""
+        try:
+            definition = find_object("Object", path_name)
+        except ValueError:
+            return None
+        if definition.Class.Name not in ("InteractiveObjectBalanceDefinition", "InteractiveObjectDefinition"):
+            return None
+        blueprint = placeables.InteractiveObjectPlaceable(
+            pathnames.path_name(definition).split(".")[-1],
+            cast("InteractiveObjectDefinition", definition),
+        )
+        self.objects_by_filter["Create"].add(blueprint)
+        return blueprint
 
     def save_map(self, map_data: dict) -> None:
         for placeable in self.objects_by_filter["All Instances"]:
-            placeable.save_to_json(map_data)
+            if placeable.prefab_owner is None:  # parts of a prefab instance are saved by the PrefabHelper
+                placeable.save_to_json(map_data)
 
         for deleted in self.deleted:
             deleted.save_to_json(map_data)
@@ -1,22 +1,24 @@
 from __future__ import annotations
 
-import pathlib
+from collections.abc import Iterable
 from typing import cast
 
 from uemath import Vector
-from unrealsdk import unreal
+from unrealsdk import logging, unreal
 
-from .. import placeables, prefabbuffer
+from .. import placeables, prefabbuffer, prefablibrary, scene
 from .. import selectedobject as sobj
-from ..placeablehelpers import InteractiveHelper, PawnHelper, SMCHelper
 from .placeablehelper import PlaceableHelper
 
 
 class PrefabHelper(PlaceableHelper):
+    instances_filter: str = "Prefab Instances"
+
     def __init__(self) -> None:
         super().__init__(
             name="Prefabs",
             supported_filters=["Prefab Blueprints", "Prefab Instances"],
+            uclass="Prefab",
         )
 
     def on_enable(self) -> None:
@@ -26,37 +28,45 @@ class PrefabHelper(PlaceableHelper):
         super().on_disable()
 
     def add_to_prefab(self) -> None:
-        pass
+        if self.curr_filter == "Prefab Instances":  # placed prefabs become nested prefabs of the new one
+            super().add_to_prefab()
+
+    @staticmethod
+    def _add_parts_to_filters(parts: Iterable[placeables.AbstractPlaceable]) -> None:
+        """Add the parts of placed prefabs to the object_by_filter lists of their HelperClass objects."""
+        for c_obj in parts:
+            scene.get_helper(c_obj).add_instances((c_obj,))
 
     def _create_and_add_to_filters(self) -> placeables.Prefab:
         # create a new instance from our Blueprint object
-        new_instance, created_objs = self._cached_objects_for_filter[self.object_index].instantiate()
-        for c_obj in created_objs:  # filter created object to its correct HelperClass object_by_filter list
-            if isinstance(c_obj, placeables.StaticMeshComponentPlaceable):
-                SMCHelper.objects_by_filter["Edited"].append(c_obj)
-                SMCHelper.objects_by_filter["All Instances"].append(c_obj)
-            elif isinstance(c_obj, placeables.InteractiveObjectPlaceable):
-                InteractiveHelper.objects_by_filter["Edited"].append(c_obj)
-                InteractiveHelper.objects_by_filter["All Instances"].append(c_obj)
-            elif isinstance(c_obj, placeables.AIPawnPlaceable):
-                PawnHelper.objects_by_filter["Edited"].append(c_obj)
-                PawnHelper.objects_by_filter["All Instances"].append(c_obj)
-        return cast(placeables.Prefab, new_instance)
+        blueprint = cast(placeables.Prefab, self._cached_objects_for_filter[self.object_index])
+        new_instance, created_objs = blueprint.instantiate()
+        self._add_parts_to_filters(created_objs)
+        return new_instance
+
+    def _add_copies_to_filters(
+        self,
+        copies: list[placeables.AbstractPlaceable],
+        created: list[placeables.AbstractPlaceable],
+    ) -> None:
+        self.objects_by_filter["Prefab Instances"].update(copies)
+        self._add_parts_to_filters(created)
 
     def paste(self) -> None:
         if sobj.CLIPBOARD and not sobj.CLIPBOARD.is_destroyed:
             pasted = self._create_and_add_to_filters()
             pasted.rename = sobj.CLIPBOARD.rename
-            pasted.set_scale(sobj.CLIPBOARD.get_scale())
-            pasted.set_rotation(sobj.CLIPBOARD.get_rotation())
-            pasted.set_scale3d(sobj.CLIPBOARD.get_scale3d())
+            pasted.set_transform(
+                sobj.CLIPBOARD.get_location(),
+                sobj.CLIPBOARD.get_rotation(),
+                sobj.CLIPBOARD.get_scale(),
+                sobj.CLIPBOARD.get_scale3d(),
+            )
             pasted.set_materials(sobj.CLIPBOARD.get_materials())
-            pasted.set_location(sobj.CLIPBOARD.get_location())
             pasted.b_dynamically_created = True
-            self.objects_by_filter["Prefab Instances"].append(pasted)
+            self.objects_by_filter["Prefab Instances"].add(pasted)
             if not sobj.SELECTED_OBJECT:
                 sobj.SELECTED_OBJECT = pasted
-        self.is_cache_dirty = True
 
     def get_filter(self) -> str:
         return super().get_filter()
@@ -87,8 +97,7 @@ class PrefabHelper(PlaceableHelper):
                 new_instance = self._create_and_add_to_filters()
                 new_instance.b_dynamically_created = True
                 sobj.SELECTED_OBJECT = new_instance  # let's start editing this new object
-                self.objects_by_filter["Prefab Instances"].append(new_instance)
-        self.is_cache_dirty = True
+                self.objects_by_filter["Prefab Instances"].add(new_instance)
 
     def cleanup(self, mapname: str) -> None:
         super().cleanup(mapname)
@@ -98,17 +107,51 @@ class PrefabHelper(PlaceableHelper):
         if mapname in ("menumap", "none", ""):
             return
 
-        # ToDo: Load the prefabs from the json data
-        # The json should be stored in MapEditor/Prefabs/<prefab_name>.json
-        for p in (pathlib.Path(__file__).parent.parent / "Prefabs").glob("*.json"):
-            blueprint = placeables.Prefab.load_prefab_json(
-                p.name.replace(".json", "").replace("_", " ").split(maxsplit=1)[-1],
-            )
-            if blueprint:
-                self.objects_by_filter["Prefab Blueprints"].append(blueprint)
+        # Only prefab files that changed since the last map load get parsed again,
+        # the parts of a blueprint are looked up once it actually gets placed.
+        self.objects_by_filter["Prefab Blueprints"].update(
+            placeables.Prefab(name, parts) for name, parts in prefablibrary.scan()
+        )
 
     def load_map(self, map_data: dict) -> None:
-        pass  # ToDo: Should Prefabs save their instanced data?
+        blueprints = {bp.name: cast(placeables.Prefab, bp) for bp in self.objects_by_filter["Prefab Blueprints"]}
+        to_place: list[placeables.Prefab] = []
+        all_attrs: list[dict] = []
+        transforms: list[placeables.prefab.Transform] = []
+        for bp in map_data.get("Create", {}).get("Prefab", []):
+            for name, attrs in bp.items():
+                blueprint = blueprints.get(name)
+                if blueprint is None:
+                    logging.warning(f"Prefab '{name}' does not exist, it will not be placed!")
+                    continue
+                to_place.append(blueprint)
+                all_attrs.append(attrs)
+                transforms.append(
+                    placeables.prefab.Transform(
+                        attrs.get("Location", (0, 0, 0)),
+                        attrs.get("Rotation", (0, 0, 0)),
+                        attrs.get("Scale", 1),
+                        attrs.get("Scale3D", (1, 1, 1)),
+                    ),
+                )
+
+        created: list[placeables.AbstractPlaceable] = []
+        for (new_instance, new_parts), attrs in zip(
+            placeables.Prefab.instantiate_batch(to_place, transforms),
+            all_attrs,
+            strict=True,
+        ):
+            new_instance.rename = attrs.get("Rename", "")
+            new_instance.tags = attrs.get("Tags", [])
+            new_instance.metadata = attrs.get("Metadata", "")
+            new_instance.apply_overrides(attrs.get("Overrides", {}))
+            new_instance.b_dynamically_created = True
+            self.objects_by_filter["Prefab Instances"].add(new_instance)
+            created.extend(new_parts)
+
+        # All parts of all prefabs get registered at once, parts that were deleted after placing stay destroyed
+        self._add_parts_to_filters(x for x in created if not x.is_destroyed)
 
     def save_map(self, map_data: dict) -> None:
-        pass
+        for placeable in self.objects_by_filter["Prefab Instances"]:
+            placeable.save_to_json(map_data)
@@ -1,16 +1,15 @@
 from __future__ import annotations
 
-import contextlib
+from collections.abc import Iterable, Mapping, Sequence
 from typing import TYPE_CHECKING, cast
 
-from mods_base import ENGINE
-from unrealsdk import find_all, find_object
+from unrealsdk import find_all, find_object, logging
 
-from .. import placeables
+from .. import pathnames, placeables, streaming
 from .placeablehelper import PlaceableHelper
 
 if TYPE_CHECKING:
-    from common import MaterialInterface, StaticMesh
+    from common import MaterialInterface, StaticMesh, StaticMeshCollectionActor
 
 
 class SMCHelper(PlaceableHelper):
@@ -18,6 +17,7 @@ class SMCHelper(PlaceableHelper):
         super().__init__(
             name="Static Meshes",
             supported_filters=["All Instances", "Edited", "Create"],
+            uclass="StaticMeshComponent",
         )
 
     def on_enable(self) -> None:
@@ -44,93 +44,137 @@ class SMCHelper(PlaceableHelper):
         if mapname in ("menumap", "none", ""):
             return
 
-        for x in find_all("StaticMeshCollectionActor"):
-            self.objects_by_filter["All Instances"].extend(
-                [
-                    placeables.StaticMeshComponentPlaceable(
-                        ENGINE.PathName(y.StaticMesh).split(".", 1)[-1],
-                        y.StaticMesh,
-                        y,
-                    )
-                    for y in x.AllComponents
-                ],
-            )
-        self.objects_by_filter["All Instances"].sort(key=lambda obj: obj.name)
+        self._add_collection_actors(cast("list[StaticMeshCollectionActor]", find_all("StaticMeshCollectionActor")))
 
         for mesh in list(find_all("StaticMesh"))[1:]:
             mesh = cast("StaticMesh", mesh)
-            self.objects_by_filter["Create"].append(
-                placeables.StaticMeshComponentPlaceable(ENGINE.PathName(mesh).split(".", 1)[-1], mesh),
+            self.objects_by_filter["Create"].add(
+                placeables.StaticMeshComponentPlaceable(pathnames.path_name(mesh).split(".", 1)[-1], mesh),
             )
 
         self.objects_by_filter["Create"].sort(key=lambda _x: _x.name)
 
+    def _add_collection_actors(self, actors: Iterable[StaticMeshCollectionActor]) -> None:
+        for x in actors:
+            self.objects_by_filter["All Instances"].update(
+                placeables.StaticMeshComponentPlaceable(
+                    pathnames.path_name(y.StaticMesh).split(".", 1)[-1],
+                    y.StaticMesh,
+                    y,
+                )
+                for y in x.AllComponents
+            )
+        self.objects_by_filter["All Instances"].sort(key=lambda obj: obj.name)
+
+    def on_level_streamed_in(self, level_name: str) -> None:
+        if not self._is_indexed() or self._holds_level_objects(level_name):
+            return
+        self._add_collection_actors(
+            x
+            for x in cast("list[StaticMeshCollectionActor]", find_all("StaticMeshCollectionActor"))
+            if streaming.is_in_level(pathnames.path_name(x), level_name)
+        )
+        super().on_level_streamed_in(level_name)
+
     def load_map(self, map_data: dict) -> None:
+        instances = cast(
+            dict[str, placeables.StaticMeshComponentPlaceable],
+            self._get_instances_by_path_name(),
+        )
         for to_destroy in map_data.get("Destroy", {}).get("StaticMeshComponent", []):
-            for placeable in cast(
-                list[placeables.StaticMeshComponentPlaceable],
-                self.objects_by_filter["All Instances"],
-            ):
-                if placeable.holds_object(find_object("Object", to_destroy)):
-                    self.deleted.append(placeable)
-                    to_remove: list[placeables.StaticMeshComponentPlaceable] = placeable.destroy()
-                    for remove_me in to_remove:
-                        for _list in self.objects_by_filter.values():
-                            with contextlib.suppress(ValueError):
-                                _list.pop(_list.index(remove_me))
-                    break
-
-        for bp in map_data.get("Create", {}).get("StaticMesh", []):
+            placeable = instances.get(to_destroy.lower())
+            if placeable is not None and not placeable.is_destroyed:
+                self.deleted.append(placeable)
+                to_remove: list[placeables.StaticMeshComponentPlaceable] = placeable.destroy()
+                for _filter in self.objects_by_filter.values():
+                    _filter.difference_update(to_remove)
+
+        self._load_created(map_data.get("Create", {}).get("StaticMesh", []))
+
+        edits = map_data.get("Edit", {}).get("StaticMeshComponent", {})
+        for obj in edits:
+            placeable = instances.get(obj.lower())
+            if placeable is None or placeable.is_destroyed:
+                continue  # e.g. an object of another level, its attributes never get decoded
+            attrs = edits[obj]
+            placeable.store_default_values(self.edited_default)  # lets unloading the maps layer restore it
+            placeable.rename = attrs.get("Rename", "")
+            placeable.tags = attrs.get("Tags", [])
+            placeable.metadata = attrs.get("Metadata", "")
+            placeable.set_location(attrs.get("Location", (0, 0, 0)))
+            placeable.set_rotation(attrs.get("Rotation", (0, 0, 0)))
+            placeable.set_scale(attrs.get("Scale", 1))
+            placeable.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
+
+            mats = attrs.get("Materials", None)
+            if mats is not None:
+                mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
+
+                placeable.set_materials(mats)
+
+            self.objects_by_filter["Edited"].add(placeable)
+
+    def _load_created(self, to_create: Sequence[Mapping[str, Mapping]]) -> None:
+        """Place all StaticMeshes of the maps 'Create' entries in a single batch."""
+        smc_bps = cast(
+            dict[str, placeables.StaticMeshComponentPlaceable],
+            self._get_blueprints_by_path_name(),
+        )
+        blueprints: list[placeables.StaticMeshComponentPlaceable] = []
+        all_attrs: list[Mapping] = []
+        missing: set[str] = set()
+        b_added = False
+        for bp in to_create:
             for obj, attrs in bp.items():
-                for smc_bp in cast(list[placeables.StaticMeshComponentPlaceable], self.objects_by_filter["Create"]):
-                    if smc_bp.holds_object(find_object("Object", obj)):
-                        new_instance, created_smcs = smc_bp.instantiate()
-                        new_instance: placeables.StaticMeshComponentPlaceable
-
-                        new_instance.rename = attrs.get("Rename", "")
-                        new_instance.tags = attrs.get("Tags", [])
-                        new_instance.metadata = attrs.get("Metadata", "")
-                        new_instance.set_location(attrs.get("Location", (0, 0, 0)))
-                        new_instance.set_rotation(attrs.get("Rotation", (0, 0, 0)))
-                        new_instance.set_scale(attrs.get("Scale", 1))
-                        new_instance.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
-
-                        mats = attrs.get("Materials", None)
-                        if mats is not None:
-                            mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
-                            new_instance.set_materials(mats)
-
-                        self.objects_by_filter["Edited"].append(new_instance)
-                        self.objects_by_filter["All Instances"].append(new_instance)
-                        break
-
-        for obj, attrs in map_data.get("Edit", {}).get("StaticMeshComponent", {}).items():
-            for placeable in cast(
-                list[placeables.StaticMeshComponentPlaceable],
-                self.objects_by_filter["All Instances"],
-            ):
-                if placeable.holds_object(find_object("Object", obj)):
-                    placeable: placeables.StaticMeshComponentPlaceable
-                    placeable.rename = attrs.get("Rename", "")
-                    placeable.tags = attrs.get("Tags", [])
-                    placeable.metadata = attrs.get("Metadata", "")
-                    placeable.set_location(attrs.get("Location", (0, 0, 0)))
-                    placeable.set_rotation(attrs.get("Rotation", (0, 0, 0)))
-                    placeable.set_scale(attrs.get("Scale", 1))
-                    placeable.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
-
-                    mats = attrs.get("Materials", None)
-                    if mats is not None:
-                        mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
-
-                        placeable.set_materials(mats)
-
-                    self.objects_by_filter["Edited"].append(placeable)
-                    break
+                smc_bp = smc_bps.get(obj.lower())
+                if smc_bp is None and obj not in missing:
+                    # e.g. from a package the map depends on, loaded after our setup
+                    smc_bp = self._add_blueprint(obj)
+                    if smc_bp is not None:
+                        smc_bps[obj.lower()] = smc_bp
+                        b_added = True
+                if smc_bp is None:
+                    missing.add(obj)
+                    continue
+                blueprints.append(smc_bp)
+                all_attrs.append(attrs)
+        if b_added:
+            self.objects_by_filter["Create"].sort(key=lambda _x: _x.name)
+            self.is_cache_dirty = True
+        if missing:
+            logging.warning(f"{len(missing)} StaticMeshes do not exist, they will not be placed: {sorted(missing)}")
+
+        new_instances = placeables.StaticMeshComponentPlaceable.instantiate_batch(blueprints)
+        for new_instance, attrs in zip(new_instances, all_attrs, strict=True):
+            new_instance.rename = attrs.get("Rename", "")
+            new_instance.tags = attrs.get("Tags", [])
+            new_instance.metadata = attrs.get("Metadata", "")
+            new_instance.set_location(attrs.get("Location", (0, 0, 0)))
+            new_instance.set_rotation(attrs.get("Rotation", (0, 0, 0)))
+            new_instance.set_scale(attrs.get("Scale", 1))
+            new_instance.set_scale3d(attrs.get("Scale3D", (1, 1, 1)))
+
+            mats = attrs.get("Materials", None)
+            if mats is not None:
+                mats = [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in mats]
+                new_instance.set_materials(mats)
+
+        self.add_instances(new_instances)
+
+    def _add_blueprint(self, path_name: str) -> placeables.StaticMeshComponentPlaceable | None:
+        """Add a StaticMesh that got loaded after our setup to the Create filter, None if it does not exist."""
+        try:
+            mesh = cast("StaticMesh", find_object("StaticMesh", path_name))
+        except ValueError:
+            return None
+        blueprint = placeables.StaticMeshComponentPlaceable(pathnames.path_name(mesh).split(".", 1)[-1], mesh)
+        self.objects_by_filter["Create"].add(blueprint)
+        return blueprint
 
     def save_map(self, map_data: dict) -> None:
         for placeable in self.objects_by_filter["All Instances"]:
-            placeable.save_to_json(map_data)
+            if placeable.prefab_owner is None:  # parts of a prefab instance are saved by the PrefabHelper
+                placeable.save_to_json(map_data)
 
         for deleted in self.deleted:
             deleted.save_to_json(map_data)
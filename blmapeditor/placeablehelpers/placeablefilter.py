@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from .. import placeables
+
+_MAX_JOURNAL_LENGTH: int = 4096
+
+
+class PlaceableFilter:
+    """
+    Insertion ordered set of Placeables, with O(1) add, remove and membership checks.
+    Placeables are compared by identity.
+    Every add and remove is journaled, so views built from this filter can be updated instead of rebuilt.
+    The optional observer gets called with (was added, placeable) on every add and remove after construction.
+    """
+
+    __slots__ = ("_items", "_journal", "_journal_start", "_observer", "_view", "version")
+
+    def __init__(
+        self,
+        items: Iterable[placeables.AbstractPlaceable] = (),
+        observer: Callable[[bool, placeables.AbstractPlaceable], None] | None = None,
+    ) -> None:
+        self._items: dict[placeables.AbstractPlaceable, None] = dict.fromkeys(items)
+        self._view: list[placeables.AbstractPlaceable] | None = None
+        self.version: int = 0  # increased on every change
+        self._journal: list[tuple[bool, placeables.AbstractPlaceable]] = []  # (was added, placeable) per version
+        self._journal_start: int = 0  # version before the first journal entry
+        self._observer = observer
+
+    def __contains__(self, placeable: object) -> bool:
+        return placeable in self._items
+
+    def __iter__(self) -> Iterator[placeables.AbstractPlaceable]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, placeable: placeables.AbstractPlaceable) -> None:
+        """Append the Placeable, does nothing if it already is part of this filter."""
+        if placeable not in self._items:
+            self._items[placeable] = None
+            self._view = None
+            self._record(True, placeable)
+
+    def update(self, items: Iterable[placeables.AbstractPlaceable]) -> None:
+        for placeable in items:
+            self.add(placeable)
+
+    def discard(self, placeable: placeables.AbstractPlaceable) -> None:
+        """Remove the Placeable if it is part of this filter."""
+        if self._items.pop(placeable, 0) is None:
+            self._view = None
+            self._record(False, placeable)
+
+    def difference_update(self, items: Iterable[placeables.AbstractPlaceable]) -> None:
+        for placeable in items:
+            self.discard(placeable)
+
+    def clear(self) -> None:
+        if self._observer is not None:
+            for placeable in self._items:
+                self._observer(False, placeable)
+        self._items.clear()
+        self._view = None
+        self._reset_journal()
+
+    def sort(self, key: Callable[[placeables.AbstractPlaceable], Any]) -> None:
+        self._items = dict.fromkeys(sorted(self._items, key=key))
+        self._view = None
+        self._reset_journal()
+
+    def changes_since(self, version: int) -> list[tuple[bool, placeables.AbstractPlaceable]] | None:
+        """
+        Get every add and remove since the given version, in order.
+
+        :param version:
+        :return: (was added, placeable) for each change, None if the changes are no longer known and a view has to be
+            rebuilt from scratch.
+        """
+        if version < self._journal_start:
+            return None
+        return self._journal[version - self._journal_start :]
+
+    def _record(self, b_added: bool, placeable: placeables.AbstractPlaceable) -> None:
+        if self._observer is not None:
+            self._observer(b_added, placeable)
+        self.version += 1
+        if len(self._journal) >= _MAX_JOURNAL_LENGTH:
+            self._reset_journal()
+            return
+        self._journal.append((b_added, placeable))
+
+    def _reset_journal(self) -> None:
+        """Forget all changes, views older than the current version have to be rebuilt."""
+        self.version += 1
+        self._journal.clear()
+        self._journal_start = self.version
+
+    def view(self) -> list[placeables.AbstractPlaceable]:
+        """
+        Get all Placeables in order. The returned list is shared until this filter changes, do not modify it.
+
+        :return:
+        """
+        if self._view is None:
+            self._view = list(self._items)
+        return self._view
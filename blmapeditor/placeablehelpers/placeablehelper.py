@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import contextlib
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
 from typing import TYPE_CHECKING, cast
 
 from coroutines import Time
@@ -9,8 +10,9 @@ from mods_base import ENGINE, get_pc
 from uemath import Vector
 from unrealsdk import make_struct
 
-from .. import placeables, prefabbuffer, settings
+from .. import placeables, prefabbuffer, scatter, scene, settings, streaming, tagquery
 from .. import selectedobject as sobj
+from .placeablefilter import PlaceableFilter
 
 if TYPE_CHECKING:
     from common import Object, WillowGameEngine, WillowPlayerController
@@ -22,26 +24,76 @@ else:
 
 
 class PlaceableHelper(ABC):
-    def __init__(self, name: str, supported_filters: list[str]) -> None:
+    # The filter that holds every instantiated object of this helper, its objects are registered in the scene
+    instances_filter: str = "All Instances"
+
+    def __init__(self, name: str, supported_filters: list[str], uclass: str) -> None:
         self.name: str = name
         self.available_filters: list[str] = supported_filters
-        self.objects_by_filter: dict[str, list[placeables.AbstractPlaceable]] = {f: [] for f in supported_filters}
+        self.objects_by_filter: dict[str, PlaceableFilter] = self._make_filters()
+        scene.register_helper(uclass, self)
         self.curr_filter: str = supported_filters[0]
         self.object_index: int = 0
         self.b_setup: bool = False
+        self._b_indexed: bool = False  # if setup indexed the objects of the current level since the last cleanup
         self.edited_default: dict = {}
         self.search_string: str = ""
+        self.tag_query: str = ""  # as entered by the user, may be invalid
+        self.tag_expression: tagquery.Expression | None = None  # the last valid tag_query
         self.deleted: list[placeables.AbstractPlaceable] = []
 
+        # Only needs to be set if the current filter, the search or the range changed. Adds and removes of the
+        # current filter are applied to the cached objects on their own.
         self.is_cache_dirty: bool = True
         self._cached_objects_for_filter: list[placeables.AbstractPlaceable] = []
         self._cached_names_for_filter: list[str] = []
+        self._cache_source: PlaceableFilter | None = None  # the filter our cache was built from
+        self._cache_version: int = 0  # version of that filter our cache is up-to-date with
+        self._labels: dict[placeables.AbstractPlaceable, str] = {}
+        placeables.AbstractPlaceable.rename_listeners.append(self._on_rename)
+        placeables.AbstractPlaceable.tag_listeners.append(self._on_tags_changed)
         self._object_renames: dict[str, str] = {}
         self._last_tick: float = Time.time
 
     def __str__(self) -> str:
         return self.name
 
+    def _make_filters(self) -> dict[str, PlaceableFilter]:
+        return {
+            f: PlaceableFilter(observer=scene.on_filter_change if f == self.instances_filter else None)
+            for f in self.available_filters
+        }
+
+    def add_instances(self, created: Iterable[placeables.AbstractPlaceable], b_edited: bool = True) -> None:
+        """
+        Add newly instantiated objects to our instances filter, and to the Edited filter if we have one.
+
+        :param created:
+        :param b_edited: False for objects that already were part of the map.
+        :return:
+        """
+        created = list(created)
+        if b_edited and "Edited" in self.objects_by_filter:
+            self.objects_by_filter["Edited"].update(created)
+        self.objects_by_filter[self.instances_filter].update(created)
+
+    def _remove_from_filters(self, removed: Iterable[placeables.AbstractPlaceable]) -> None:
+        """Remove destroyed objects from the filters of their helpers, e.g. the parts of a destroyed Prefab."""
+        for placeable in removed:
+            for _filter in scene.get_helper(placeable).objects_by_filter.values():
+                _filter.discard(placeable)
+
+    def _get_instances_by_path_name(self) -> dict[str, placeables.AbstractPlaceable]:
+        """
+        Index our instances by the lowercase path name of their component, to resolve map entries by their keys.
+        Entries without a matching instance are skipped before their attributes ever get decoded.
+        """
+        return {x.get_path_name().lower(): x for x in self.objects_by_filter[self.instances_filter]}
+
+    def _get_blueprints_by_path_name(self) -> dict[str, placeables.AbstractPlaceable]:
+        """Index the blueprints of our Create filter by the lowercase path name of the object they place."""
+        return {x.uobject_path_name.lower(): x for x in self.objects_by_filter["Create"]}
+
     def get_filter(self) -> str:
         return self.curr_filter
 
@@ -60,6 +112,7 @@ class PlaceableHelper(ABC):
             if mapname not in ("menumap", "none", ""):
                 self.setup(mapname)
                 self.b_setup = False
+                self._b_indexed = True
                 self.is_cache_dirty = True
 
     def on_disable(self) -> None:
@@ -105,12 +158,10 @@ class PlaceableHelper(ABC):
         if sobj.SELECTED_OBJECT:
             sobj.SELECTED_OBJECT.restore_default_values(self.edited_default)
             if not sobj.SELECTED_OBJECT.b_dynamically_created:
-                self.objects_by_filter["Edited"].pop(self.objects_by_filter["Edited"].index(sobj.SELECTED_OBJECT))
+                self.objects_by_filter["Edited"].discard(sobj.SELECTED_OBJECT)
                 self.object_index %= len(self._cached_objects_for_filter)
             sobj.SELECTED_OBJECT = None
 
-        self.is_cache_dirty = True
-
     def move_object(self) -> None:
         """
         Start/Stop moving the object.
@@ -119,20 +170,18 @@ class PlaceableHelper(ABC):
         """
         if sobj.SELECTED_OBJECT:
             sobj.SELECTED_OBJECT = None  # stop editing this object, will stay in position
+            if settings.editor_filter_range != 0:  # it may have left or entered the range, no filter changed though
+                self.is_cache_dirty = True
         elif self.curr_filter != "Create":
             sobj.SELECTED_OBJECT = self._cached_objects_for_filter[self.object_index]
             # add the default values to the default dict to revert changes if needed
             sobj.SELECTED_OBJECT.store_default_values(self.edited_default)
-            if sobj.SELECTED_OBJECT not in self.objects_by_filter["Edited"]:
-                self.objects_by_filter["Edited"].append(sobj.SELECTED_OBJECT)
+            self.objects_by_filter["Edited"].add(sobj.SELECTED_OBJECT)
         elif self.curr_filter == "Create":
             # create a new instance from our Blueprint object
             new_instance, created = self._cached_objects_for_filter[self.object_index].instantiate()
-            for _o in created:
-                self.objects_by_filter["Edited"].append(_o)
-                self.objects_by_filter["All Instances"].append(_o)
+            self.add_instances(created)
             sobj.SELECTED_OBJECT = new_instance  # let's start editing this new object
-        self.is_cache_dirty = True
 
     def cancel_editing(self) -> None:
         if sobj.SELECTED_OBJECT:
@@ -151,18 +200,13 @@ class PlaceableHelper(ABC):
             self.deleted.append(to_delete)
         try:
             to_remove: list[placeables.AbstractPlaceable] = to_delete.destroy()
-            for remove_me in to_remove:
-                for _list in self.objects_by_filter.values():
-                    with contextlib.suppress(ValueError):
-                        _list.pop(_list.index(remove_me))
+            self._remove_from_filters(to_remove)
             if sobj.SELECTED_OBJECT is not None:  # if we deleted the selected object, we need to deselect it
                 sobj.SELECTED_OBJECT = None
             if self.curr_filter not in ("Create", "Prefabs Blueprints"):  # In create mode we can stay at our index
                 self.object_index = -1
         except ValueError:
             pass
-        finally:
-            self.is_cache_dirty = True
 
     def copy(self) -> None:
         if sobj.SELECTED_OBJECT:
@@ -172,7 +216,6 @@ class PlaceableHelper(ABC):
                 sobj.CLIPBOARD = self._cached_objects_for_filter[self.object_index]
             except IndexError:
                 self.object_index = -1
-                self.is_cache_dirty = True
                 return
         sobj.CLIPBOARD_HELPER = self
 
@@ -186,41 +229,180 @@ class PlaceableHelper(ABC):
             pasted.set_materials(sobj.CLIPBOARD.get_materials())
             pasted.set_location(sobj.CLIPBOARD.get_location())
             pasted.b_dynamically_created = True
-            self.objects_by_filter["Edited"].extend(created)
-            self.objects_by_filter["All Instances"].extend(created)
+            self.add_instances(created)
             if not sobj.SELECTED_OBJECT:
                 sobj.SELECTED_OBJECT = pasted
-        self.is_cache_dirty = True
+
+    def place_copies(
+        self,
+        source: placeables.AbstractPlaceable,
+        placements: Sequence[scatter.Placement],
+    ) -> list[placeables.AbstractPlaceable]:
+        """
+        Place one copy of the source object for every placement, relative to the sources location and rotation.
+        The pattern is turned by the sources yaw, so copies facing the center of a radial pattern keep facing it.
+        All copies are spawned in a single batch.
+
+        :param source: An instantiated object, scale, scale3d and materials are copied from it.
+        :param placements: As generated by the scatter module.
+        :return: The new copies, pass them to remove_copies to undo this.
+        """
+        location = Vector(source.get_location())
+        pitch, yaw, roll = source.get_rotation()
+        scale, scale3d, materials = source.get_scale(), source.get_scale3d(), source.get_materials()
+
+        copies: list[placeables.AbstractPlaceable] = []
+        created: list[placeables.AbstractPlaceable] = []
+        for (copy, new), (offset, added_yaw) in zip(
+            source.instantiate_copies(len(placements)),
+            placements,
+            strict=True,
+        ):
+            copy.set_transform(
+                (location + Vector(scatter.rotate(offset, yaw))).to_tuple(),
+                (pitch, yaw + added_yaw, roll),
+                scale,
+                scale3d,
+            )
+            if materials:
+                copy.set_materials(materials)
+            copy.b_dynamically_created = True
+            copies.append(copy)
+            created.extend(new)
+        self._add_copies_to_filters(copies, created)
+        return copies
+
+    def _add_copies_to_filters(
+        self,
+        copies: list[placeables.AbstractPlaceable],  # noqa: ARG002
+        created: list[placeables.AbstractPlaceable],
+    ) -> None:
+        self.add_instances(created)
+
+    def remove_copies(self, copies: list[placeables.AbstractPlaceable]) -> list[placeables.AbstractPlaceable]:
+        """
+        Destroy dynamically created objects, e.g. the ones placed by place_copies.
+
+        :param copies:
+        :return: All objects that got removed from our filters.
+        """
+        removed: list[placeables.AbstractPlaceable] = []
+        for copy in copies:
+            if not copy.is_destroyed and not copy.is_stale():
+                removed.extend(copy.destroy())
+        self._remove_from_filters(removed)
+        if sobj.SELECTED_OBJECT is not None and sobj.SELECTED_OBJECT.is_destroyed:
+            sobj.SELECTED_OBJECT = None
+        return removed
+
+    def restore_defaults(self, edited: list[placeables.AbstractPlaceable]) -> None:
+        """
+        Restore edited objects of the level to the state they were in before their first edit.
+
+        :param edited: Objects whose default values were stored in our edited_default.
+        :return:
+        """
+        for placeable in edited:
+            if placeable.is_destroyed:
+                continue
+            placeable.restore_default_values(self.edited_default)
+            placeable.rename = ""
+            placeable.tags = []
+            placeable.metadata = ""
+            self.objects_by_filter["Edited"].discard(placeable)
+        if sobj.SELECTED_OBJECT is not None and sobj.SELECTED_OBJECT in edited:
+            sobj.SELECTED_OBJECT = None
 
     def update_preview(self) -> None:
         if settings.b_show_preview:
-            sobj.set_preview(self._cached_objects_for_filter[self.object_index].get_preview())
+            if selected := self.get_selected_object():
+                sobj.request_preview(selected)  # debounced, scrolling through the list won't spawn every object
         else:
             sobj.destroy_preview()
 
-    def _update_caches(self) -> None:
+    def _label(self, placeable: placeables.AbstractPlaceable) -> str:
+        """Get the list label of the given object, labels only get created once and stay unique while it's alive."""
+        try:
+            return self._labels[placeable]
+        except KeyError:
+            label = self._labels[placeable] = (
+                f"{placeable.rename if placeable.rename else placeable.name}##{id(placeable)}"
+            )
+            return label
+
+    def _on_rename(self, placeable: placeables.AbstractPlaceable) -> None:
+        if placeable not in self._labels:
+            return
+        del self._labels[placeable]
+        if self.search_string:  # the object may now match the search, or no longer
+            self.is_cache_dirty = True
+            return
+        with contextlib.suppress(ValueError):
+            self._cached_names_for_filter[self._cached_objects_for_filter.index(placeable)] = self._label(placeable)
+
+    def _on_tags_changed(self, _placeable: placeables.AbstractPlaceable) -> None:
+        if self.tag_expression is not None:
+            self.is_cache_dirty = True
+
+    def set_tag_query(self, tag_query: str) -> None:
+        """
+        Only list objects whose tags match the boolean tag expression, e.g. 'cover and not (red or blue)'.
+
+        :param tag_query: An empty query lists all objects.
+        :return:
+        :raises ValueError: If the query is no valid tag expression, the previous expression stays active.
+        """
+        self.tag_query = tag_query
+        self.tag_expression = tagquery.parse(tag_query)
+        self.is_cache_dirty = True
+
+    def _get_pc_location(self) -> tuple[float, float, float]:
         pc = get_pc()
-        pc_loc: tuple[float, float, float] = (pc.Location.X, pc.Location.Y, pc.Location.Z)
+        return pc.Location.X, pc.Location.Y, pc.Location.Z
+
+    def _matches(
+        self,
+        placeable: placeables.AbstractPlaceable,
+        search_string: str,
+        pc_loc: tuple[float, float, float],
+    ) -> bool:
+        """Check if the given object passes the lowered search string, the tag expression and the range filter."""
+        if search_string and search_string not in (placeable.rename if placeable.rename else placeable.name).lower():
+            return False
+        if self.tag_expression is not None and not self.tag_expression.matches(placeable.tags):
+            return False
+        if settings.editor_filter_range != 0:
+            return sum((a - b) * (a - b) for a, b in zip(placeable.get_location(), pc_loc, strict=False)) < (
+                settings.editor_filter_range * 50
+            ) * (settings.editor_filter_range * 50)
+        return True
 
-        search_string = self.search_string.lower()
-        to_filter = self.objects_by_filter.get(self.curr_filter, [])
-        if search_string:
-            to_filter = [x for x in to_filter if search_string in (x.rename if x.rename else x.name).lower()]
+    def _update_caches(self) -> None:
+        pc_loc = self._get_pc_location()
+        source = self.objects_by_filter[self.curr_filter]
+
+        to_filter = source.view()
         if settings.editor_filter_range != 0:
-            to_filter = [
-                x
-                for x in to_filter
-                if sum((a - b) * (a - b) for a, b in zip(x.get_location(), pc_loc, strict=False))
-                < (settings.editor_filter_range * 50) * (settings.editor_filter_range * 50)
-            ]
+            # Narrow down the instances using the spatial index of the scene, before checking objects one by one
+            nearby = dict.fromkeys(scene.query(center=pc_loc, radius=settings.editor_filter_range * 50))
+            to_filter = [x for x in to_filter if x in nearby or not scene.is_registered(x)]
+        if self.tag_expression is not None:
+            tagged = set(scene.query(tags=self.tag_expression))
+            to_filter = [x for x in to_filter if x in tagged or not scene.is_registered(x)]
+        if self.search_string or settings.editor_filter_range != 0 or self.tag_expression is not None:
+            search_string = self.search_string.lower()
+            to_filter = [x for x in to_filter if self._matches(x, search_string, pc_loc)]
         if settings.sort_by_distance:
-            to_filter.sort(key=lambda x: sum([(a - b) ** 2 for a, b in zip(x.get_location(), pc_loc, strict=False)]))
+            to_filter = sorted(
+                to_filter,
+                key=lambda x: sum([(a - b) ** 2 for a, b in zip(x.get_location(), pc_loc, strict=False)]),
+            )
 
-        self._cached_objects_for_filter = to_filter
+        self._cached_objects_for_filter = list(to_filter)
         # The respective names for the object list from above
-        self._cached_names_for_filter = [
-            f"{x.rename if x.rename else x.name}##{i}" for i, x in enumerate(self._cached_objects_for_filter)
-        ]
+        self._cached_names_for_filter = [self._label(x) for x in self._cached_objects_for_filter]
+        self._cache_source = source
+        self._cache_version = source.version
 
         self.is_cache_dirty = False  # We are up-to-date now
         try:
@@ -228,24 +410,126 @@ class PlaceableHelper(ABC):
         except IndexError:
             self.object_index = -1
 
+    def _sync_caches(self) -> None:
+        """Apply all adds and removes of the current filter to the cached objects, rebuild them only if needed."""
+        source = self.objects_by_filter[self.curr_filter]
+        if self.is_cache_dirty or source is not self._cache_source:
+            self._update_caches()
+            return
+        if source.version == self._cache_version:
+            return
+        changes = source.changes_since(self._cache_version)
+        if changes is None or settings.sort_by_distance:
+            self._update_caches()
+            return
+
+        selected = self.get_selected_object() if self.object_index >= 0 else None
+        touched = dict.fromkeys(placeable for _, placeable in changes)
+        if any(x in touched for x in self._cached_objects_for_filter):
+            self._cached_objects_for_filter = [x for x in self._cached_objects_for_filter if x not in touched]
+            self._cached_names_for_filter = [self._label(x) for x in self._cached_objects_for_filter]
+        pc_loc = self._get_pc_location()
+        search_string = self.search_string.lower()
+        for placeable in touched:
+            if placeable in source and self._matches(placeable, search_string, pc_loc):
+                self._cached_objects_for_filter.append(placeable)
+                self._cached_names_for_filter.append(self._label(placeable))
+        for placeable in touched:
+            if placeable.is_destroyed:
+                self._labels.pop(placeable, None)
+        self._cache_version = source.version
+
+        if selected is not None:  # keep the selection on the same object
+            try:
+                self.object_index = self._cached_objects_for_filter.index(selected)
+            except ValueError:
+                self.object_index = -1
+        elif self.object_index >= len(self._cached_objects_for_filter):
+            self.object_index = -1
+
     def get_names_for_filter(self) -> list[str]:
-        if self.is_cache_dirty or settings.sort_by_distance:  # Update the cached objects and names
-            if settings.sort_by_distance and self.curr_filter not in ("Create", "Prefabs Blueprints"):
-                # check if at least 2 second have passed since the last update
-                if Time.time - self._last_tick < 2:
-                    self.is_cache_dirty = False
-                    return self._cached_names_for_filter
+        if settings.sort_by_distance and self.curr_filter not in ("Create", "Prefabs Blueprints"):
+            # check if at least 2 second have passed since the last update
+            if Time.time - self._last_tick >= 2:
                 self._last_tick = Time.time
-            self._update_caches()
+                self.is_cache_dirty = True
+            elif not self.is_cache_dirty:
+                return self._cached_names_for_filter
+        self._sync_caches()
         return self._cached_names_for_filter
 
     def cleanup(self, _mapname: str) -> None:
         """Do cleanup, called on every Map Load start."""
         self.object_index = 0
-        self.objects_by_filter = {f: [] for f in self.available_filters}
+        self.objects_by_filter[self.instances_filter].clear()  # unregisters our instances from the scene
+        self.objects_by_filter = self._make_filters()
+        self._b_indexed = False
+        self._labels.clear()
         self.is_cache_dirty = True
         self.search_string = ""
 
+    def drop_stale_objects(self) -> list[placeables.AbstractPlaceable]:
+        """
+        Forget the objects whose in-game object is gone, e.g. killed pawns, without a full cleanup and setup.
+
+        :return: The forgotten objects.
+        """
+        stale = [x for x in self.objects_by_filter[self.instances_filter] if x.is_stale()]
+        if stale:
+            self._remove_from_filters(stale)
+            for placeable in stale:
+                self._labels.pop(placeable, None)
+        return stale
+
+    def _is_indexed(self) -> bool:
+        """If the objects of the current level are indexed, until then setup picks up every visible sub-level anyway."""
+        return self._b_indexed and not self.b_setup
+
+    def _holds_level_objects(self, level_name: str) -> bool:
+        """If we already hold objects of a sub-level, e.g. because it was visible on setup."""
+        return any(
+            streaming.is_in_level(x.get_path_name(), level_name) for x in self.objects_by_filter[self.instances_filter]
+        )
+
+    def on_level_streamed_in(self, _level_name: str) -> None:
+        """
+        Add our objects of a sub-level that just got streamed in, without a full cleanup and setup.
+        Helpers that only hold objects placed by the editor have nothing to add.
+
+        :param _level_name: The lowercase package name of the sub-level.
+        :return:
+        """
+        self.is_cache_dirty = True
+
+    def on_level_streamed_out(self, level_name: str, stash: dict) -> list[placeables.AbstractPlaceable]:
+        """
+        Forget our objects of a sub-level that is about to be streamed out. Their map changes are saved into the stash
+        first, so saving the map keeps them and they are applied again once the sub-level streams back in.
+
+        :param level_name: The lowercase package name of the sub-level.
+        :param stash: The map data of a level, as filled by save_map.
+        :return: The forgotten objects.
+        """
+        if not self._is_indexed():
+            return []
+        leaving = [
+            x
+            for x in self.objects_by_filter[self.instances_filter]
+            if streaming.is_in_level(x.get_path_name(), level_name)
+        ]
+        deleted = [
+            x
+            for x in self.deleted
+            if not x.b_dynamically_created and streaming.is_in_level(x.get_path_name(), level_name)
+        ]
+        for placeable in (*leaving, *deleted):
+            if placeable.prefab_owner is None:  # parts of a prefab instance are saved by the PrefabHelper
+                placeable.save_to_json(stash)
+        self._remove_from_filters(leaving)
+        if deleted:
+            self.deleted = [x for x in self.deleted if x not in deleted]
+        return [*leaving, *deleted]
+
     @abstractmethod
     def setup(self, mapname: str) -> None:
         """
@@ -260,6 +544,7 @@ class PlaceableHelper(ABC):
     def load_map(self, map_data: dict) -> None:
         """
         Apply any settings from the given map data.
+        Attributes may be decoded lazily, only access the attributes of entries that resolved to an object.
 
         :param map_data:
         :return:
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, cast
 
-from mods_base import ENGINE, get_pc
+from mods_base import get_pc
 from unrealsdk import construct_object, find_all, find_class, find_enum, find_object, make_struct, unreal
 
+from .. import handles, pathnames
 from .placeable import AbstractPlaceable
 
 if TYPE_CHECKING:
@@ -167,9 +168,19 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
     ) -> None:
         super().__init__(name, "InteractiveObjectDefinition")
         self.io_definition: InteractiveObjectDefinition | BaseBalanceDefinition = iobject_definition
-        self.iobject: WillowInteractiveObject | None = iobject
+        self._iobject: handles.Handle = handles.Handle(iobject)
         self.io_name: str = ""
-        self.uobject_path_name: str = self.io_definition._path_name()
+        self.uobject_path_name: str = pathnames.path_name(self.io_definition)
+
+    @property
+    def iobject(self) -> WillowInteractiveObject | None:
+        return cast("WillowInteractiveObject | None", self._iobject.get())
+
+    def get_component(self) -> WillowInteractiveObject | None:
+        return self.iobject
+
+    def is_stale(self) -> bool:
+        return self._iobject.is_stale()
 
     def get_materials(self) -> list[MaterialInterface]:
         if self.iobject and self.iobject.ObjectMesh:
@@ -180,6 +191,7 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
         # because chests and some other IO generate Materials on spawning them, its very likely that the exported
         # list of materials wont work, just to be safe, ignore all kind of materials for InteractiveObjects
         # untill i find a better fix
+        self.invalidate_material_path_names()
         return
         if self.iobject and self.iobject.ObjectMesh and materials:
             self.iobject.ObjectMesh.Materials = materials
@@ -254,6 +266,7 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
         self.iobject.Location.Z = z
         self.b_default_attributes = False
         self.iobject.ForceUpdateComponents()
+        self.notify_moved()
 
     def get_location(self) -> list[float]:
         if not self.iobject:
@@ -349,7 +362,7 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
             raise ValueError("Cannot destroy not instantiated Object!")
 
         if not self.b_dynamically_created:
-            self.io_name = ENGINE.PathName(self.iobject)
+            self.io_name = self.get_path_name()
         self.iobject.Destroyed()
         self.set_location((-9999999, -9999999, -9999999))
         self.set_scale(0)
@@ -357,18 +370,18 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
         return [self]
 
     def store_default_values(self, default_dict: dict) -> None:
-        if self.iobject and ENGINE.PathName(self.iobject) not in default_dict:
-            default_dict[ENGINE.PathName(self.iobject)] = {
+        if self.iobject and self.get_path_name() not in default_dict:
+            default_dict[self.get_path_name()] = {
                 "Location": list(self.get_location()),
                 "Rotation": list(self.get_rotation()),
                 "Scale": self.get_scale(),
                 "Scale3D": self.get_scale3d(),
-                "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                "Materials": self.get_material_path_names().copy(),
             }
 
     def restore_default_values(self, default_dict: dict) -> None:
-        if self.iobject and ENGINE.PathName(self.iobject) in default_dict:
-            defaults = default_dict[ENGINE.PathName(self.iobject)]
+        if self.iobject and self.get_path_name() in default_dict:
+            defaults = default_dict[self.get_path_name()]
             self.set_scale(defaults["Scale"])
             self.set_location(defaults["Location"])
             self.set_rotation(defaults["Rotation"])
@@ -384,7 +397,7 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
 
         if not self.b_dynamically_created and not self.b_default_attributes and not self.is_destroyed:
             smc_list = saved_json.setdefault("Edit", {}).setdefault("InteractiveObjectDefinition", {})
-            smc_list[ENGINE.PathName(self.iobject)] = {
+            smc_list[self.get_path_name()] = {
                 "Rename": self.rename,
                 "Tags": cleaned_tags,
                 "Metadata": self.metadata,
@@ -392,7 +405,7 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
                 "Rotation": self.get_rotation(),
                 "Scale": self.get_scale(),
                 "Scale3D": self.get_scale3d(),
-                "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                "Materials": self.get_material_path_names().copy(),
             }
         elif not self.b_dynamically_created and self.is_destroyed:
             smc_list = saved_json.setdefault("Destroy", {}).setdefault("InteractiveObjectDefinition", [])
@@ -410,7 +423,7 @@ class InteractiveObjectPlaceable(AbstractPlaceable):
                         "Rotation": self.get_rotation(),
                         "Scale": self.get_scale(),
                         "Scale3D": self.get_scale3d(),
-                        "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                        "Materials": self.get_material_path_names().copy(),
                     },
                 },
             )
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, cast
 
-from mods_base import ENGINE, get_pc
+from mods_base import get_pc
 from unrealsdk import find_all, make_struct, unreal
 
+from .. import handles, pathnames
 from .placeable import AbstractPlaceable
 
 if TYPE_CHECKING:
@@ -31,8 +32,18 @@ class AIPawnPlaceable(AbstractPlaceable):
     def __init__(self, name: str, ai_pawn_balance: AIPawnBalanceDefinition, ai_pawn: WillowPawn | None = None) -> None:
         super().__init__(name, "AIPawnBalanceDefinition")
         self.ai_pawn_balance: AIPawnBalanceDefinition = ai_pawn_balance
-        self.ai_pawn: WillowPawn | None = ai_pawn
-        self.uobject_path_name: str = ENGINE.PathName(self.ai_pawn_balance)
+        self._ai_pawn: handles.Handle = handles.Handle(ai_pawn)
+        self.uobject_path_name: str = pathnames.path_name(self.ai_pawn_balance)
+
+    @property
+    def ai_pawn(self) -> WillowPawn | None:
+        return cast("WillowPawn | None", self._ai_pawn.get())
+
+    def get_component(self) -> WillowPawn | None:
+        return self.ai_pawn
+
+    def is_stale(self) -> bool:
+        return self._ai_pawn.is_stale()
 
     def get_materials(self) -> list[MaterialInterface]:
         if self.ai_pawn and self.ai_pawn.Mesh:
@@ -40,6 +51,7 @@ class AIPawnPlaceable(AbstractPlaceable):
         return []
 
     def set_materials(self, materials: list[MaterialInterface]) -> None:
+        self.invalidate_material_path_names()
         if self.ai_pawn and self.ai_pawn.Mesh and materials is not None:
             self.ai_pawn.Mesh.Materials = materials
 
@@ -106,6 +118,7 @@ class AIPawnPlaceable(AbstractPlaceable):
         self.ai_pawn.Location.X = x
         self.ai_pawn.Location.Y = y
         self.ai_pawn.Location.Z = z
+        self.notify_moved()
 
     def get_location(self) -> list[float]:
         if not self.ai_pawn:
@@ -204,7 +217,7 @@ class AIPawnPlaceable(AbstractPlaceable):
                     "Rotation": self.get_rotation(),
                     "Scale": self.get_scale(),
                     "Scale3D": self.get_scale3d(),
-                    "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                    "Materials": self.get_material_path_names().copy(),
                 },
             },
         )
@@ -2,31 +2,118 @@ from __future__ import annotations
 
 import contextlib
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from collections.abc import Callable
+from typing import TYPE_CHECKING, ClassVar
 
 from unrealsdk import unreal
 
+from .. import pathnames
+
 if TYPE_CHECKING:
     from common import MaterialInterface, Object
 
 
 class AbstractPlaceable(ABC):
+    b_reusable_preview: bool = False  # True if reuse_preview can turn a preview into one of another object
+    # Called with the renamed Placeable whenever any Placeable gets renamed
+    rename_listeners: ClassVar[list[Callable[[AbstractPlaceable], None]]] = []
+    # Called with the moved Placeable whenever the location of any Placeable changes
+    move_listeners: ClassVar[list[Callable[[AbstractPlaceable], None]]] = []
+    # Called with the changed Placeable whenever a tag of any Placeable gets added or removed
+    tag_listeners: ClassVar[list[Callable[[AbstractPlaceable], None]]] = []
+
     def __init__(self, name: str, uclass: str) -> None:
         self.uobject_path_name: str = ""
         self.name: str = name
-        self.rename: str = ""
+        self._rename: str = ""
         self.metadata: str = ""
-        self.tags: list[str] = []
+        self._tags: list[str] = []
         self.uclass: str = uclass
         self.b_dynamically_created: bool = False
         self.b_default_attributes: bool = True
         self.is_destroyed: bool = False
+        self.prefab_owner: AbstractPlaceable | None = None  # the Prefab instance this object is a part of
 
         self._material_window_open: bool = False
+        self._path_name: str | None = None  # path name of our component, resolved on first use
+        self._material_path_names: list[str] | None = None  # invalidated whenever our materials change
 
     def __str__(self) -> str:
         return f"{self.rename if self.rename else self.name} ({self.uclass})"
 
+    @property
+    def rename(self) -> str:
+        """The user given name of this object, empty if it was not renamed."""
+        return self._rename
+
+    @rename.setter
+    def rename(self, rename: str) -> None:
+        if rename == self._rename:
+            return
+        self._rename = rename
+        for listener in AbstractPlaceable.rename_listeners:
+            listener(self)
+
+    @property
+    def tags(self) -> list[str]:
+        """The tags of this object, do not modify the list itself, use add_tag, remove_tag or assign a new list."""
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags: list[str]) -> None:
+        self._tags = list(tags)
+        self._notify_tags_changed()
+
+    def add_tag(self, tag: str) -> None:
+        if tag not in self._tags:
+            self._tags.append(tag)
+            self._notify_tags_changed()
+
+    def remove_tag(self, tag: str) -> None:
+        if tag in self._tags:
+            self._tags.remove(tag)
+            self._notify_tags_changed()
+
+    def _notify_tags_changed(self) -> None:
+        for listener in AbstractPlaceable.tag_listeners:
+            listener(self)
+
+    def get_component(self) -> unreal.UObject | None:
+        """Get the in-game object this Placeable is editing, None if this is only a Blueprint."""
+        return None
+
+    def is_stale(self) -> bool:
+        """If this Placeable was instantiated but its in-game object is gone, e.g. garbage collected or streamed out."""
+        return False
+
+    def get_path_name(self) -> str:
+        """
+        Get the path name of this objects in-game component, resolved only once.
+
+        :return: The components path name, an empty string if this Placeable is not instantiated.
+        """
+        if self._path_name is None:
+            component = self.get_component()
+            if component is None:
+                return ""
+            self._path_name = pathnames.path_name(component)
+        return self._path_name
+
+    def get_material_path_names(self) -> list[str]:
+        """Get the path names of all materials this object uses, cached until the materials change."""
+        if self._material_path_names is None:
+            self._material_path_names = [pathnames.path_name(x) for x in self.get_materials()]
+        return self._material_path_names
+
+    def invalidate_material_path_names(self) -> None:
+        """Needs to be called by every set_materials implementation."""
+        self._material_path_names = None
+
+    def notify_moved(self) -> None:
+        """Needs to be called by every set_location implementation."""
+        for listener in AbstractPlaceable.move_listeners:
+            listener(self)
+
     @abstractmethod
     def get_materials(self) -> list[MaterialInterface]:
         """Get the list of MaterialInstanceConstants this object uses."""
@@ -157,6 +244,28 @@ class AbstractPlaceable(ABC):
         """
         pass
 
+    def instantiate_copies(self, count: int) -> list[tuple[AbstractPlaceable, list[AbstractPlaceable]]]:
+        """
+        Instantiate this object multiple times, subclasses that can spawn in batches should override this.
+
+        :param count:
+        :return: One result of instantiate for each copy.
+        """
+        return [self.instantiate() for _ in range(count)]
+
+    def set_transform(
+        self,
+        location: list[float] | tuple[float, float, float],
+        rotation: list[int] | tuple[int, int, int],
+        scale: float,
+        scale3d: list[float] | tuple[float, float, float],
+    ) -> None:
+        """Set location, rotation, scale and scale3d at once."""
+        self.set_scale(scale)
+        self.set_scale3d(list(scale3d))
+        self.set_rotation(rotation)
+        self.set_location(location)
+
     @abstractmethod
     def get_preview(self) -> AbstractPlaceable:
         """
@@ -167,6 +276,16 @@ class AbstractPlaceable(ABC):
         """
         pass
 
+    def reuse_preview(self, preview: AbstractPlaceable) -> bool:  # noqa: ARG002
+        """
+        Turn an existing preview of the same Placeable type into a preview of this object, instead of spawning a new
+        one using get_preview.
+
+        :param preview: A preview previously returned by get_preview.
+        :return: True if the preview now shows this object, else False.
+        """
+        return False
+
     @abstractmethod
     def set_preview_location(self, location: tuple[float, float, float]) -> None:
         """
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import json
-import os
-import pathlib
-from dataclasses import dataclass
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, cast
 
 from uemath import Rotator, Vector
 from unrealsdk import find_object, make_struct, unreal
 
+from .. import prefablibrary
 from .interactiveobject import InteractiveObjectPlaceable
 from .pawn import AIPawnPlaceable
 from .placeable import AbstractPlaceable
@@ -22,19 +22,37 @@ else:
     make_vector = make_struct
 
 
+@dataclass(frozen=True)
+class Transform:
+    """The root transform of a Prefab instance."""
+
+    location: Sequence[float]
+    rotation: Sequence[int]
+    scale: float
+    scale3d: Sequence[float]
+
+
 class Prefab(AbstractPlaceable):
+    b_reusable_preview: bool = True
+
     @dataclass()
     class ComponentData:
-        data: AbstractPlaceable
+        data: AbstractPlaceable | None  # None for group nodes and parts whose object could not be found
         offset: list
         rotation: list
         scale: float
         scale3d: list
         move_offset: list  # needs to be recalculated after rotation and scale
+        parent: int = -1  # index of the parent group in component_data, -1 if the parent is the prefab itself
+        name: str = ""  # name of the nested prefab or the path name of a missing part, only set if data is None
+        b_group: bool = False  # group nodes are the root of a nested prefab
+        spawn_materials: list = field(default_factory=list)  # materials right after spawning, to detect overrides
 
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, blueprint_parts: prefablibrary.BlueprintParts | None = None) -> None:
         super().__init__(name, "Prefab")
         self.component_data: list[Prefab.ComponentData] = []
+        # Parts of a blueprint loaded from disk, their UObjects only get looked up once the blueprint gets used
+        self._blueprint_parts: prefablibrary.BlueprintParts | None = blueprint_parts
         self._location: list[float] = [0, 0, 0]
         self._rotation: list[int] = [0, 0, 0]
         self._scale: float = 1.0
@@ -44,17 +62,24 @@ class Prefab(AbstractPlaceable):
     def create_prefab_blueprint(placeables: list[AbstractPlaceable], name: str) -> Prefab:
         """
         Create a Prefab Blueprint from existing AbstractPlaceable in the map.
+        Prefab instances become nested prefabs, parts of a prefab that is itself in the list don't get added twice.
         :param name:
         :param placeables: List of Instantiated Placeables.
         :return: Returns a Prefab Blueprint
         """
         blueprint = Prefab(name)
+        members = {id(x) for x in placeables}
         for placeable in placeables:
+            if id(placeable.prefab_owner) in members:
+                continue
+            if isinstance(placeable, Prefab):
+                blueprint._append_nested_prefab(placeable)
+                continue
             # Component Data holds the initial 'Blueprint' data of this Prefab
             blueprint.component_data.append(
                 Prefab.ComponentData(
                     data=placeable,  # The Placeable itself
-                    offset=[0, 0, 0],  # This will be calculated later
+                    offset=placeable.get_location(),  # The world location, turned into an offset later
                     rotation=placeable.get_rotation(),  # The initial rotation
                     scale=placeable.get_scale(),  # The initial scale
                     scale3d=placeable.get_scale3d(),  # The initial scale3d
@@ -66,6 +91,37 @@ class Prefab(AbstractPlaceable):
         blueprint._write_prefab_json()  # Write the blueprint to a json file
         return blueprint
 
+    def _append_nested_prefab(self, prefab: Prefab) -> None:
+        """Append a group node for the given prefab, directly followed by copies of all of its parts."""
+        group_index = len(self.component_data)
+        self.component_data.append(
+            Prefab.ComponentData(
+                data=None,
+                offset=list(prefab.get_location()),  # The world location, turned into an offset later
+                rotation=prefab.get_rotation(),
+                scale=prefab.get_scale(),
+                scale3d=prefab.get_scale3d(),
+                move_offset=[0, 0, 0],
+                name=prefab.name,
+                b_group=True,
+            ),
+        )
+        # The parts of the nested prefab already are relative to their parent, only their indices move
+        for component in prefab.component_data:
+            self.component_data.append(
+                Prefab.ComponentData(
+                    data=component.data,
+                    offset=component.offset.copy(),
+                    rotation=component.rotation.copy(),
+                    scale=component.scale,
+                    scale3d=component.scale3d.copy(),
+                    move_offset=component.move_offset.copy(),
+                    parent=group_index if component.parent < 0 else group_index + 1 + component.parent,
+                    name=component.name,
+                    b_group=component.b_group,
+                ),
+            )
+
     @staticmethod
     def load_prefab_json(name: str) -> Prefab | None:
         """
@@ -73,62 +129,54 @@ class Prefab(AbstractPlaceable):
         :param name:
         :return:
         """
-        path = pathlib.Path(__file__).parent.parent / "Prefabs" / f"prefab_{name}.json"
-        if not os.path.isfile(path):
+        parts = prefablibrary.get_blueprint_parts(name)
+        if parts is None:
             print(f"No prefab with the name {name} exists!")
             return None
+        return Prefab(name, parts)
 
-        blueprint = Prefab(name)
-        with open(path) as fp:
-            bp = json.load(fp)
-        for part in bp:
-            for uobj_name, attrs in part.items():
-                uobj = find_object("Object", uobj_name)
-                if uobj is None:
-                    continue
-                if uobj.Class.Name == "StaticMesh":
-                    new = StaticMeshComponentPlaceable(uobj_name.split(".", 1)[-1], cast("StaticMesh", uobj))
-                elif uobj.Class.Name in (
-                    "WillowInteractiveObject",
-                    "WillowVendingMachine",
-                    "WillowVendingMachineBlackMarket",
-                    "InteractiveObjectBalanceDefinition",
-                    "InteractiveObjectDefinition",
-                ):
-                    new = InteractiveObjectPlaceable(
-                        uobj_name.split(".", 1)[-1],
-                        cast("InteractiveObjectDefinition", uobj),
-                    )
-                elif uobj.Class.Name == "AIPawnBalanceDefinition":
-                    new = AIPawnPlaceable(uobj_name.split(".", 1)[-1], cast("AIPawnBalanceDefinition", uobj))
-                else:
-                    continue
-                blueprint.component_data.append(
-                    Prefab.ComponentData(
-                        data=new,
-                        offset=attrs["Offset"],
-                        rotation=attrs["Rotation"],
-                        scale=attrs["Scale"],
-                        scale3d=attrs["Scale3D"],
-                        move_offset=attrs.get("MoveOffset", [0, 0, 0]),
-                    ),
-                )
-        return blueprint
+    def _resolve_blueprint_parts(self) -> None:
+        """
+        Find the UObjects of all parts of a blueprint loaded from disk.
+        Parts that don't exist stay in place without data, so every part keeps the index it has in the file.
+        """
+        if self._blueprint_parts is None:
+            return
+        parts, self._blueprint_parts = self._blueprint_parts, None
+        for uobj_name, attrs in parts:
+            b_group = attrs.get("Group", False)
+            new = None if b_group else _placeable_from_path(uobj_name)
+            # the parts are shared by every blueprint created from the same file, never hand out their lists
+            self.component_data.append(
+                Prefab.ComponentData(
+                    data=new,
+                    offset=list(attrs["Offset"]),
+                    rotation=list(attrs["Rotation"]),
+                    scale=attrs["Scale"],
+                    scale3d=list(attrs["Scale3D"]),
+                    move_offset=list(attrs.get("MoveOffset", [0, 0, 0])),
+                    parent=attrs.get("Parent", -1),
+                    name=uobj_name if new is None else "",
+                    b_group=b_group,
+                ),
+            )
 
     def _write_prefab_json(self) -> None:
         """
         Writes this prefabs data to a prefab_*.json file.
         :return:
         """
-        with open(pathlib.Path(__file__).parent.parent / "Prefabs" / f"prefab_{self.name}.json", "w") as fp:
+        with open(prefablibrary.PREFABS_PATH / f"prefab_{self.name}.json", "w") as fp:
             prefab_data = [
                 {
-                    x.data.uobject_path_name: {
+                    (x.name if x.data is None else x.data.uobject_path_name): {
                         "Offset": x.offset,
                         "Rotation": x.rotation,
                         "Scale": x.scale,
                         "Scale3D": x.scale3d,
                         "MoveOffset": x.move_offset,
+                        "Parent": x.parent,
+                        **({"Group": True} if x.b_group else {}),
                     },
                 }
                 for x in self.component_data
@@ -136,90 +184,322 @@ class Prefab(AbstractPlaceable):
             json.dump(prefab_data, fp)
 
     def _calculate_offsets(self) -> None:
-        """Calculate the initial offsets of all components, relative to the root component."""
+        """
+        Calculate the initial offsets of all top level components, relative to the root component.
+        Until then their offset holds their world location, parts of nested prefabs are relative to their group already.
+        """
         if not self.component_data:
             return
-        self._location = self.component_data[0].data.get_location()  # update our root location
+        self._location = self.component_data[0].offset.copy()  # update our root location
         root = Vector(self._location)
         # Make sure our object has normal rotation and scale for this calculation
         self._rotation = [0, 0, 0]
         self._scale = 1.0
         self._scale3d = [1.0, 1.0, 1.0]
         for component in self.component_data:
-            offset = Vector(component.data.get_location()) - root
+            if component.parent >= 0:
+                continue
+            offset = Vector(component.offset) - root
             component.offset = list(offset.to_tuple())  # This is the initial offset of this child component
             # without rotation or scale our move offset is the same as the initial offset
             component.move_offset = component.offset.copy()
 
-    def _apply_child_world_transform(self) -> None:
-        """Recompute and apply world position/rotation for all children from parent state + stored local data."""
-        parent_pos = Vector(self._location)
-        parent_rot = Rotator(self._rotation)
-        s_x, s_y, s_z = self._scale3d
+    def _compute_world_transforms(self) -> list[tuple[Vector, Rotator, float, list]]:
+        """
+        Recompute the world location, rotation, scale and scale3d of all children from parent state + stored local data.
+        component_data is ordered parents first, so every part only needs the already computed transform of its parent.
+
+        :return: One transform per entry in component_data.
+        """
+        root = (Vector(self._location), Rotator(self._rotation), self._scale, self._scale3d)
+        world_transforms: list[tuple[Vector, Rotator, float, list]] = []
 
         for component in self.component_data:
-            local_offset = Vector(component.offset)
-            rotated = local_offset.rotate_around(Vector(), Rotator(self._rotation))
+            parent_pos, parent_rot, parent_scale, (s_x, s_y, s_z) = (
+                world_transforms[component.parent] if component.parent >= 0 else root
+            )
+            rotated = Vector(component.offset).rotate_around(Vector(), parent_rot)
             component.move_offset = list(
-                (self._scale * Vector(x=rotated.x * s_x, y=rotated.y * s_y, z=rotated.z * s_z)).to_tuple(),
+                (parent_scale * Vector(x=rotated.x * s_x, y=rotated.y * s_y, z=rotated.z * s_z)).to_tuple(),
             )
-            component.data.set_location((parent_pos + Vector(component.move_offset)).to_tuple())
+            location = parent_pos + Vector(component.move_offset)
 
-            local_rot = Rotator(component.rotation)
-            lf, lr, lu = local_rot.get_axes()
+            lf, lr, lu = Rotator(component.rotation).get_axes()
             wf = lf.rotate_around(Vector(), parent_rot)
             wr = lr.rotate_around(Vector(), parent_rot)
             wu = lu.rotate_around(Vector(), parent_rot)
-            component.data.set_rotation(Rotator.from_axes(wf, wr, wu).to_tuple())
+            rotation = Rotator.from_axes(wf, wr, wu)
+
+            c_x, c_y, c_z = component.scale3d
+            world_transforms.append(
+                (location, rotation, component.scale * parent_scale, [c_x * s_x, c_y * s_y, c_z * s_z]),
+            )
+        return world_transforms
+
+    def _apply_child_world_transform(self, b_apply_scale: bool = False) -> None:
+        """
+        Apply the world transform of all children in a single pass.
+
+        :param b_apply_scale: Also apply scale and scale3d, only needed after one of them changed.
+        """
+        for component, (location, rotation, scale, scale3d) in zip(
+            self.component_data,
+            self._compute_world_transforms(),
+            strict=True,
+        ):
+            child = component.data
+            if child is None or child.is_destroyed:
+                continue
+            if b_apply_scale:
+                child.set_scale(scale)
+                child.set_scale3d(scale3d)
+            child.set_location(location.to_tuple())
+            child.set_rotation(rotation.to_tuple())
+
+    def get_overrides(self) -> dict[str, dict]:
+        """
+        Get everything that got changed on the parts of this instance, compared to what the blueprint would place.
+
+        :return: Part index as string -> only the attributes that differ.
+        """
+        overrides: dict[str, dict] = {}
+        for index, (component, (location, rotation, scale, scale3d)) in enumerate(
+            zip(self.component_data, self._compute_world_transforms(), strict=True),
+        ):
+            child = component.data
+            if child is None:
+                continue
+            if child.is_destroyed:
+                overrides[str(index)] = {"Destroyed": True}
+                continue
+
+            changed: dict = {}
+            if child.rename:
+                changed["Rename"] = child.rename
+            if tags := [x.strip() for x in child.tags if x.strip()]:
+                changed["Tags"] = tags
+            if child.metadata:
+                changed["Metadata"] = child.metadata
+            if _differs(child.get_location(), location.to_tuple(), 0.1):
+                changed["Location"] = child.get_location()
+            if _differs(child.get_rotation(), rotation.to_tuple(), 1):
+                changed["Rotation"] = child.get_rotation()
+            if _differs((child.get_scale(),), (scale,), 0.001):
+                changed["Scale"] = child.get_scale()
+            if _differs(child.get_scale3d(), scale3d, 0.001):
+                changed["Scale3D"] = child.get_scale3d()
+            if child.get_materials() != component.spawn_materials:
+                changed["Materials"] = child.get_material_path_names().copy()
+            if changed:
+                overrides[str(index)] = changed
+        return overrides
+
+    def apply_overrides(self, overrides: dict[str, dict]) -> None:
+        """
+        Apply part overrides as returned by get_overrides, parts that got destroyed are destroyed again.
+
+        :param overrides:
+        :return:
+        """
+        for index, attrs in overrides.items():
+            try:
+                child = self.component_data[int(index)].data
+            except (IndexError, ValueError):
+                continue
+            if child is None or child.is_destroyed:
+                continue
+            if attrs.get("Destroyed", False):
+                child.destroy()
+                continue
+
+            child.rename = attrs.get("Rename", child.rename)
+            child.tags = attrs.get("Tags", child.tags)
+            child.metadata = attrs.get("Metadata", child.metadata)
+            if "Scale" in attrs:
+                child.set_scale(attrs["Scale"])
+            if "Scale3D" in attrs:
+                child.set_scale3d(attrs["Scale3D"])
+            if "Location" in attrs:
+                child.set_location(attrs["Location"])
+            if "Rotation" in attrs:
+                child.set_rotation(attrs["Rotation"])
+            if "Materials" in attrs:
+                child.set_materials(
+                    [cast("MaterialInterface", find_object("MaterialInterface", m)) for m in attrs["Materials"]],
+                )
+
+    def set_transform(
+        self,
+        location: list[float] | tuple[float, float, float],
+        rotation: list[int] | tuple[int, int, int],
+        scale: float,
+        scale3d: list[float] | tuple[float, float, float],
+    ) -> None:
+        """Set the whole root transform at once, the children only get updated a single time."""
+        self._set_root_transform(Transform(location, rotation, scale, scale3d))
+        self._apply_child_world_transform(b_apply_scale=True)
+        self.notify_moved()
+
+    def _set_root_transform(self, transform: Transform) -> None:
+        self._location = list(transform.location)
+        self._rotation = list(transform.rotation)
+        self._scale = transform.scale if transform.scale != 0 else self._scale
+        self._scale3d = [new if new != 0 else old for new, old in zip(transform.scale3d, self._scale3d, strict=False)]
 
     def instantiate(self) -> tuple[Prefab, list[AbstractPlaceable]]:
         """Place the prefab saved by this instance."""
-        ret = Prefab(self.name)
-        new_components = []
-        for component in self.component_data:
-            main_obj, new = component.data.instantiate()
-            main_obj.set_scale(component.scale)
-            main_obj.set_scale3d(component.scale3d)
+        return Prefab.instantiate_batch([self])[0]
+
+    def instantiate_copies(self, count: int) -> list[tuple[Prefab, list[AbstractPlaceable]]]:
+        return Prefab.instantiate_batch([self] * count)
+
+    @staticmethod
+    def instantiate_batch(
+        blueprints: Sequence[Prefab],
+        transforms: Sequence[Transform] | None = None,
+    ) -> list[tuple[Prefab, list[AbstractPlaceable]]]:
+        """
+        Place all given prefabs, the StaticMesh parts of all of them are spawned in a single batch.
+        Every part gets moved to its final transform once, right after spawning.
+
+        :param blueprints: May contain the same Blueprint multiple times.
+        :param transforms: The root transform of every new instance, defaults to the transform of its Blueprint.
+        :return: The new instance and all newly created objects, for every given Blueprint.
+        """
+        for blueprint in blueprints:
+            blueprint._resolve_blueprint_parts()
+        spawned_smcs = iter(
+            StaticMeshComponentPlaceable.instantiate_batch(
+                [
+                    component.data
+                    for blueprint in blueprints
+                    for component in blueprint.component_data
+                    if isinstance(component.data, StaticMeshComponentPlaceable)
+                ],
+            ),
+        )
+
+        ret: list[tuple[Prefab, list[AbstractPlaceable]]] = []
+        for i, blueprint in enumerate(blueprints):
+            instance = Prefab(blueprint.name)
+            new_components: list[AbstractPlaceable] = []
+            for component in blueprint.component_data:
+                main_obj = None
+                spawn_materials = []
+                if isinstance(component.data, StaticMeshComponentPlaceable):
+                    main_obj = next(spawned_smcs)
+                    new_components.append(main_obj)
+                elif component.data is not None:
+                    main_obj, new = component.data.instantiate()
+                    new_components.extend(new)
+                if main_obj is not None:
+                    main_obj.prefab_owner = instance
+                    spawn_materials = main_obj.get_materials()
+                instance.component_data.append(
+                    Prefab.ComponentData(
+                        main_obj,
+                        component.offset.copy(),
+                        component.rotation.copy(),
+                        component.scale,
+                        component.scale3d.copy(),
+                        component.move_offset.copy(),
+                        component.parent,
+                        component.name,
+                        component.b_group,
+                        spawn_materials,
+                    ),
+                )
+            instance._location = blueprint._location.copy()
+            instance._rotation = blueprint._rotation.copy()
+            instance._scale = blueprint._scale
+            instance._scale3d = blueprint._scale3d.copy()
+            if transforms is not None:
+                instance._set_root_transform(transforms[i])
+            instance._apply_child_world_transform(b_apply_scale=True)
+            ret.append((instance, new_components))
+        return ret
+
+    def _fill_preview(self, preview: Prefab, spare: list[StaticMeshComponentPlaceable]) -> None:
+        """
+        Add a preview of every part to an empty preview instance, StaticMesh parts reuse the spare previews first.
 
-            new_components.extend(new)
-            ret.component_data.append(
+        :param preview:
+        :param spare: StaticMesh previews of the previously shown prefab, the ones that got reused are removed.
+        :return:
+        """
+        self._resolve_blueprint_parts()
+        for component in self.component_data:
+            part: AbstractPlaceable | None = None
+            if isinstance(component.data, StaticMeshComponentPlaceable):
+                if spare and component.data.reuse_preview(spare[-1]):
+                    part = spare.pop()
+                else:
+                    part = component.data.get_preview()
+            elif component.data is not None:
+                part = component.data.get_preview()
+            preview.component_data.append(
                 Prefab.ComponentData(
-                    main_obj,
+                    part,
                     component.offset.copy(),
                     component.rotation.copy(),
                     component.scale,
                     component.scale3d.copy(),
                     component.move_offset.copy(),
+                    component.parent,
+                    component.name,
+                    component.b_group,
                 ),
             )
-        ret._location = self._location.copy()
-        ret._rotation = self._rotation.copy()
-        ret._scale = self._scale
-        ret._scale3d = self._scale3d.copy()
-        ret._apply_child_world_transform()
-        return ret, new_components
-
-    def get_preview(self) -> AbstractPlaceable:
-        ret, _ = self.instantiate()
-        _, box_extent = ret.get_bounding_box()
-        box_extent = Vector(box_extent)
-        size = max(box_extent)
-        ret.set_scale(1 / size * 20)
-        return ret
+        preview._location = self._location.copy()
+        preview._rotation = self._rotation.copy()
+        preview._scale = self._scale
+        preview._scale3d = self._scale3d.copy()
+        preview._apply_child_world_transform(b_apply_scale=True)
+        _, box_extent = preview.get_bounding_box()
+        preview.set_scale(1 / max(Vector(box_extent)) * 20)
+
+    def get_preview(self) -> Prefab:
+        """Show every part as a preview, StaticMesh parts use the pooled preview components like a single mesh."""
+        preview = Prefab(self.name)
+        self._fill_preview(preview, [])
+        return preview
+
+    def reuse_preview(self, preview: AbstractPlaceable) -> bool:
+        if not isinstance(preview, Prefab):
+            return False
+        spare: list[StaticMeshComponentPlaceable] = []
+        for component in preview.component_data:
+            if component.data is None or component.data.is_destroyed:
+                continue
+            if isinstance(component.data, StaticMeshComponentPlaceable):
+                spare.append(component.data)
+            else:
+                component.data.destroy()  # only StaticMesh previews can show another object
+        preview.component_data = []
+        preview.name = self.name
+        self._fill_preview(preview, spare)
+        for part in spare:  # the new prefab has fewer StaticMesh parts
+            part.destroy()
+        return True
 
     def set_preview_location(self, location: tuple[float, float, float]) -> None:
         self.set_location(location)
 
+    def is_stale(self) -> bool:
+        """An instance is stale once the objects of all its parts are gone."""
+        if self._blueprint_parts is not None or not self.component_data:
+            return False
+        parts = [x.data for x in self.component_data if x.data is not None]
+        return bool(parts) and all(x.is_stale() for x in parts)
+
     def holds_object(self, uobject: unreal.UObject) -> bool:
-        if not self.component_data:
+        if self._blueprint_parts is not None or not self.component_data:
             return False
-        return any(x.data.holds_object(uobject) for x in self.component_data)
+        return any(x.data.holds_object(uobject) for x in self.component_data if x.data is not None)
 
     def set_scale(self, scale: float) -> None:
         self._scale = scale if scale != 0 else self._scale
-        for component in self.component_data:
-            component.data.set_scale(component.scale * self._scale)
-        self._apply_child_world_transform()
+        self._apply_child_world_transform(b_apply_scale=True)
 
     def get_scale(self) -> float:
         return self._scale
@@ -237,13 +517,15 @@ class Prefab(AbstractPlaceable):
     def set_location(self, position: list[float] | tuple[float, float, float]) -> None:
         self._location = list(position)
         self._apply_child_world_transform()
+        self.notify_moved()
 
     def destroy(self) -> list[AbstractPlaceable]:
         remove: list[AbstractPlaceable] = [
             self,
         ]
         for component in self.component_data:
-            remove.extend(component.data.destroy())
+            if component.data is not None:
+                remove.extend(component.data.destroy())
 
         self.is_destroyed = True
         return remove
@@ -252,6 +534,8 @@ class Prefab(AbstractPlaceable):
         box_origin = Vector(self._location)
         box_extent = Vector()
         for component in self.component_data:
+            if component.data is None:
+                continue
             child_origin, child_extent = component.data.get_bounding_box()
             child_origin = Vector(child_origin)
             child_extent = Vector(child_extent)
@@ -278,16 +562,36 @@ class Prefab(AbstractPlaceable):
             return
 
         for component in self.component_data:
-            component.data.store_default_values(default_dict)
+            if component.data is not None:
+                component.data.store_default_values(default_dict)
 
     def restore_default_values(self, default_dict: dict) -> None:
         if not self.component_data:
             return
         for component in self.component_data:
-            component.data.restore_default_values(default_dict)
+            if component.data is not None:
+                component.data.restore_default_values(default_dict)
 
     def save_to_json(self, saved_json: dict) -> None:
-        pass
+        if not self.b_dynamically_created or self.is_destroyed:
+            return
+
+        prefab_list = saved_json.setdefault("Create", {}).setdefault("Prefab", [])
+        prefab_list.append(
+            {
+                self.name: {
+                    "Rename": self.rename,
+                    "Tags": [x.strip() for x in self.tags if x.strip()],
+                    "Metadata": self.metadata,
+                    "Location": self.get_location(),
+                    "Rotation": self.get_rotation(),
+                    "Scale": self.get_scale(),
+                    "Scale3D": self.get_scale3d(),
+                    # only the parts that got edited after placing this prefab are saved
+                    **({"Overrides": overrides} if (overrides := self.get_overrides()) else {}),
+                },
+            },
+        )
 
     def get_materials(self) -> list[MaterialInterface]:
         return []
@@ -308,9 +612,29 @@ class Prefab(AbstractPlaceable):
         self._scale3d = [
             scale if scale != 0 else old_scale for scale, old_scale in zip(scale3d, self._scale3d, strict=False)
         ]
-        s_x, s_y, s_z = self._scale3d
-        for component in self.component_data:
-            child = component.data
-            c_x, c_y, c_z = component.scale3d
-            child.set_scale3d([c_x * s_x, c_y * s_y, c_z * s_z])
-        self._apply_child_world_transform()
+        self._apply_child_world_transform(b_apply_scale=True)
+
+
+def _placeable_from_path(path_name: str) -> AbstractPlaceable | None:
+    """Create the Blueprint placeable for the object with the given path name, None if it can't be placed."""
+    try:
+        uobj = find_object("Object", path_name)
+    except ValueError:  # e.g. its package is not loaded
+        return None
+    if uobj.Class.Name == "StaticMesh":
+        return StaticMeshComponentPlaceable(path_name.split(".", 1)[-1], cast("StaticMesh", uobj))
+    if uobj.Class.Name in (
+        "WillowInteractiveObject",
+        "WillowVendingMachine",
+        "WillowVendingMachineBlackMarket",
+        "InteractiveObjectBalanceDefinition",
+        "InteractiveObjectDefinition",
+    ):
+        return InteractiveObjectPlaceable(path_name.split(".", 1)[-1], cast("InteractiveObjectDefinition", uobj))
+    if uobj.Class.Name == "AIPawnBalanceDefinition":
+        return AIPawnPlaceable(path_name.split(".", 1)[-1], cast("AIPawnBalanceDefinition", uobj))
+    return None
+
+
+def _differs(current: Iterable[float], expected: Iterable[float], tolerance: float) -> bool:
+    return any(abs(a - b) > tolerance for a, b in zip(current, expected, strict=False))
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from typing import TYPE_CHECKING, cast
 
 from mods_base import ENGINE
 from unrealsdk import construct_object, find_all, make_struct, unreal
 
+from .. import handles, pathnames
 from .placeable import AbstractPlaceable
 
 if TYPE_CHECKING:
@@ -19,12 +21,24 @@ else:
 
 
 class StaticMeshComponentPlaceable(AbstractPlaceable):
+    b_reusable_preview: bool = True
+
     def __init__(self, name: str, static_mesh: StaticMesh, sm_component: StaticMeshComponent | None = None) -> None:
         super().__init__(name, "StaticMeshComponent")
         self.static_mesh: StaticMesh = static_mesh
-        self.sm_component: StaticMeshComponent | None = sm_component  # when destroyed, it will eventually get GC'ed,
+        self._sm_component: handles.Handle = handles.Handle(sm_component)  # when destroyed, it eventually gets GC'ed,
         self.sm_component_name: str = ""  # ...but we may still need its name for saving it later to json
-        self.uobject_path_name: str = self.static_mesh._path_name()
+        self.uobject_path_name: str = pathnames.path_name(self.static_mesh)
+
+    @property
+    def sm_component(self) -> StaticMeshComponent | None:
+        return cast("StaticMeshComponent | None", self._sm_component.get())
+
+    def get_component(self) -> StaticMeshComponent | None:
+        return self.sm_component
+
+    def is_stale(self) -> bool:
+        return self._sm_component.is_stale()
 
     def get_materials(self) -> list[MaterialInterface]:
         if self.sm_component:
@@ -32,6 +46,7 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
         return []
 
     def set_materials(self, materials: list[MaterialInterface]) -> None:
+        self.invalidate_material_path_names()
         if self.sm_component and materials is not None:
             self.sm_component.Materials = materials
             self.sm_component.ForceUpdate(False)
@@ -111,6 +126,7 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
         self.sm_component.SetComponentRBFixed(True)
 
         self.b_default_attributes = False
+        self.notify_moved()
 
     def get_location(self) -> list[float]:
         if not self.sm_component:
@@ -128,18 +144,45 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
         return make_vector("Vector", X=0, Y=0, Z=0), make_vector("Vector", X=0, Y=0, Z=0)
 
     def instantiate(self) -> tuple[StaticMeshComponentPlaceable, list[StaticMeshComponentPlaceable]]:
-        collection_actor = list(find_all("StaticMeshCollectionActor"))[-1]
-        new_smc = cast("StaticMeshComponent", construct_object(cls="StaticMeshComponent", outer=collection_actor))
-        ret = StaticMeshComponentPlaceable(self.name, self.static_mesh, new_smc)
-        new_smc.SetStaticMesh(ret.static_mesh, True)
-        new_smc.SetBlockRigidBody(True)
-        new_smc.SetActorCollision(True, True, True)
-        new_smc.SetTraceBlocking(True, True)
-        collection_actor.AttachComponent(new_smc)
+        ret = StaticMeshComponentPlaceable.instantiate_batch([self])[0]
+        return (ret, [ret])
 
-        ret.b_dynamically_created = True
+    def instantiate_copies(
+        self,
+        count: int,
+    ) -> list[tuple[StaticMeshComponentPlaceable, list[StaticMeshComponentPlaceable]]]:
+        return [(x, [x]) for x in StaticMeshComponentPlaceable.instantiate_batch([self] * count)]
+
+    @staticmethod
+    def instantiate_batch(
+        blueprints: Sequence[StaticMeshComponentPlaceable],
+    ) -> list[StaticMeshComponentPlaceable]:
+        """
+        Place one new StaticMeshComponent for each of the given Blueprints.
+        The StaticMeshCollectionActor is only searched for once instead of once per new instance.
+
+        :param blueprints: May contain the same Blueprint multiple times.
+        :return: The new instances, in the same order as the given Blueprints.
+        """
+        if not blueprints:
+            return []
+        collection_actor = list(find_all("StaticMeshCollectionActor"))[-1]
+        created: list[StaticMeshComponentPlaceable] = []
+        for blueprint in blueprints:
+            new_smc = cast(
+                "StaticMeshComponent",
+                construct_object(cls="StaticMeshComponent", outer=collection_actor),
+            )
+            new_smc.SetStaticMesh(blueprint.static_mesh, True)
+            new_smc.SetBlockRigidBody(True)
+            new_smc.SetActorCollision(True, True, True)
+            new_smc.SetTraceBlocking(True, True)
+            collection_actor.AttachComponent(new_smc)
 
-        return (ret, [ret])
+            new = StaticMeshComponentPlaceable(blueprint.name, blueprint.static_mesh, new_smc)
+            new.b_dynamically_created = True
+            created.append(new)
+        return created
 
     def get_preview(self) -> StaticMeshComponentPlaceable:
         world_info = ENGINE.GetCurrentWorldInfo()
@@ -155,6 +198,20 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
 
         return ret
 
+    def reuse_preview(self, preview: AbstractPlaceable) -> bool:
+        if not isinstance(preview, StaticMeshComponentPlaceable) or not preview.sm_component:
+            return False
+        preview.name = self.name
+        preview.static_mesh = self.static_mesh
+        preview.uobject_path_name = self.uobject_path_name
+        preview.sm_component.SetStaticMesh(self.static_mesh, True)
+        preview.sm_component.ForceUpdate(False)
+        # The bounds already include the scale we used for the previous mesh
+        radius = preview.sm_component.Bounds.SphereRadius
+        if radius > 0:
+            preview.set_scale(preview.get_scale() * 20 / radius)
+        return True
+
     def set_preview_location(self, location: tuple[float, float, float]) -> None:
         if not self.sm_component:
             raise ValueError("Cannot set location on a non-instantiated StaticMeshComponentPlaceable!")
@@ -169,23 +226,25 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
     def destroy(self) -> list[StaticMeshComponentPlaceable]:
         if self.sm_component is None:  # if we don't have a SMC we can't destroy it
             raise ValueError("Cannot destroy non-instantiated Object!")
+        if not self.b_dynamically_created:
+            self.sm_component_name = self.get_path_name()
         self.sm_component.DetachFromAny()
         self.is_destroyed = True
         return [self]
 
     def store_default_values(self, default_dict: dict) -> None:
-        if self.sm_component and ENGINE.PathName(self.sm_component) not in default_dict:
-            default_dict[ENGINE.PathName(self.sm_component)] = {
+        if self.sm_component and self.get_path_name() not in default_dict:
+            default_dict[self.get_path_name()] = {
                 "Location": self.get_location(),
                 "Rotation": self.get_rotation(),
                 "Scale": self.get_scale(),
                 "Scale3D": self.get_scale3d(),
-                "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                "Materials": self.get_material_path_names().copy(),
             }
 
     def restore_default_values(self, default_dict: dict) -> None:
-        if self.sm_component and ENGINE.PathName(self.sm_component) in default_dict:
-            defaults = default_dict[ENGINE.PathName(self.sm_component)]
+        if self.sm_component and self.get_path_name() in default_dict:
+            defaults = default_dict[self.get_path_name()]
             self.set_scale(defaults["Scale"])
             self.set_location(defaults["Location"])
             self.set_rotation(defaults["Rotation"])
@@ -201,7 +260,7 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
 
         if not self.b_dynamically_created and not self.b_default_attributes and not self.is_destroyed:
             smc_list = saved_json.setdefault("Edit", {}).setdefault("StaticMeshComponent", {})
-            smc_list[ENGINE.PathName(self.sm_component)] = {
+            smc_list[self.get_path_name()] = {
                 "Rename": self.rename,
                 "Tags": cleaned_tags,
                 "Metadata": self.metadata,
@@ -209,7 +268,7 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
                 "Rotation": self.get_rotation(),
                 "Scale": self.get_scale(),
                 "Scale3D": self.get_scale3d(),
-                "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                "Materials": self.get_material_path_names().copy(),
             }
 
         elif not self.b_dynamically_created and self.is_destroyed:
@@ -228,7 +287,7 @@ class StaticMeshComponentPlaceable(AbstractPlaceable):
                         "Rotation": self.get_rotation(),
                         "Scale": self.get_scale(),
                         "Scale3D": self.get_scale3d(),
-                        "Materials": [ENGINE.PathName(x) for x in self.get_materials()],
+                        "Materials": self.get_material_path_names().copy(),
                     },
                 },
             )
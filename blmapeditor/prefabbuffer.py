@@ -11,6 +11,6 @@ prefab_buffer: list[placeables.AbstractPlaceable] = []
 
 def save_prefab_buffer(name: str) -> None:
     prefab = placeables.Prefab.create_prefab_blueprint(prefab_buffer, name)
-    placeablehelpers.PrefabHelper.objects_by_filter["Prefab Blueprints"].append(prefab)
-    placeablehelpers.PrefabHelper.objects_by_filter["Prefab Instances"].append(prefab)
+    placeablehelpers.PrefabHelper.objects_by_filter["Prefab Blueprints"].add(prefab)
+    placeablehelpers.PrefabHelper.objects_by_filter["Prefab Instances"].add(prefab)
     prefab_buffer.clear()
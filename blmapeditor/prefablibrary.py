@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pathlib
+from dataclasses import dataclass
+
+from unrealsdk import logging
+
+PREFABS_PATH: pathlib.Path = pathlib.Path(__file__).parent / "Prefabs"
+
+BlueprintParts = list[tuple[str, dict]]  # (UObject path name, part attributes) as stored in prefab_<name>.json
+
+
+@dataclass()
+class _CompiledBlueprint:
+    name: str
+    mtime_ns: int
+    size: int
+    digest: str
+    parts: BlueprintParts
+
+
+_compiled: dict[pathlib.Path, _CompiledBlueprint] = {}
+
+
+def _prefab_name(path: pathlib.Path) -> str:
+    return path.stem.split("_", 1)[-1]
+
+
+def _compile(path: pathlib.Path) -> _CompiledBlueprint | None:
+    """Get the compiled blueprint of a prefab file, the file is only parsed if its content changed."""
+    try:
+        stat = path.stat()
+        cached = _compiled.get(path)
+        if cached and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            return cached
+        raw = path.read_bytes()
+    except OSError as e:
+        logging.error(f"Could not read prefab '{path}': {e}")
+        return None
+
+    digest = hashlib.sha1(raw).hexdigest()
+    if cached and cached.digest == digest:  # touched, but not changed
+        cached.mtime_ns = stat.st_mtime_ns
+        return cached
+
+    try:
+        parts = [(uobj_name, attrs) for part in json.loads(raw) for uobj_name, attrs in part.items()]
+    except (json.JSONDecodeError, AttributeError) as e:
+        logging.error(f"Prefab '{path}' is not a valid prefab file: {e}")
+        return None
+    compiled = _compiled[path] = _CompiledBlueprint(_prefab_name(path), stat.st_mtime_ns, stat.st_size, digest, parts)
+    return compiled
+
+
+def get_blueprint_parts(name: str) -> BlueprintParts | None:
+    """
+    Get the parts of a single prefab.
+
+    :param name:
+    :return: None if no prefab with this name exists.
+    """
+    path = PREFABS_PATH / f"prefab_{name}.json"
+    if not path.is_file():
+        return None
+    compiled = _compile(path)
+    return compiled.parts if compiled else None
+
+
+def scan() -> list[tuple[str, BlueprintParts]]:
+    """
+    Get the name and parts of every prefab in the Prefabs directory.
+    Only files that changed since the last scan get parsed again.
+
+    :return:
+    """
+    paths = sorted(PREFABS_PATH.glob("prefab_*.json"))
+    for removed in _compiled.keys() - set(paths):
+        del _compiled[removed]
+    return [(compiled.name, compiled.parts) for compiled in map(_compile, paths) if compiled]
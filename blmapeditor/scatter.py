@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import math
+import random
+
+# Offset from the source object and the yaw that gets added to its rotation. Both are relative to the sources yaw,
+# X points where the source faces, so the whole pattern turns with it.
+Placement = tuple[tuple[float, float, float], int]
+
+_FULL_ROTATION: int = 65536  # Unreal Rotation Units
+_POISSON_ATTEMPTS: int = 30  # candidates tried around a point before it stops spawning new points
+
+
+def rotate(offset: tuple[float, float, float], yaw: int) -> tuple[float, float, float]:
+    """
+    Rotate the offset of a placement around the Z axis into world space.
+
+    :param offset:
+    :param yaw: The yaw of the source object, in Unreal Rotation Units.
+    :return:
+    """
+    angle = math.tau * yaw / _FULL_ROTATION
+    cos, sin = math.cos(angle), math.sin(angle)
+    x, y, z = offset
+    return x * cos - y * sin, x * sin + y * cos, z
+
+
+def linear(count: int, step: tuple[float, float, float]) -> list[Placement]:
+    """
+    Place copies in a row, the first copy is one step away from the source.
+
+    :param count: Number of copies.
+    :param step: Offset between two copies.
+    :return:
+    """
+    s_x, s_y, s_z = step
+    return [((s_x * i, s_y * i, s_z * i), 0) for i in range(1, count + 1)]
+
+
+def grid(rows: int, columns: int, spacing: tuple[float, float]) -> list[Placement]:
+    """
+    Place copies on a rows x columns grid, the source object is the first cell of the grid.
+
+    :param rows:
+    :param columns:
+    :param spacing: Distance between two cells on the X and Y axis.
+    :return:
+    """
+    s_x, s_y = spacing
+    return [((s_x * row, s_y * column, 0.0), 0) for row in range(rows) for column in range(columns) if row or column]
+
+
+def radial(count: int, radius: float, b_face_center: bool = False) -> list[Placement]:
+    """
+    Place copies evenly on a circle around the source object.
+
+    :param count: Number of copies.
+    :param radius:
+    :param b_face_center: Rotate every copy to face the source object.
+    :return:
+    """
+    placements: list[Placement] = []
+    for i in range(count):
+        angle = math.tau * i / count
+        yaw = int(_FULL_ROTATION * i / count + _FULL_ROTATION / 2) % _FULL_ROTATION if b_face_center else 0
+        placements.append(((radius * math.cos(angle), radius * math.sin(angle), 0.0), yaw))
+    return placements
+
+
+def poisson_disk(
+    count: int,
+    radius: float,
+    min_distance: float,
+    b_random_yaw: bool = False,
+    seed: int | None = None,
+) -> list[Placement]:
+    """
+    Randomly scatter copies on a disk around the source object, no two objects are closer than min_distance.
+    Uses Bridson's algorithm, a background grid with cells of size min_distance/sqrt(2) holds at most one point each.
+
+    :param count: Maximum number of copies, fewer are placed if the disk is full.
+    :param radius: Radius of the disk.
+    :param min_distance: Minimum distance between two objects, including the source object.
+    :param b_random_yaw: Give every copy a random yaw.
+    :param seed: Seed for the random number generator, the same seed always results in the same scatter.
+    :return:
+    """
+    if min_distance <= 0:
+        raise ValueError("min_distance has to be greater than 0!")
+    rng = random.Random(seed)
+    cell_size = min_distance / math.sqrt(2)
+    min_distance_sq = min_distance * min_distance
+    radius_sq = radius * radius
+    cells: dict[tuple[int, int], tuple[float, float]] = {(0, 0): (0.0, 0.0)}  # the source object is the first point
+    active: list[tuple[float, float]] = [(0.0, 0.0)]
+    points: list[tuple[float, float]] = []
+
+    def fits(x: float, y: float) -> bool:
+        if x * x + y * y > radius_sq:
+            return False
+        c_x, c_y = int(x // cell_size), int(y // cell_size)
+        for n_x in range(c_x - 2, c_x + 3):
+            for n_y in range(c_y - 2, c_y + 3):
+                other = cells.get((n_x, n_y))
+                if other and (other[0] - x) ** 2 + (other[1] - y) ** 2 < min_distance_sq:
+                    return False
+        return True
+
+    while active and len(points) < count:
+        index = rng.randrange(len(active))
+        p_x, p_y = active[index]
+        for _ in range(_POISSON_ATTEMPTS):
+            angle = rng.uniform(0, math.tau)
+            distance = rng.uniform(min_distance, 2 * min_distance)
+            x, y = p_x + distance * math.cos(angle), p_y + distance * math.sin(angle)
+            if fits(x, y):
+                cells[int(x // cell_size), int(y // cell_size)] = (x, y)
+                active.append((x, y))
+                points.append((x, y))
+                break
+        else:  # nothing fits around this point anymore
+            active[index] = active[-1]
+            active.pop()
+
+    return [((x, y, 0.0), rng.randrange(_FULL_ROTATION) if b_random_yaw else 0) for x, y in points]
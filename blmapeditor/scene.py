@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Hashable, Iterable, Sequence
+from typing import TYPE_CHECKING, Any
+
+from .placeables import AbstractPlaceable
+
+if TYPE_CHECKING:
+    from . import tagquery
+    from .placeablehelpers import PlaceableHelper
+
+CELL_SIZE: float = 2000.0  # Edge length of a spatial index cell, in Unreal Units
+
+Cell = tuple[int, int, int]
+
+_helpers: dict[str, PlaceableHelper] = {}  # uclass -> the helper that owns all Placeables of this class
+_by_id: dict[int, AbstractPlaceable] = {}
+_by_uclass: dict[str, dict[AbstractPlaceable, None]] = {}
+_by_tag: dict[str, dict[AbstractPlaceable, None]] = {}
+_by_name: dict[str, dict[AbstractPlaceable, None]] = {}  # lowered display name -> Placeables
+_indexed_tags: dict[AbstractPlaceable, tuple[str, ...]] = {}  # the tags each Placeable is indexed under
+_indexed_names: dict[AbstractPlaceable, str] = {}  # the name each Placeable is indexed under
+
+_cells: dict[Cell, dict[AbstractPlaceable, None]] = {}
+_cell_of: dict[AbstractPlaceable, Cell] = {}
+_locations: dict[AbstractPlaceable, tuple[float, float, float]] = {}  # location at the time it was put into a cell
+_moved: dict[AbstractPlaceable, None] = {}  # registered or moved since the last spatial query, cell is not up-to-date
+
+
+def register_helper(uclass: str, helper: PlaceableHelper) -> None:
+    """Make the helper the owner of all Placeables with the given uclass."""
+    _helpers[uclass] = helper
+
+
+def get_helper(placeable: AbstractPlaceable) -> PlaceableHelper:
+    """
+    Get the helper that owns the given Placeable.
+
+    :param placeable:
+    :return:
+    :raises KeyError: If no helper was registered for the Placeables uclass.
+    """
+    return _helpers[placeable.uclass]
+
+
+def _display_name(placeable: AbstractPlaceable) -> str:
+    return (placeable.rename if placeable.rename else placeable.name).lower()
+
+
+def _index(index: dict[Any, dict[AbstractPlaceable, None]], key: Hashable, placeable: AbstractPlaceable) -> None:
+    index.setdefault(key, {})[placeable] = None
+
+
+def _unindex(index: dict[Any, dict[AbstractPlaceable, None]], key: Hashable, placeable: AbstractPlaceable) -> None:
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(placeable, None)
+        if not bucket:
+            del index[key]
+
+
+def register(placeable: AbstractPlaceable) -> None:
+    """Add an instantiated Placeable to the scene, does nothing if it already is registered."""
+    if id(placeable) in _by_id:
+        return
+    _by_id[id(placeable)] = placeable
+    _index(_by_uclass, placeable.uclass, placeable)
+    _indexed_names[placeable] = name = _display_name(placeable)
+    _index(_by_name, name, placeable)
+    _indexed_tags[placeable] = tags = tuple(placeable.tags)
+    for tag in tags:
+        _index(_by_tag, tag, placeable)
+    _moved[placeable] = None  # its cell is looked up on the next spatial query
+
+
+def unregister(placeable: AbstractPlaceable) -> None:
+    """Remove the Placeable from the scene, does nothing if it is not registered."""
+    if _by_id.pop(id(placeable), None) is None:
+        return
+    _unindex(_by_uclass, placeable.uclass, placeable)
+    _unindex(_by_name, _indexed_names.pop(placeable), placeable)
+    for tag in _indexed_tags.pop(placeable):
+        _unindex(_by_tag, tag, placeable)
+    _moved.pop(placeable, None)
+    _locations.pop(placeable, None)
+    cell = _cell_of.pop(placeable, None)
+    if cell is not None:
+        _unindex(_cells, cell, placeable)
+
+
+def on_filter_change(b_added: bool, placeable: AbstractPlaceable) -> None:
+    """Observer for the filters that hold the instances of a helper."""
+    if b_added:
+        register(placeable)
+    else:
+        unregister(placeable)
+
+
+def _on_tags_changed(placeable: AbstractPlaceable) -> None:
+    old = _indexed_tags.get(placeable)
+    if old is None:
+        return
+    new = tuple(placeable.tags)
+    for tag in set(old) - set(new):
+        _unindex(_by_tag, tag, placeable)
+    for tag in new:
+        _index(_by_tag, tag, placeable)
+    _indexed_tags[placeable] = new
+
+
+def _on_rename(placeable: AbstractPlaceable) -> None:
+    old = _indexed_names.get(placeable)
+    if old is None:
+        return
+    _unindex(_by_name, old, placeable)
+    _indexed_names[placeable] = name = _display_name(placeable)
+    _index(_by_name, name, placeable)
+
+
+def _on_move(placeable: AbstractPlaceable) -> None:
+    if placeable in _indexed_names:
+        _moved[placeable] = None
+
+
+AbstractPlaceable.rename_listeners.append(_on_rename)
+AbstractPlaceable.move_listeners.append(_on_move)
+AbstractPlaceable.tag_listeners.append(_on_tags_changed)
+
+
+def is_registered(placeable: AbstractPlaceable) -> bool:
+    return id(placeable) in _by_id
+
+
+def get_by_id(placeable_id: int) -> AbstractPlaceable | None:
+    """Get a registered Placeable by its id(), None if no such Placeable is registered."""
+    return _by_id.get(placeable_id)
+
+
+def _get_cell(location: Sequence[float]) -> Cell:
+    return int(location[0] // CELL_SIZE), int(location[1] // CELL_SIZE), int(location[2] // CELL_SIZE)
+
+
+def _update_cells() -> None:
+    """Put every Placeable that got registered or moved since the last spatial query into its current cell."""
+    for placeable in _moved:
+        old = _cell_of.get(placeable)
+        x, y, z = placeable.get_location()
+        _locations[placeable] = (x, y, z)
+        new = _get_cell((x, y, z))
+        if new == old:
+            continue
+        if old is not None:
+            _unindex(_cells, old, placeable)
+        _cell_of[placeable] = new
+        _index(_cells, new, placeable)
+    _moved.clear()
+
+
+def _get_nearby_candidates(center: Sequence[float], radius: float) -> Iterable[AbstractPlaceable]:
+    """Get all Placeables in cells that intersect the bounding box of the sphere."""
+    low = _get_cell([c - radius for c in center])
+    high = _get_cell([c + radius for c in center])
+    cell_count = (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+    if cell_count >= len(_cells):  # cheaper to look at every occupied cell
+        return [placeable for cell in _cells.values() for placeable in cell]
+    return [
+        placeable
+        for x in range(low[0], high[0] + 1)
+        for y in range(low[1], high[1] + 1)
+        for z in range(low[2], high[2] + 1)
+        for placeable in _cells.get((x, y, z), ())
+    ]
+
+
+def query(
+    uclass: str | None = None,
+    tags: tagquery.Expression | None = None,
+    name: str | None = None,
+    center: Sequence[float] | None = None,
+    radius: float = 0.0,
+) -> list[AbstractPlaceable]:
+    """
+    Get all registered Placeables that match every given condition, e.g.
+    query("StaticMeshComponent", tagquery.parse("Cover"), center=pc_location, radius=5000) for all meshes tagged
+    "Cover" within 50m.
+    Only the smallest matching index gets iterated, the other conditions are checked on its Placeables.
+
+    :param uclass: Only Placeables of this class.
+    :param tags: Only Placeables whose tags match this expression, as parsed by tagquery.parse.
+    :param name: Only Placeables with this display name, case-insensitive.
+    :param center: Only Placeables within radius of this location.
+    :param radius:
+    :return: Destroyed Placeables are never returned.
+    """
+    conditions: list[Collection[AbstractPlaceable]] = []
+    if uclass is not None:
+        conditions.append(_by_uclass.get(uclass, {}))
+    if name is not None:
+        conditions.append(_by_name.get(name.lower(), {}))
+    if tags is not None:
+        conditions.append(tags.select(lambda tag: _by_tag.get(tag, {}), lambda: set(_by_id.values())))
+
+    if center is not None:
+        _update_cells()
+    candidates: Iterable[AbstractPlaceable]
+    if conditions:
+        conditions.sort(key=len)
+        candidates = conditions.pop(0)
+    elif center is not None:
+        candidates = _get_nearby_candidates(center, radius)
+    else:
+        candidates = _by_id.values()
+
+    if center is None:
+        return [x for x in candidates if not x.is_destroyed and all(x in c for c in conditions)]
+
+    c_x, c_y, c_z = center
+    radius_sq = radius * radius
+    ret: list[AbstractPlaceable] = []
+    for placeable in candidates:
+        if placeable.is_destroyed or not all(placeable in c for c in conditions):
+            continue
+        x, y, z = _locations[placeable]
+        if (x - c_x) ** 2 + (y - c_y) ** 2 + (z - c_z) ** 2 <= radius_sq:
+            ret.append(placeable)
+    return ret
+
+
+def clear() -> None:
+    """Forget all registered Placeables, called on every Map Load start. Helpers stay registered."""
+    for index in (_by_id, _by_uclass, _by_tag, _by_name, _indexed_tags, _indexed_names, _cells, _cell_of, _locations):
+        index.clear()
+    _moved.clear()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from math import radians, tan
 from typing import TYPE_CHECKING, cast
 
@@ -22,28 +23,136 @@ CLIPBOARD: AbstractPlaceable | None = None
 CLIPBOARD_HELPER: PlaceableHelper | None = None
 
 
-def set_preview(preview: AbstractPlaceable) -> None:
-    global CURRENT_PREVIEW  # noqa: PLW0603
+@dataclass()
+class ObjectSnapshot:
+    """The attributes of the selected object, as displayed by the Object Attributes panels."""
+
+    location: list[float]
+    rotation: list[int]
+    scale: float
+    scale3d: list[float]
+    material_names: list[str]
+
+
+_SNAPSHOT: ObjectSnapshot | None = None
+_SNAPSHOT_OBJECT: AbstractPlaceable | None = None  # the object _SNAPSHOT was taken from
+_SNAPSHOT_DIRTY: bool = True
+
+
+def get_snapshot() -> ObjectSnapshot | None:
+    """
+    Get the snapshot of the selected object. It only gets retaken if the selection changed or it was marked dirty.
+
+    :return: None if no object is selected.
+    """
+    global _SNAPSHOT, _SNAPSHOT_OBJECT, _SNAPSHOT_DIRTY  # noqa: PLW0603
+    if SELECTED_OBJECT is None:
+        return None
+    if _SNAPSHOT is None or _SNAPSHOT_DIRTY or _SNAPSHOT_OBJECT is not SELECTED_OBJECT:
+        _SNAPSHOT = ObjectSnapshot(
+            location=list(SELECTED_OBJECT.get_location()),
+            rotation=list(SELECTED_OBJECT.get_rotation()),
+            scale=SELECTED_OBJECT.get_scale(),
+            scale3d=list(SELECTED_OBJECT.get_scale3d()),
+            material_names=SELECTED_OBJECT.get_material_path_names(),
+        )
+        _SNAPSHOT_OBJECT = SELECTED_OBJECT
+        _SNAPSHOT_DIRTY = False
+    return _SNAPSHOT
+
+
+def mark_dirty() -> None:
+    """Has to be called after changing any attribute of the selected object."""
+    global _SNAPSHOT_DIRTY  # noqa: PLW0603
+    _SNAPSHOT_DIRTY = True
+
+
+PREVIEW_DEBOUNCE: float = 0.15  # Seconds the list selection has to stay the same before a preview gets spawned
+_PARKED_PREVIEW_LOCATION: tuple[float, float, float] = (0, 0, -9999999)
+
+_PREVIEW_SOURCE: AbstractPlaceable | None = None  # The Placeable CURRENT_PREVIEW is showing
+_PREVIEW_POOL: dict[type[AbstractPlaceable], AbstractPlaceable] = {}  # parked previews, one per Placeable type
+_PENDING_PREVIEW: AbstractPlaceable | None = None
+_PENDING_PREVIEW_SINCE: float = 0
+
+
+def request_preview(placeable: AbstractPlaceable) -> None:
+    """Show a preview of the given Placeable, once it has been requested for at least PREVIEW_DEBOUNCE seconds."""
+    global _PENDING_PREVIEW, _PENDING_PREVIEW_SINCE  # noqa: PLW0603
+    _PENDING_PREVIEW = placeable
+    _PENDING_PREVIEW_SINCE = Time.time
+
+
+def set_preview(placeable: AbstractPlaceable) -> None:
+    """Show a preview of the given Placeable, reusing the current or a parked preview if possible."""
+    global CURRENT_PREVIEW, _PREVIEW_SOURCE, _PENDING_PREVIEW  # noqa: PLW0603
+    _PENDING_PREVIEW = None
+    if CURRENT_PREVIEW and placeable is _PREVIEW_SOURCE:
+        return
     if CURRENT_PREVIEW:
-        CURRENT_PREVIEW.destroy()
-    CURRENT_PREVIEW = preview
+        if type(CURRENT_PREVIEW) is type(placeable) and placeable.reuse_preview(CURRENT_PREVIEW):
+            _PREVIEW_SOURCE = placeable
+            return
+        _park_preview(CURRENT_PREVIEW)
+        CURRENT_PREVIEW = None
+
+    pooled = _PREVIEW_POOL.pop(type(placeable), None)
+    if pooled and placeable.reuse_preview(pooled):
+        CURRENT_PREVIEW = pooled
+    else:
+        if pooled:
+            pooled.destroy()
+        CURRENT_PREVIEW = placeable.get_preview()
+    _PREVIEW_SOURCE = placeable
+
+
+def _park_preview(preview: AbstractPlaceable) -> None:
+    """Keep a reusable preview out of sight for later, destroy any other preview."""
+    if not preview.b_reusable_preview:
+        preview.destroy()
+        return
+    if old := _PREVIEW_POOL.get(type(preview)):
+        old.destroy()
+    preview.set_preview_location(_PARKED_PREVIEW_LOCATION)
+    _PREVIEW_POOL[type(preview)] = preview
+
+
+def _flush_pending_preview() -> None:
+    if _PENDING_PREVIEW and Time.time - _PENDING_PREVIEW_SINCE >= PREVIEW_DEBOUNCE:
+        set_preview(_PENDING_PREVIEW)
 
 
 def destroy_preview() -> None:
-    global CURRENT_PREVIEW  # noqa: PLW0603
+    global CURRENT_PREVIEW, _PREVIEW_SOURCE, _PENDING_PREVIEW  # noqa: PLW0603
+    _PENDING_PREVIEW = None
+    _PREVIEW_SOURCE = None
     if CURRENT_PREVIEW:
         cast(AbstractPlaceable, CURRENT_PREVIEW).destroy()
         CURRENT_PREVIEW = None
+    for pooled in _PREVIEW_POOL.values():
+        pooled.destroy()
+    _PREVIEW_POOL.clear()
+
+
+def forget_previews() -> None:
+    """Drop all preview references without touching them, called on every Map Load start."""
+    global CURRENT_PREVIEW, _PREVIEW_SOURCE, _PENDING_PREVIEW  # noqa: PLW0603
+    CURRENT_PREVIEW = None
+    _PREVIEW_SOURCE = None
+    _PENDING_PREVIEW = None
+    _PREVIEW_POOL.clear()
 
 
 def add_rotation(rotator: tuple[int, int, int]) -> None:
     if SELECTED_OBJECT:
         SELECTED_OBJECT.add_rotation(rotator)
+        mark_dirty()
 
 
 def add_scale(scale: float) -> None:
     if SELECTED_OBJECT:
         SELECTED_OBJECT.add_scale(scale)
+        mark_dirty()
 
 
 def calculate_preview() -> None:
@@ -70,6 +179,8 @@ def highlight(pc: WillowPlayerController, to_highlight: AbstractPlaceable | None
 def move_tick(pc: WillowPlayerController, offset: float) -> None:
     pc_forward = Vector(pc.CalcViewRotation)
     pc_location = Vector(pc.Location)
+    if settings.b_show_preview:
+        _flush_pending_preview()
     if settings.b_show_preview and CURRENT_PREVIEW:
         _x, _y = euler_rotate_vector_2d(0, 1, pc.CalcViewRotation.Yaw)
         w = tan(radians(pc.ToHFOV(pc.GetFOVAngle()) / 2)) * 200
@@ -88,13 +199,14 @@ def move_tick(pc: WillowPlayerController, offset: float) -> None:
 
     if SELECTED_OBJECT and not settings.b_lock_object_position:
         forward = pc_forward * offset
-        SELECTED_OBJECT.set_location(
-            (
-                round_to_multiple(pc.Location.X + forward.x, settings.editor_grid_size),
-                round_to_multiple(pc.Location.Y + forward.y, settings.editor_grid_size),
-                round_to_multiple(pc.Location.Z + forward.z, settings.editor_grid_size),
-            ),
-        )
+        location = [
+            round_to_multiple(pc.Location.X + forward.x, settings.editor_grid_size),
+            round_to_multiple(pc.Location.Y + forward.y, settings.editor_grid_size),
+            round_to_multiple(pc.Location.Z + forward.z, settings.editor_grid_size),
+        ]
+        SELECTED_OBJECT.set_location(location)
+        if _SNAPSHOT is not None and _SNAPSHOT_OBJECT is SELECTED_OBJECT:
+            _SNAPSHOT.location = location  # only the location changed, no need to retake the whole snapshot
     # We need to highlight the currently selected object as the last thing, as the object might have moved
     if HELPER_INSTANCE and not SELECTED_OBJECT:
         highlight(pc, HELPER_INSTANCE.get_selected_object())
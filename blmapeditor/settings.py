@@ -15,6 +15,8 @@ show_interactive_objects_window = options.HiddenOption[bool | None](identifier="
 show_pawns_window = options.HiddenOption[bool | None](identifier="Pawns", value=False)
 show_prefabs_window = options.HiddenOption[bool | None](identifier="Prefabs", value=False)
 show_packages_window = options.HiddenOption[bool | None](identifier="Packages", value=False)
+show_scatter_window = options.HiddenOption[bool | None](identifier="Scatter", value=False)
+show_layers_window = options.HiddenOption[bool | None](identifier="Layers", value=False)
 
 ALL_OPTIONS: list[options.HiddenOption] = [
     show_quicksettings_window,
@@ -23,5 +25,7 @@ ALL_OPTIONS: list[options.HiddenOption] = [
     show_pawns_window,
     show_prefabs_window,
     show_packages_window,
+    show_scatter_window,
+    show_layers_window,
     draw_debug_box_color,
 ]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import TYPE_CHECKING, cast
+
+from coroutines import TickCoroutine, start_coroutine_tick
+from mods_base import ENGINE
+
+from . import handles, mapfile, pathnames
+
+if TYPE_CHECKING:
+    from common import LevelStreaming, WillowGameEngine
+
+    from .placeablehelpers import PlaceableHelper
+    from .placeables import AbstractPlaceable
+
+    ENGINE = cast(WillowGameEngine, ENGINE)
+
+# sub-level -> the map changes of its objects, saved when it streamed out so they are applied again on stream in
+stashed: dict[str, dict] = {}
+_waiting: set[str] = set()  # sub-levels that were requested to stream in but are not visible yet
+
+
+def _get_streaming_level(level_name: str) -> LevelStreaming | None:
+    for streaming_level in ENGINE.GetCurrentWorldInfo().StreamingLevels:
+        if streaming_level is not None and str(streaming_level.PackageName).lower() == level_name:
+            return streaming_level
+    return None
+
+
+def is_in_level(path_name: str, level_name: str) -> bool:
+    """If an object belongs to the given sub-level, every path name starts with the package of its level."""
+    return path_name.lower().startswith(f"{level_name}.")
+
+
+def filter_level(map_data: dict, level_name: str) -> dict:
+    """Only keep the Edit and Destroy entries of objects of the given sub-level, Create entries never belong to one."""
+    edited = {
+        uclass: {path: attrs for path, attrs in entries.items() if is_in_level(path, level_name)}
+        for uclass, entries in map_data.get("Edit", {}).items()
+    }
+    destroyed = {
+        uclass: [path for path in entries if is_in_level(path, level_name)]
+        for uclass, entries in map_data.get("Destroy", {}).items()
+    }
+    return {"Edit": edited, "Destroy": destroyed}
+
+
+def stream_out(helpers: list[PlaceableHelper], level_name: str) -> list[AbstractPlaceable]:
+    """
+    Let every helper forget its objects of a sub-level that is about to be streamed out.
+
+    :param helpers:
+    :param level_name:
+    :return: The forgotten objects, their in-game objects are gone once the sub-level is unloaded.
+    """
+    _waiting.discard(level_name)
+    stash = stashed.setdefault(level_name, {})
+    removed = [placeable for helper in helpers for placeable in helper.on_level_streamed_out(level_name, stash)]
+    if not stash:  # e.g. the sub-level was not loaded, its entries get applied from the map files on stream in
+        del stashed[level_name]
+    handles.invalidate_level(level_name)  # references we do not track, e.g. the clipboard, must not touch them anymore
+    pathnames.forget_level(level_name)
+    return removed
+
+
+def _wait_for_stream_in(level_name: str, callback: Callable[[str], None]) -> TickCoroutine:
+    while level_name in _waiting:
+        streaming_level = _get_streaming_level(level_name)
+        if streaming_level is None:
+            break  # not a sub-level of the current level
+        if streaming_level.LoadedLevel is not None and streaming_level.bIsVisible:
+            callback(level_name)
+            break
+        yield None
+    _waiting.discard(level_name)
+    return None
+
+
+def request_stream_in(level_name: str, callback: Callable[[str], None]) -> None:
+    """Call back once a sub-level that was requested to stream in is loaded and visible."""
+    if level_name in _waiting:
+        return
+    _waiting.add(level_name)
+    start_coroutine_tick(_wait_for_stream_in(level_name, callback))
+
+
+def merge_stashed(level: dict) -> None:
+    """Add the changes of every streamed out sub-level to a level that is about to be saved."""
+    for changes in stashed.values():
+        mapfile.diff.merge_levels(level, changes)
+
+
+def clear() -> None:
+    """Forget all stashed changes, called on every Map Load start."""
+    stashed.clear()
+    _waiting.clear()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Collection
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .placeables import AbstractPlaceable
+
+    GetTagged = Callable[[str], Collection[AbstractPlaceable]]
+    GetAll = Callable[[], set[AbstractPlaceable]]
+
+# Quoted tags may contain spaces, unquoted tags end at whitespace, parentheses and operators
+_TOKEN_PATTERN: re.Pattern[str] = re.compile(r'\s*(?:(?P<op>[()&|!])|"(?P<quoted>[^"]*)"|(?P<word>[^\s()&|!"]+))')
+_WORD_PATTERN: re.Pattern[str] = re.compile(r'[^\s()&|!"]+')  # a tag that does not need to be quoted
+_KEYWORDS: dict[str, str] = {"and": "&", "or": "|", "not": "!"}
+
+
+@dataclass(frozen=True)
+class Tag:
+    name: str
+
+    def __str__(self) -> str:
+        if _WORD_PATTERN.fullmatch(self.name) and self.name.lower() not in _KEYWORDS:
+            return self.name
+        return f'"{self.name}"'
+
+    def matches(self, tags: Collection[str]) -> bool:
+        return self.name in tags
+
+    def select(self, get_tagged: GetTagged, get_all: GetAll) -> set[AbstractPlaceable]:  # noqa: ARG002
+        return set(get_tagged(self.name))
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: Expression
+
+    def __str__(self) -> str:
+        return f"not {_group(self.operand, (And, Or))}"
+
+    def matches(self, tags: Collection[str]) -> bool:
+        return not self.operand.matches(tags)
+
+    def select(self, get_tagged: GetTagged, get_all: GetAll) -> set[AbstractPlaceable]:
+        return get_all() - self.operand.select(get_tagged, get_all)
+
+
+@dataclass(frozen=True)
+class And:
+    operands: tuple[Expression, ...]
+
+    def __str__(self) -> str:
+        return " and ".join(_group(x, (Or,)) for x in self.operands)
+
+    def matches(self, tags: Collection[str]) -> bool:
+        return all(x.matches(tags) for x in self.operands)
+
+    def select(self, get_tagged: GetTagged, get_all: GetAll) -> set[AbstractPlaceable]:
+        # Negated operands are subtracted from the others, only "not a and not b" has to look at every Placeable
+        selected = sorted(
+            (x.select(get_tagged, get_all) for x in self.operands if not isinstance(x, Not)),
+            key=len,
+        )
+        result = selected[0].intersection(*selected[1:]) if selected else get_all()
+        for negated in self.operands:
+            if isinstance(negated, Not):
+                result -= negated.operand.select(get_tagged, get_all)
+        return result
+
+
+@dataclass(frozen=True)
+class Or:
+    operands: tuple[Expression, ...]
+
+    def __str__(self) -> str:
+        return " or ".join(str(x) for x in self.operands)
+
+    def matches(self, tags: Collection[str]) -> bool:
+        return any(x.matches(tags) for x in self.operands)
+
+    def select(self, get_tagged: GetTagged, get_all: GetAll) -> set[AbstractPlaceable]:
+        return set().union(*(x.select(get_tagged, get_all) for x in self.operands))
+
+
+Expression = Tag | Not | And | Or
+
+
+def _group(expression: Expression, weaker: tuple[type, ...]) -> str:
+    """Format the operand of an operator, operands that bind weaker than that operator get parenthesized."""
+    return f"({expression})" if isinstance(expression, weaker) else str(expression)
+
+
+def _tokenize(query: str) -> list[tuple[str, str]]:
+    """Split the query into (kind, value) tokens, kind is either "op" or "tag"."""
+    tokens: list[tuple[str, str]] = []
+    pos = 0
+    query = query.rstrip()
+    while pos < len(query):
+        match = _TOKEN_PATTERN.match(query, pos)
+        if match is None:
+            raise ValueError(f"Unexpected character at position {pos + 1}: {query[pos:].strip()[:1]!r}")
+        if match["op"]:
+            tokens.append(("op", match["op"]))
+        elif match["quoted"] is not None:
+            tokens.append(("tag", match["quoted"]))
+        elif match["word"].lower() in _KEYWORDS:
+            tokens.append(("op", _KEYWORDS[match["word"].lower()]))
+        else:
+            tokens.append(("tag", match["word"]))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser, "not" binds stronger than "and", "and" binds stronger than "or"."""
+
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        self.tokens: list[tuple[str, str]] = tokens
+        self.pos: int = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def accept(self, op: str) -> bool:
+        if self.peek() == ("op", op):
+            self.pos += 1
+            return True
+        return False
+
+    def parse_or(self) -> Expression:
+        operands = [self.parse_and()]
+        while self.accept("|"):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def parse_and(self) -> Expression:
+        operands = [self.parse_not()]
+        while self.accept("&"):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def parse_not(self) -> Expression:
+        if self.accept("!"):
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Expression:
+        token = self.peek()
+        if token is None:
+            raise ValueError("Unexpected end of the tag expression")
+        self.pos += 1
+        if token[0] == "tag":
+            return Tag(token[1])
+        if token[1] == "(":
+            expression = self.parse_or()
+            if not self.accept(")"):
+                raise ValueError("Missing closing parenthesis")
+            return expression
+        raise ValueError(f"Expected a tag, got {token[1]!r}")
+
+
+def parse(query: str) -> Expression | None:
+    """
+    Parse a boolean tag expression, e.g. 'cover and not (red or "dark blue")'.
+    Supported operators are and/&, or/|, not/! and parentheses. Tags are case-sensitive, quote tags with spaces.
+
+    :param query:
+    :return: None if the query is empty.
+    :raises ValueError: If the query is not a valid tag expression.
+    """
+    tokens = _tokenize(query)
+    if not tokens:
+        return None
+    parser = _Parser(tokens)
+    expression = parser.parse_or()
+    if (token := parser.peek()) is not None:
+        raise ValueError(f"Unexpected {token[1]!r} after the end of the tag expression")
+    return expression